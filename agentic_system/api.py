@@ -1,51 +1,275 @@
 """
-Mock API Layer for the Faculty Intelligence Dashboard.
+API Layer for the Faculty Intelligence Dashboard and the (mock) LMS integration.
 In a real deployment, this would be served via FastAPI or Flask.
 """
+import os
 import json
 import numpy as np
+import pandas as pd
+
+COURSE_KEYS = ["code_module", "code_presentation"]
+STUDENT_KEYS = COURSE_KEYS + ["id_student"]
+ACTIVITY_COLUMNS = ["pace", "lag", "volatility", "pace_variance"]
+DATA_PATH = "oulad_augmentation/my_augmented_ts.csv"
+
+def _build_cohort(weekly_df: pd.DataFrame, recent_weeks: int = 4):
+    """build_cohort_features plus the enrolment index of every input row (for course-week bincounts)."""
+    row_student = weekly_df.groupby(STUDENT_KEYS, observed=True, sort=True).ngroup().values
+    week = weekly_df["week"].values.astype(np.int64)
+    order = np.argsort(row_student * (week.max() + 1 if len(week) else 1) + week, kind="stable")
+    code, week = row_student[order], week[order]
+    clicks = weekly_df["sum_click"].values[order].astype(np.float64)
+
+    # Each enrolment is now one contiguous block of weeks in increasing order
+    starts = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+    last = np.r_[starts[1:], len(code)] - 1
+    counts = (last - starts + 1).astype(np.float64)
+
+    features = weekly_df.iloc[order[starts]][STUDENT_KEYS].reset_index(drop=True)
+    course = features.groupby(COURSE_KEYS, observed=True, sort=True).ngroup().values
+    features["week"] = week[last]
+    mean_clicks = np.add.reduceat(clicks, starts) / counts
+    var = (np.add.reduceat(clicks**2, starts) - counts * mean_clicks**2) / np.maximum(counts - 1, 1)
+    std_clicks = np.sqrt(np.maximum(var, 0)) * (counts > 1)
+    last_active_week = np.maximum.reduceat(np.where(clicks > 0, week, -1), starts)
+    course_last_week = np.zeros(course.max() + 1 if len(course) else 0, dtype=np.int64)
+    np.maximum.at(course_last_week, course, week[last])
+
+    # Course mean clicks of every course-week, and of each student's recent weeks
+    n_weeks = int(week.max()) + 1 if len(week) else 1
+    cell = course[code] * n_weeks + week
+    course_week_clicks = np.bincount(cell, weights=clicks) / np.maximum(np.bincount(cell), 1)
+    recent = week > week[last][code] - recent_weeks
+    n_recent = np.add.reduceat(recent.astype(np.float64), starts)
+    recent_clicks = np.add.reduceat(clicks * recent, starts) / n_recent
+    recent_course = np.add.reduceat(course_week_clicks[cell] * recent, starts) / n_recent
+
+    features["pace"] = np.clip(np.divide(recent_clicks, recent_course, out=np.zeros_like(recent_clicks),
+                                         where=recent_course > 0), 0, 3)
+    features["lag"] = 7.0 * (course_last_week[course] - last_active_week)
+    features["volatility"] = weekly_df["volatility_idx"].values[order][last] / (mean_clicks + 1.0)
+    features["pace_variance"] = weekly_df["synthesized_hesitation_sec"].values[order][last] / 100.0
+    features["drift_score"] = np.maximum(0, (mean_clicks - clicks[last]) / (std_clicks + 1.0))
+    if "is_collapsed" in weekly_df.columns:
+        features["is_collapsed"] = weekly_df["is_collapsed"].values[order][last].astype(bool)
+    return features, row_student
+
+def build_cohort_features(weekly_df: pd.DataFrame, recent_weeks: int = 4) -> pd.DataFrame:
+    """
+    Reduces the weekly per-student time series (augmented OULAD: code_module, code_presentation,
+    id_student, week, sum_click, synthesized_hesitation_sec, volatility_idx) to one row per
+    enrolment, sorted by STUDENT_KEYS, with the RiskPredictor activity features:
+      pace          - mean clicks over the last `recent_weeks` weeks / the course mean in those weeks
+      lag           - days between the student's last active week and the course's latest week
+      volatility    - volatility_idx relative to the student's mean weekly clicks
+      pace_variance - latest hesitation seconds / 100 (the predictor's hesitation channel)
+      drift_score   - how far the latest week's clicks fall below the student's own mean, in std units
+    After one sort, every enrolment is a contiguous block and all reductions are numpy reduceat calls.
+    """
+    return _build_cohort(weekly_df, recent_weeks)[0]
 
 class FacultyDashboardAPI:
-    def __init__(self):
-        pass
+    """
+    Course health views for the Faculty Intelligence Dashboard, aggregated from the scored cohort.
+
+    `load_cohort` scores every enrolment in one RiskPredictor.score_cohort call and reduces the
+    results per code_module / code_presentation (and per course-week) with bincounts. After that,
+    `get_course_health_summary` only looks up and sums the aggregates of the matching courses.
+    Without a loaded cohort, the first summary loads the augmented time series at `data_path`.
+
+    A student is at risk above `risk_threshold`; by default it is the `risk_quantile` of the
+    active cohort's risk scores, since the predictor's scores are not calibrated probabilities.
+    """
+    def __init__(self, predictor=None, risk_threshold: float = None, risk_quantile: float = 0.9,
+                 ethical_monitor=None, data_path: str = DATA_PATH):
+        if risk_threshold is None and not 0.0 < risk_quantile < 1.0:
+            raise ValueError(f"risk_quantile must be in (0, 1), got {risk_quantile}")
+        if ethical_monitor is None:
+            from agentic_system.ethical_ai.monitor import EthicalMonitor
+            ethical_monitor = EthicalMonitor()
+        self.predictor = predictor
+        self.risk_threshold = risk_threshold
+        self.risk_quantile = risk_quantile
+        self.ethical_monitor = ethical_monitor
+        self.data_path = data_path
+        self.courses = None
+        self.cohort_threshold = None
+
+    def load_cohort(self, weekly_df: pd.DataFrame):
+        if self.predictor is None:
+            from agentic_system.risk_prediction.model_registry import get_model_registry
+            self.predictor = get_model_registry().predictor()
+        from agentic_system.risk_prediction.predictor import DROPOUT_ARCHETYPES, EVIDENCE_FLAGS
+
+        features, student_code = _build_cohort(weekly_df)
+        scored = self.predictor.score_cohort(features[ACTIVITY_COLUMNS].values, features["drift_score"].values,
+                                             elapsed_weeks=features["week"].values)
+        course_code = features.groupby(COURSE_KEYS, observed=True, sort=True).ngroup().values
+        self.courses = features[COURSE_KEYS].drop_duplicates().reset_index(drop=True)
+        n_courses, n_types = len(self.courses), len(DROPOUT_ARCHETYPES)
+        active = ~features["is_collapsed"].values if "is_collapsed" in features else np.ones(len(features), dtype=bool)
+        threshold = self.risk_threshold
+        if threshold is None:
+            threshold = float(np.quantile(scored["risk"][active], self.risk_quantile)) if active.any() else np.inf
+        self.cohort_threshold = threshold
+        # Collapsed (already dropped) enrolments are never counted as at risk
+        at_risk = (scored["risk"] > threshold) & active
+        archetype = scored["archetype_index"]
+
+        def per_course(weights=None, mask=None, codes=None):
+            codes = course_code if codes is None else codes
+            if mask is not None:
+                codes, weights = codes[mask], None if weights is None else weights[mask]
+            return np.bincount(codes, weights=weights, minlength=n_courses)
 
-    def get_course_health_summary(self, course_id: str) -> dict:
+        self._active = per_course(mask=active)
+        self._at_risk = per_course(mask=at_risk)
+        self._risk_sum = per_course(scored["risk"], mask=active)
+        self._types = np.bincount(course_code[at_risk] * n_types + archetype[at_risk],
+                                  minlength=n_courses * n_types).reshape(n_courses, n_types)
+        self._evidence = np.stack([per_course(mask=at_risk & scored["evidence"][:, j])
+                                   for j in range(len(EVIDENCE_FLAGS))], axis=1)
+        self._archetypes = [name.replace(" Dropout", "") for name in DROPOUT_ARCHETYPES]
+
+        # Course-week difficulty: hesitation, clicks and the at-risk students active that week
+        weeks = weekly_df["week"].values.astype(np.int64)
+        n_weeks = int(weeks.max()) + 1 if len(weeks) else 1
+        cell = course_code[student_code] * n_weeks + weeks
+        size = n_courses * n_weeks
+        self._week_rows = np.bincount(cell, minlength=size).reshape(n_courses, n_weeks)
+        self._week_hesitation = np.bincount(cell, weights=weekly_df["synthesized_hesitation_sec"].values,
+                                            minlength=size).reshape(n_courses, n_weeks)
+        self._week_clicks = np.bincount(cell, weights=weekly_df["sum_click"].values, minlength=size).reshape(n_courses, n_weeks)
+        risky_rows = at_risk[student_code]
+        self._week_at_risk = np.bincount(cell[risky_rows], minlength=size).reshape(n_courses, n_weeks)
+        self._week_types = np.bincount(cell[risky_rows] * n_types + archetype[student_code[risky_rows]],
+                                       minlength=size * n_types).reshape(n_courses, n_weeks, n_types)
+
+        # Modelled effect of each intervention on the at-risk students, scored in one batch
+        strategies = list(self.predictor.efficacy_map)
+        self._strategies = strategies
+        if at_risk.any():
+            cf = self.predictor.counterfactual_arrays(features.loc[at_risk, ACTIVITY_COLUMNS].values,
+                                                      features.loc[at_risk, "drift_score"].values, strategies,
+                                                      elapsed_weeks=features.loc[at_risk, "week"].values)
+            reduction = cf["risk"][:, :1] - cf["risk"][:, 1:]
+            risky_code = course_code[at_risk]
+            self._reduction = np.stack([per_course(reduction[:, j], codes=risky_code) for j in range(len(strategies))], axis=1)
+            self._baseline_risk = per_course(cf["risk"][:, 0], codes=risky_code)
+        else:
+            self._reduction = np.zeros((n_courses, len(strategies)))
+            self._baseline_risk = np.zeros(n_courses)
+
+        # Demographic parity of the at-risk rate, when the cohort carries demographics (e.g. studentInfo's gender)
+        self._group_size = self._group_at_risk = None
+        if "gender" in weekly_df.columns:
+            gender = np.empty(len(features), dtype=object)
+            gender[student_code] = weekly_df["gender"].values
+            groups, group_code = np.unique(gender.astype(str), return_inverse=True)
+            cell = course_code * len(groups) + group_code
+            self._group_size = np.bincount(cell[active], minlength=n_courses * len(groups)).reshape(n_courses, -1)
+            self._group_at_risk = np.bincount(cell[at_risk], minlength=n_courses * len(groups)).reshape(n_courses, -1)
+        return self
+
+    def _course_rows(self, course_id: str, code_presentation: str = None) -> np.ndarray:
+        """Indices of the courses matching a module code ("AAA"), or one presentation ("AAA_2013J")."""
+        module, _, presentation = course_id.partition("_")
+        presentation = code_presentation or presentation
+        mask = self.courses["code_module"].astype(str).values == module
+        if presentation:
+            mask &= self.courses["code_presentation"].astype(str).values == presentation
+        return np.flatnonzero(mask)
+
+    def get_course_health_summary(self, course_id: str, code_presentation: str = None) -> dict:
         """
-        Mocks the aggregation of all ReAct, Prediction, and Ethical layers 
-        into a single view for the professor.
+        Aggregates the Prediction, ReAct counterfactual and Ethical layers into a single view for
+        the professor. course_id is a code_module ("AAA", every presentation) or
+        "<code_module>_<code_presentation>".
         """
+        if self.courses is None and os.path.exists(self.data_path):
+            self.load_cohort(pd.read_csv(self.data_path))
+        rows = self._course_rows(course_id, code_presentation) if self.courses is not None else []
+        if len(rows) == 0:
+            # No cohort data for this course: the same summary with nothing counted
+            return self._summary(course_id, active=0, at_risk=0, mean_risk=None, types=[], evidence=[],
+                                 heatmap=[], clusters=[], suggestions=[],
+                                 effectiveness={"top_strategy": None, "avg_risk_reduction": None},
+                                 parity="Not evaluated (no cohort data for this course)")
+
+        active = int(self._active[rows].sum())
+        at_risk = int(self._at_risk[rows].sum())
+        types = self._types[rows].sum(0)
+
+        week_rows = self._week_rows[rows].sum(0)
+        observed = np.flatnonzero(week_rows)
+        avg_hesitation = self._week_hesitation[rows].sum(0)[observed] / week_rows[observed]
+        avg_clicks = self._week_clicks[rows].sum(0)[observed] / week_rows[observed]
+        week_at_risk = self._week_at_risk[rows].sum(0)[observed]
+        week_types = self._week_types[rows].sum(0)[observed]
+        heatmap = [{"week": int(w), "avg_hesitation": f"{h:.0f}s", "avg_clicks": round(float(c), 1)}
+                   for w, h, c in zip(observed, avg_hesitation, avg_clicks)]
+
+        # Failure clusters: the weeks with the highest hesitation, with the at-risk students active then
+        hardest = np.argsort(-avg_hesitation, kind="stable")[:3]
+        clusters = [{
+            "topic": f"Week {int(observed[i])}",
+            "avg_hesitation": f"{avg_hesitation[i]:.0f}s",
+            "affected_students": int(week_at_risk[i]),
+            "primary_associated_archetype": self._archetypes[int(np.argmax(week_types[i]))] if week_at_risk[i] else None
+        } for i in hardest]
+
+        suggestions = []
+        if len(hardest):
+            i = hardest[0]
+            ratio = avg_hesitation[i] / max(float(np.mean(avg_hesitation)), 1e-9)
+            suggestions.append(
+                f"Consider splitting Week {int(observed[i])}: its average hesitation ({avg_hesitation[i]:.0f}s) is "
+                f"{ratio:.1f}x the course average and {int(week_at_risk[i])} at-risk students were active that week"
+                + (f", mostly {clusters[0]['primary_associated_archetype']}." if clusters[0]["primary_associated_archetype"] else "."))
+
+        n_at_risk = float(at_risk)
+        effectiveness = {"top_strategy": None, "avg_risk_reduction": None}
+        if n_at_risk:
+            mean_reduction = self._reduction[rows].sum(0) / n_at_risk
+            baseline = self._baseline_risk[rows].sum() / n_at_risk
+            best = int(np.argmax(mean_reduction))
+            effectiveness = {"top_strategy": self._strategies[best].replace("_", " ").title(),
+                             "avg_risk_reduction": f"{100 * mean_reduction[best] / max(baseline, 1e-9):.1f}%"}
+
+        if self._group_size is not None:
+            size, risky = self._group_size[rows].sum(0), self._group_at_risk[rows].sum(0)
+            rate = risky[size > 0] / size[size > 0]
+            gap = float(rate.max() - rate.min()) if len(rate) else 0.0
+            parity = f"{'Passed' if gap < 0.02 else 'Review'} (Difference {100 * gap:.1f}%)"
+        else:
+            parity = "Not evaluated (no demographic columns in the cohort)"
+
+        return self._summary(course_id, active=active, at_risk=at_risk,
+                             mean_risk=round(float(self._risk_sum[rows].sum() / active), 4) if active else None,
+                             types=types, evidence=self._evidence[rows].sum(0), heatmap=heatmap, clusters=clusters,
+                             suggestions=suggestions, effectiveness=effectiveness, parity=parity)
+
+    def _summary(self, course_id, active, at_risk, mean_risk, types, evidence, heatmap, clusters,
+                 suggestions, effectiveness, parity) -> dict:
+        from agentic_system.risk_prediction.predictor import DROPOUT_ARCHETYPES, EVIDENCE_FLAGS
+        archetypes = [name.replace(" Dropout", "") for name in DROPOUT_ARCHETYPES]
+        types = np.zeros(len(archetypes), dtype=np.int64) if len(types) == 0 else types
+        evidence = np.zeros(len(EVIDENCE_FLAGS), dtype=np.int64) if len(evidence) == 0 else evidence
         return {
             "course_id": course_id,
-            "active_cohort_size": 450,
-            "at_risk_count": 42,
-            "dropout_type_distribution": {
-                "Cognitive Overload": 18,
-                "Time-Management": 12,
-                "Burnout": 8,
-                "Conceptual Confusion": 3,
-                "Motivation": 1
-            },
-            "course_difficulty_heatmap": [
-                {"module": "Week 1: Intro", "avg_hesitation": "12s", "avg_accuracy": 0.92},
-                {"module": "Week 4: Pointers", "avg_hesitation": "145s", "avg_accuracy": 0.44}
-            ],
-            "topic_level_failure_clusters": [
-                {
-                    "topic": "Memory Allocation (Week 4)",
-                    "affected_students": 58,
-                    "primary_associated_archetype": "Cognitive Overload"
-                }
-            ],
-            "syllabus_improvement_suggestions": [
-                "Consider splitting 'Week 4: Pointers' into two separate modules. The Intervention Engine has restructured schedules for 30% of students arriving at this module due to high cognitive overload."
-            ],
-            "intervention_effectiveness": {
-                "top_strategy": "Content Simplification",
-                "avg_risk_reduction": "28.5%"
-            },
+            "active_cohort_size": active,
+            "at_risk_count": at_risk,
+            "risk_threshold": None if self.cohort_threshold is None else round(float(self.cohort_threshold), 4),
+            "mean_risk": mean_risk,
+            "dropout_type_distribution": {name: int(c) for name, c in zip(archetypes, types)},
+            "at_risk_evidence": {flag: int(c) for flag, c in zip(EVIDENCE_FLAGS, evidence)},
+            "course_difficulty_heatmap": heatmap,
+            "topic_level_failure_clusters": clusters,
+            "syllabus_improvement_suggestions": suggestions,
+            "intervention_effectiveness": effectiveness,
             "ethical_compliance_summary": {
-                "demographic_parity": "Passed (Difference < 2%)",
-                "fatigue_prevented_events": 14
+                "demographic_parity": parity,
+                "fatigue_prevented_events": self.ethical_monitor.fatigue_blocks_issued
             }
         }
 
@@ -98,7 +322,20 @@ class LMSIntegrationAPI:
         }
 
 if __name__ == "__main__":
-    faculty_api = FacultyDashboardAPI()
+    # Synthetic weekly cohort in the augmented OULAD layout
+    rng = np.random.default_rng(42)
+    n_students, n_weeks = 2000, 20
+    weekly = pd.DataFrame({
+        "code_module": np.repeat(rng.choice(["CS101", "MA102"], n_students), n_weeks),
+        "code_presentation": "2024J",
+        "id_student": np.repeat(np.arange(n_students), n_weeks),
+        "week": np.tile(np.arange(n_weeks), n_students),
+    })
+    weekly["sum_click"] = rng.poisson(np.repeat(rng.gamma(2.0, 10.0, n_students), n_weeks))
+    weekly["synthesized_hesitation_sec"] = rng.gamma(2.0, 20.0, len(weekly)) * (1 + (weekly["week"] == 4) * 3)
+    weekly["volatility_idx"] = weekly.groupby("id_student")["sum_click"].transform(lambda x: x.rolling(4, min_periods=2).std()).fillna(0)
+
+    faculty_api = FacultyDashboardAPI().load_cohort(weekly)
     print("GET /api/v1/faculty/course-health/CS101")
     response = faculty_api.get_course_health_summary("CS101")
     print(json.dumps(response, indent=2))
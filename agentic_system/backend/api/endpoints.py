@@ -8,6 +8,7 @@ from agentic_system.backend.db.session import get_db, get_mongo_db, get_influx_c
 from agentic_system.backend.models.user_models import User, Course
 from agentic_system.backend.schemas.schemas import UserCreate, UserResponse, DBConnectivityResponse
 from agentic_system.backend.core.config import settings
+from agentic_system.risk_prediction.model_registry import get_model_registry
 
 router = APIRouter()
 
@@ -122,18 +123,77 @@ async def predict_risk(payload: dict):
     Accepts a student activity vector and drift score, returns ML risk prediction.
     Used by the dashboard to power the Risk Overview panel.
     """
+    import asyncio
     import numpy as np
-    import sys, os
-    sys.path.insert(0, os.path.abspath('.'))
 
-    from agentic_system.risk_prediction.predictor import RiskPredictor
+    def observe_and_predict(predictor, activity_vector, drift_score, student_id, week, sum_click):
+        # A finished week ("week", with its raw click count "sum_click") is recorded for the
+        # student's LSTM sequence before scoring
+        if student_id is not None and week is not None:
+            predictor.observe_week([student_id], [int(week)], activity_vector[np.newaxis], [drift_score],
+                                   sum_clicks=None if sum_click is None else [float(sum_click)])
+        return predictor.predict(activity_vector, drift_score, student_id=student_id)
 
     try:
-        predictor = RiskPredictor()
+        predictor = get_model_registry().predictor()
         activity_vector = np.array(payload.get("activity_vector", [0.5, 1.0, 30.0, 0.5]))
         drift_score = float(payload.get("drift_score", 1.0))
-        result = predictor.predict(activity_vector, drift_score)
-        return result
+        # Off the event loop: the LSTM blend can wait up to its latency budget
+        return await asyncio.to_thread(observe_and_predict, predictor, activity_vector, drift_score,
+                                       payload.get("student_id"), payload.get("week"), payload.get("sum_click"))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/risk_prediction/predict_batch")
+async def predict_risk_batch(payload: dict):
+    """
+    Scores a cohort in one pass. Payload: "activity_matrix" (N x 4 activity vectors),
+    "drift_scores" (N values), optional "student_ids" (N ids, echoed back and used for the
+    LSTM blend) and optional "weeks" and "sum_clicks" (N finished course weeks and their raw
+    click counts, recorded in each student's LSTM sequence before scoring; re-sending a week
+    replaces it).
+    Used by nightly full-cohort scoring.
+    """
+    import asyncio
+    import numpy as np
+
+    activity_matrix = np.asarray(payload.get("activity_matrix", []), dtype=float)
+    drift_scores = payload.get("drift_scores", [])
+    student_ids = payload.get("student_ids")
+    weeks = payload.get("weeks")
+    if activity_matrix.ndim != 2 or len(activity_matrix) != len(drift_scores):
+        raise HTTPException(status_code=422, detail="activity_matrix must be N x 4 with one drift score per row")
+    if student_ids is not None and len(student_ids) != len(activity_matrix):
+        raise HTTPException(status_code=422, detail="student_ids must have one id per row")
+    if weeks is not None and (student_ids is None or len(weeks) != len(activity_matrix)):
+        raise HTTPException(status_code=422, detail="weeks needs student_ids and one week per row")
+
+    try:
+        predictor = get_model_registry().predictor()
+        if weeks is not None:
+            predictor.observe_week(student_ids, weeks, activity_matrix, drift_scores,
+                                   sum_clicks=payload.get("sum_clicks"))
+        # Off the event loop: a full cohort takes a moment to score
+        results = await asyncio.to_thread(predictor.predict_batch, activity_matrix, drift_scores,
+                                          student_ids=student_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if student_ids is not None:
+        for student_id, result in zip(student_ids, results):
+            result["student_id"] = student_id
+    return {"count": len(results), "predictions": results}
+
+
+@router.get("/diagnostics/models")
+async def model_diagnostics():
+    """
+    Reports the shared ML model registry: which artifacts are loaded, how long each load took,
+    the library version that produced it and its SHA-256 checksum.
+    """
+    return get_model_registry().diagnostics()
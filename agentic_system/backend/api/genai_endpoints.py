@@ -15,8 +15,8 @@ class InterveneRequest(BaseModel):
     student_id: str
     drift_score: float = 2.5
     drift_vector: List[float] = [0.4, 3.0, 80.0, 1.8]  # [pace, lag, hesitation, volatility]
-    dropout_prob: float = 0.75
-    time_to_dropout: int = 10
+    dropout_prob: Optional[float] = None     # predicted by the shared RiskPredictor when omitted
+    time_to_dropout: Optional[int] = None
     top_features: List[str] = ["volatility", "lag"]
     context: Optional[Dict] = {}
     intervention_history: Optional[List[Dict]] = []
@@ -31,12 +31,22 @@ async def create_intervention(req: InterveneRequest):
     try:
         # Lazy import to avoid circular deps
         from agentic_system.react_planner.agent import ReActPlanner, StudentState
+        from agentic_system.risk_prediction.model_registry import get_model_registry
+
+        dropout_prob, time_to_dropout = req.dropout_prob, req.time_to_dropout
+        if dropout_prob is None or time_to_dropout is None:
+            predictor = get_model_registry().predictor()
+            prediction = predictor.predict(predictor.from_drift_vector(req.drift_vector), req.drift_score)
+            if dropout_prob is None:
+                dropout_prob = prediction["risk_score"]
+            if time_to_dropout is None:
+                time_to_dropout = prediction["predicted_dropout_days"]
 
         state = StudentState(
             drift_score=req.drift_score,
             drift_vector=req.drift_vector,
-            dropout_prob=req.dropout_prob,
-            time_to_dropout=req.time_to_dropout,
+            dropout_prob=dropout_prob,
+            time_to_dropout=time_to_dropout,
             context={"student_id": req.student_id, **(req.context or {})},
             intervention_history=req.intervention_history or []
         )
@@ -51,7 +61,7 @@ async def create_intervention(req: InterveneRequest):
             db = get_mongo_db()
             await db["interventions"].insert_one({
                 "student_id": req.student_id,
-                "risk_score": req.dropout_prob,
+                "risk_score": dropout_prob,
                 "root_cause": result["root_cause"],
                 "strategy":   result["action_parameters"]["strategy"],
                 "payload":    result["generated_payload"],
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,16 +7,20 @@ from agentic_system.backend.api.telemetry_endpoints import router as telemetry_r
 from agentic_system.backend.api.genai_endpoints import router as genai_router
 from agentic_system.backend.streaming.producer import KafkaProducerManager
 from agentic_system.backend.streaming.consumer_worker import KafkaConsumerWorker
+from agentic_system.risk_prediction.model_registry import get_model_registry
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup actions
+    # Load the ML artifacts once, off the event loop; every route shares this registry
+    app.state.model_registry = await asyncio.to_thread(get_model_registry().load_all)
     await KafkaProducerManager.start()
     await KafkaConsumerWorker.start()
     yield
     # Shutdown actions
     await KafkaProducerManager.stop()
     await KafkaConsumerWorker.stop()
+    app.state.model_registry.clear()
 
 app = FastAPI(
     title="Dropout Prevention API",
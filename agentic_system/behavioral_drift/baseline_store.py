@@ -0,0 +1,164 @@
+import os
+import shutil
+
+import numpy as np
+
+# Per-student arrays (one row per student) and their dtypes; each is one .npy of a snapshot
+_FIELDS = {
+    "windows": np.float32,  # ring buffer of the last `window` daily vectors
+    "heads":   np.int32,    # next position to write
+    "counts":  np.int32,    # rows held, capped at window
+    "mu":      np.float64,  # baseline reconstruction error mean
+    "sigma":   np.float64,  # baseline reconstruction error std
+    "scores":  np.float64,  # EWMA drift score D(t)
+}
+
+class BaselineStore:
+    """
+    Per-student state of the BehavioralDriftDetector in preallocated NumPy arrays: a
+    (capacity, window, n_features) float32 ring buffer of recent daily vectors, the
+    baseline mu/sigma of the reconstruction error and the EWMA drift score, with a
+    student_id -> row index. Capacity doubles when a new student does not fit.
+
+    `save` snapshots the occupied rows to a directory of .npy files and `load` maps them
+    back with np.load(mmap_mode=...), so a restart does not re-read or re-train anything and
+    several worker processes share the same pages. About 200 bytes per student with the
+    default 10 x 4 window (plus the id index).
+    """
+    def __init__(self, window, n_features=4, capacity=1024):
+        self.window = window
+        self.n_features = n_features
+        self.ids = []
+        self.index = {}
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        for name, dtype in _FIELDS.items():
+            shape = (capacity, self.window, self.n_features) if name == "windows" else (capacity,)
+            setattr(self, name, np.zeros(shape, dtype=dtype))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, student_id):
+        return student_id in self.index
+
+    @property
+    def capacity(self):
+        return len(self.mu)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity = max(2 * capacity, 1)
+        for name in _FIELDS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(self.ids)] = old[:len(self.ids)]
+            setattr(self, name, new)
+
+    def rows(self, student_ids):
+        """Row of every student id, -1 for students without a baseline."""
+        index = self.index
+        return np.fromiter((index.get(s, -1) for s in student_ids), dtype=np.int64, count=len(student_ids))
+
+    def _assign_rows(self, student_ids):
+        rows = self.rows(student_ids)
+        new = np.flatnonzero(rows < 0)
+        if len(new):
+            if len(self.ids) + len(new) > self.capacity:
+                self._grow(len(self.ids) + len(new))
+            for i in new:
+                sid = student_ids[i]
+                if sid not in self.index:  # a new id repeated within the call keeps its first row
+                    self.index[sid] = len(self.ids)
+                    self.ids.append(sid)
+                rows[i] = self.index[sid]
+        return rows
+
+    def set_baselines(self, student_ids, windows, lengths, mu, sigma):
+        """
+        (Re)writes the baseline of every student: windows is (N, window, n_features) with each
+        student's `lengths[i]` most recent vectors left-aligned, oldest first. Drift scores
+        restart at 0. Returns the students' rows.
+        """
+        student_ids = list(student_ids)
+        rows = self._assign_rows(student_ids)
+        self.windows[rows] = windows
+        lengths = np.asarray(lengths)
+        self.counts[rows] = lengths
+        self.heads[rows] = lengths % self.window
+        self.mu[rows] = mu
+        self.sigma[rows] = sigma
+        self.scores[rows] = 0.0
+        return rows
+
+    def push(self, rows, X):
+        """Appends row i of X (N, n_features) to the window of rows[i]; rows must be distinct."""
+        heads = self.heads[rows]
+        self.windows[rows, heads] = X
+        self.heads[rows] = (heads + 1) % self.window
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.window)
+
+    def gather(self, rows):
+        """
+        Chronological (N, window, n_features) windows of the rows, left-aligned with zero
+        padding, and the number of real vectors in each.
+        """
+        counts = self.counts[rows]
+        # Oldest vector first: a full window starts at its head, a partial one at 0
+        order = (self.heads[rows, np.newaxis] - counts[:, np.newaxis] + np.arange(self.window)) % self.window
+        return self.windows[rows[:, np.newaxis], order], counts.astype(np.int64)
+
+    def baseline(self, student_id):
+        """One student's state as a dict (inspection and demos)."""
+        row = self.index[student_id]
+        window, length = self.gather(np.array([row]))
+        return {
+            "mu_error": float(self.mu[row]),
+            "sigma_error": float(self.sigma[row]),
+            "drift_score": float(self.scores[row]),
+            "historical_seq": window[0, :length[0]],
+        }
+
+    def save(self, path):
+        """
+        Snapshots the occupied rows into directory `path` (replaced atomically). Student ids
+        must be all strings or all integers.
+        """
+        # np.asarray would silently turn a mix of strings and integers into strings
+        if not (all(isinstance(s, str) for s in self.ids) or all(isinstance(s, (int, np.integer)) for s in self.ids)):
+            raise ValueError("BaselineStore ids must be all strings or all integers to be saved")
+        ids = np.asarray(self.ids, dtype=str if self.ids and isinstance(self.ids[0], str) else np.int64)
+        tmp = f"{path}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        n = len(self.ids)
+        for name in _FIELDS:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name)[:n])
+        np.save(os.path.join(tmp, "student_ids.npy"), ids)
+
+        old = f"{path}.old"
+        if os.path.exists(path):
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, mmap_mode="c"):
+        """
+        Maps a snapshot written by `save`. The default copy-on-write mode shares the file's
+        pages and keeps updates private to this process; "r+" writes updates through to the
+        file. Adding students beyond the snapshot moves the arrays into memory.
+        """
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in _FIELDS}
+        ids = np.load(os.path.join(path, "student_ids.npy"), allow_pickle=False)
+        _, window, n_features = arrays["windows"].shape
+        store = cls.__new__(cls)
+        store.window, store.n_features = window, n_features
+        for name, array in arrays.items():
+            setattr(store, name, array)
+        store.ids = ids.tolist()
+        store.index = {sid: row for row, sid in enumerate(store.ids)}
+        return store
@@ -0,0 +1,139 @@
+import numpy as np
+
+from agentic_system.behavioral_drift.drift_detector import DRIFT_ZONE_BOUNDS, occurrence_passes
+
+class CascadedDriftDetector:
+    """
+    Two-tier drift detection in front of a BehavioralDriftDetector.
+
+    Tier 1 keeps O(1) NumPy state per student and feature of [pace, lag, hesitation,
+    volatility]: the z-score of each new value against the student's baseline window, an
+    EWMA of those z-scores and a two-sided CUSUM. Tier 2 is the autoencoder, run in one batch
+    only for the students tier 1 flags (any |EWMA z| above `ewma_limit` or CUSUM above
+    `cusum_h`), students whose D(t) is still above `release_below` from an earlier
+    escalation, and an audit sample: every student is scored at least once every
+    `audit_every` updates. Everyone else is carried forward without the autoencoder
+    (BehavioralDriftDetector.carry_rows). `stats()` reports the autoencoder calls avoided
+    and, from the audits of students tier 1 let through, how often the autoencoder alerted
+    on one of them: a live estimate of the alerts the pre-filter delays.
+
+    Tier-1 statistics follow the detector's baselines: a student retrained through this class
+    or directly on the detector (its baseline generation moved on) is refitted on the next
+    update. Baselines written into the store by other means need an explicit `refit(rows)`.
+
+    The limits trade autoencoder calls for recall and their defaults are tuned on a slow
+    drift that has weeks to build up. bench_cascaded_drift.py (3,000 students, a tenth
+    drifting after a week) alerts every drifting student over 30 days, like always-on
+    scoring, but over 10 days, while the drift is still small, 70.9% against 83.6%.
+    With ewma_limit=1.0 and cusum_h=2.0 it is 86.6%, and 62% of the calls are avoided
+    instead of 82%. Tune the limits against the horizon you need alerts within.
+    """
+    def __init__(self, detector, ewma_lambda=0.3, ewma_limit=2.0, cusum_k=0.5, cusum_h=4.0,
+                 release_below=1.0, audit_every=7, min_std=1e-3):
+        self.detector = detector
+        self.store = detector.store
+        self.ewma_lambda = ewma_lambda
+        self.ewma_limit = ewma_limit
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.release_below = release_below
+        self.audit_every = audit_every
+        self.min_std = min_std
+        self.n_updates = 0
+        self.n_scored = 0
+        self.n_audits = 0
+        self.n_audit_alerts = 0
+        self._fitted_gen = np.zeros(0, dtype=np.int64)  # baseline generation tier 1 was fitted on, -1 = never
+
+    def _ensure_capacity(self):
+        capacity = self.store.capacity
+        if len(self._fitted_gen) >= capacity:
+            return
+        n, f = len(self._fitted_gen), self.store.n_features
+        fields = {"_fitted_gen": (np.int64, ()), "_mean": (np.float64, (f,)), "_std": (np.float64, (f,)),
+                  "_ewma": (np.float64, (f,)), "_cusum_pos": (np.float64, (f,)), "_cusum_neg": (np.float64, (f,)),
+                  "_since_scored": (np.int32, ())}
+        for name, (dtype, shape) in fields.items():
+            grown = np.full((capacity,) + shape, -1 if name == "_fitted_gen" else 0, dtype=dtype)
+            if n:
+                grown[:n] = getattr(self, name)
+            setattr(self, name, grown)
+        # Stagger the audits so a cohort fitted together is not audited on the same day
+        self._since_scored[n:] = np.arange(n, capacity) % self.audit_every
+
+    def train_baselines(self, student_ids, history, lengths=None, **kwargs):
+        """BehavioralDriftDetector.train_baselines, then refits tier 1 on the new windows."""
+        rows = self.detector.train_baselines(student_ids, history, lengths, **kwargs)
+        self.refit(rows)
+        return rows
+
+    def refit(self, rows=None):
+        """Tier-1 baseline (per-feature mean/std of the stored window) and state reset for store rows."""
+        self._ensure_capacity()
+        rows = np.arange(len(self.store)) if rows is None else np.unique(np.asarray(rows, dtype=np.int64))
+        windows, lengths = self.store.gather(rows)
+        valid = np.arange(self.store.window) < lengths[:, np.newaxis]
+        count = np.maximum(lengths, 1)[:, np.newaxis]
+        mean = np.where(valid[..., np.newaxis], windows, 0.0).sum(axis=1) / count
+        var = np.where(valid[..., np.newaxis], (windows - mean[:, np.newaxis]) ** 2, 0.0).sum(axis=1) / count
+        self._mean[rows] = mean
+        self._std[rows] = np.maximum(np.sqrt(var), self.min_std * np.maximum(np.abs(mean), 1.0))
+        self._ewma[rows] = self._cusum_pos[rows] = self._cusum_neg[rows] = 0.0
+        self._fitted_gen[rows] = self.detector.baseline_generations(rows)
+
+    def update(self, student_ids, X):
+        """
+        Cascaded update_drift_scores_batch. Returns (D_t array, zone index array into
+        DRIFT_ZONES, boolean array of the updates that ran the autoencoder).
+        """
+        store_rows, X = self.detector.resolve_rows(student_ids, X)
+        self._ensure_capacity()
+        # Never fitted, or retrained on the detector since tier 1 was fitted
+        stale = store_rows[self._fitted_gen[store_rows] != self.detector.baseline_generations(store_rows)]
+        if len(stale):
+            self.refit(stale)
+
+        D = np.empty(len(store_rows))
+        scored = np.zeros(len(store_rows), dtype=bool)
+        for sel in occurrence_passes(store_rows):
+            rows, x = store_rows[sel], X[sel]
+
+            # Tier 1: per-feature EWMA z-score and two-sided CUSUM
+            z = (x - self._mean[rows]) / self._std[rows]
+            ewma = self.ewma_lambda * z + (1 - self.ewma_lambda) * self._ewma[rows]
+            pos = np.maximum(0.0, self._cusum_pos[rows] + z - self.cusum_k)
+            neg = np.maximum(0.0, self._cusum_neg[rows] - z - self.cusum_k)
+            self._ewma[rows], self._cusum_pos[rows], self._cusum_neg[rows] = ewma, pos, neg
+            flagged = ((np.abs(ewma) > self.ewma_limit) | (pos > self.cusum_h) | (neg > self.cusum_h)).any(axis=1)
+            flagged |= self.store.scores[rows] > self.release_below
+            audit = ~flagged & (self._since_scored[rows] >= self.audit_every - 1)
+            escalate = flagged | audit
+
+            # Tier 2: the autoencoder for the escalated students in one batch
+            hit, rest = np.flatnonzero(escalate), np.flatnonzero(~escalate)
+            if len(hit):
+                D[sel[hit]] = self.detector.score_rows(rows[hit], x[hit])
+                self._since_scored[rows[hit]] = 0
+                # A nominal verdict restarts the CUSUMs so a benign shift is not re-flagged every day
+                nominal = rows[hit][D[sel[hit]] <= DRIFT_ZONE_BOUNDS[0]]
+                self._cusum_pos[nominal] = self._cusum_neg[nominal] = 0.0
+                self.n_audits += int(audit.sum())
+                self.n_audit_alerts += int(np.sum(D[sel[audit]] > DRIFT_ZONE_BOUNDS[0]))
+            if len(rest):
+                D[sel[rest]] = self.detector.carry_rows(rows[rest], x[rest])
+                self._since_scored[rows[rest]] += 1
+            scored[sel] = escalate
+
+        self.n_updates += len(store_rows)
+        self.n_scored += int(scored.sum())
+        return D, self.detector.evaluate_thresholds(D), scored
+
+    def stats(self):
+        """Updates seen, autoencoder calls made, the fraction avoided and the audit alert rate."""
+        return {
+            "updates": self.n_updates,
+            "autoencoder_calls": self.n_scored,
+            "avoided_fraction": 1.0 - self.n_scored / self.n_updates if self.n_updates else 0.0,
+            "audits": self.n_audits,
+            "audit_alert_rate": self.n_audit_alerts / self.n_audits if self.n_audits else 0.0,
+        }
@@ -1,7 +1,63 @@
 import numpy as np
+import pandas as pd
 import torch
 import torch.nn as nn
-from collections import deque
+
+from agentic_system.behavioral_drift.baseline_store import BaselineStore
+
+# Multi-tiered Z-score zones: upper bound of each zone's D(t) and its (label, action)
+DRIFT_ZONE_BOUNDS = np.array([1.5, 2.5, 3.5])
+DRIFT_ZONES = [
+    ("Zone 0: Nominal", "Passive monitoring"),
+    ("Zone 1: Micro-Drift", "Trigger Subtle Generative Nudge"),
+    ("Zone 2: Structural Drift", "Trigger ReAct Reasoning Loop"),
+    ("Zone 3: Critical Rupture", "Trigger Emergency Escalation"),
+]
+
+def occurrence_passes(rows):
+    """
+    Splits a batch of store rows into passes in which every row appears at most once;
+    the k-th occurrence of a repeated row goes in pass k, so its updates apply in order.
+    Returns a list of index arrays into `rows`.
+    """
+    n = len(rows)
+    order = np.argsort(rows, kind='stable')
+    first = np.ones(n, dtype=bool)
+    first[1:] = rows[order][1:] != rows[order][:-1]
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n) - np.maximum.accumulate(np.where(first, np.arange(n), 0))
+    return [np.flatnonzero(rank == r) for r in range(int(rank.max(initial=-1)) + 1)]
+
+def build_weekly_drift_features(weekly_df, n_weeks, start_week=None):
+    """
+    Turns one presentation's OULAD weekly rows (id_student, week, sum_click,
+    synthesized_hesitation_sec, volatility_idx; one row per student-week) into the
+    detector's X_t = [pace, lag, hesitation, volatility] for weeks start_week (default: the
+    first week present) to start_week + n_weeks - 1. A week without a row is inactive.
+      pace       - the student's clicks / the cohort's mean clicks that week
+      lag        - days since the student's last active week (7 per week)
+      hesitation - synthesized_hesitation_sec
+      volatility - volatility_idx
+    Returns (student ids in sorted order, (students, n_weeks, 4) float32 array).
+    """
+    start_week = int(weekly_df['week'].min()) if start_week is None else start_week
+    weeks = weekly_df['week'].values - start_week
+    in_range = (weeks >= 0) & (weeks < n_weeks)
+    codes, student_ids = pd.factorize(weekly_df['id_student'].values[in_range], sort=True)
+    weeks = weeks[in_range]
+
+    features = np.zeros((len(student_ids), n_weeks, 4), dtype=np.float32)
+    clicks = np.zeros((len(student_ids), n_weeks))
+    clicks[codes, weeks] = weekly_df['sum_click'].values[in_range]
+    cohort_mean = clicks.mean(axis=0)
+    features[:, :, 0] = np.divide(clicks, cohort_mean, out=np.zeros_like(clicks), where=cohort_mean > 0)
+
+    week_index = np.arange(n_weeks)
+    last_active = np.maximum.accumulate(np.where(clicks > 0, week_index, -1), axis=1)
+    features[:, :, 1] = 7.0 * np.where(last_active >= 0, week_index - last_active, week_index + 1)
+    features[codes, weeks, 2] = weekly_df['synthesized_hesitation_sec'].values[in_range]
+    features[codes, weeks, 3] = weekly_df['volatility_idx'].values[in_range]
+    return np.asarray(student_ids), features
 
 class LSTMAutoencoder(nn.Module):
     """
@@ -43,15 +99,26 @@ class BehavioralDriftDetector:
     Monitors student engagement and compares current patterns to historical baselines
     using an LSTM Autoencoder and EWMA smoothing for drift detection.
     """
-    def __init__(self, alpha=0.3, baseline_window=14, features=4):
+    def __init__(self, alpha=0.3, baseline_window=14, features=4, store=None, reencode_every=None):
         self.alpha = alpha  # Decay factor for EWMA
         self.baseline_window = baseline_window
         self.autoencoder = LSTMAutoencoder(num_features=features)
         
-        # Placeholders for student baseline metrics (dict mapping student_id -> metrics)
-        self.student_baselines = {}
-        # Placeholders for smoothed drift scores D(t)
-        self.current_drift_scores = {}
+        # Per-student windows, mu/sigma of the reconstruction error and smoothed drift scores D(t);
+        # pass BaselineStore.load(path) to resume from a snapshot
+        if store is not None and (store.window, store.n_features) != (baseline_window, features):
+            raise ValueError(f"BaselineStore holds {store.window} x {store.n_features} windows, "
+                             f"detector expects {baseline_window} x {features}")
+        self.store = store if store is not None else BaselineStore(baseline_window, features)
+
+        # Streaming mode: carry each student's encoder (h, c) forward one step per update and
+        # re-encode the full window every `reencode_every` updates (None = always re-encode)
+        if reencode_every is not None and reencode_every < 1:
+            raise ValueError("reencode_every must be a positive number of updates or None")
+        self.reencode_every = reencode_every
+        self._enc_h = self._enc_c = None
+        self._enc_age = np.zeros(0, dtype=np.int32)  # updates since the last full encode, -1 = no state
+        self._baseline_gen = np.zeros(0, dtype=np.int64)  # times each store row's baseline was (re)trained
 
     def calculate_hesitation_index(self, session_telemetry):
         """
@@ -95,83 +162,230 @@ class BehavioralDriftDetector:
         Trains the autoencoder on the student's normal peak period.
         historical_data: shape (baseline_window, num_features)
         """
+        self.train_baselines([student_id], np.asarray(historical_data)[np.newaxis])
+
+    def train_baselines(self, student_ids, history, lengths=None, batch_size=4096):
+        """
+        Bulk train_baseline for a whole cohort, e.g. a presentation's first weeks from
+        build_weekly_drift_features. history: (students, weeks, num_features), each student's
+        `lengths[i]` (default: all) weeks left-aligned. Histories of equal length go through the
+        autoencoder `batch_size` at a time, mu/sigma of the per-timestep errors are row
+        reductions, and the last baseline_window weeks, mu, sigma and D(t) = 0 are written
+        straight into the store. Returns the students' store rows.
+        """
         # In a real scenario, we'd train the NN weights per student,
         # or use a global NN and just compute mu_error specific to the student.
         # We assume a global NN here and calculate student specific mu_error, sigma_error.
-        
+        student_ids = list(student_ids)
+        history = np.asarray(history, dtype=np.float32)
+        if history.ndim != 3 or len(history) != len(student_ids) or history.shape[2] != self.store.n_features:
+            raise ValueError(f"history must be (students, weeks, {self.store.n_features}) with one row per "
+                             f"student id, got {history.shape} for {len(student_ids)} ids")
+        n_students, n_weeks = history.shape[:2]
+        lengths = np.full(n_students, n_weeks, dtype=np.int64) if lengths is None else np.asarray(lengths, dtype=np.int64)
+        if len(lengths) != n_students or np.any((lengths < 1) | (lengths > n_weeks)):
+            raise ValueError(f"lengths must give 1..{n_weeks} weeks for each of the {n_students} students")
+
+        mu_error, sigma_error = np.empty(n_students), np.empty(n_students)
         self.autoencoder.eval()
-        x_tensor = torch.tensor(historical_data, dtype=torch.float32).unsqueeze(0) # (1, seq, features)
-        
-        with torch.no_grad():
-            reconstructed = self.autoencoder(x_tensor)
-            
-        # Error array for each timestep
-        errors = torch.norm(x_tensor - reconstructed, dim=2).squeeze().numpy()
-        
-        mu_error = np.mean(errors)
-        sigma_error = np.std(errors) + 1e-6 # prevent div/0
-        
-        self.student_baselines[student_id] = {
-            'mu_error': mu_error,
-            'sigma_error': sigma_error,
-            'historical_seq': deque(historical_data.tolist()[-self.baseline_window:], maxlen=self.baseline_window)
-        }
-        self.current_drift_scores[student_id] = 0.0 # Initial D(t)
+        with torch.inference_mode():
+            for length in np.unique(lengths):
+                same = np.flatnonzero(lengths == length)
+                for start in range(0, len(same), batch_size):
+                    idx = same[start:start + batch_size]
+                    x_tensor = torch.from_numpy(history[idx, :length])
+                    # Error array for each timestep
+                    errors = torch.linalg.vector_norm(x_tensor - self.autoencoder(x_tensor), dim=2).numpy()
+                    mu_error[idx] = errors.mean(axis=1)
+                    sigma_error[idx] = errors.std(axis=1) + 1e-6 # prevent div/0
+
+        # Last baseline_window weeks of each history, left-aligned
+        kept = np.minimum(lengths, self.baseline_window)
+        cols = (lengths - kept)[:, np.newaxis] + np.arange(self.baseline_window)
+        windows = history[np.arange(n_students)[:, np.newaxis], np.minimum(cols, n_weeks - 1)]
+        windows[np.arange(self.baseline_window) >= kept[:, np.newaxis]] = 0.0
+        rows = self.store.set_baselines(student_ids, windows, kept, mu_error, sigma_error) # Initial D(t) = 0
+        self._enc_age[rows[rows < len(self._enc_age)]] = -1
+        if len(self._baseline_gen) < self.store.capacity:
+            grown = np.zeros(self.store.capacity, dtype=np.int64)
+            grown[:len(self._baseline_gen)] = self._baseline_gen
+            self._baseline_gen = grown
+        np.add.at(self._baseline_gen, rows, 1)
+        return rows
+
+    def baseline_generations(self, rows):
+        """
+        How many times each store row's baseline has been trained by this detector (0 for rows
+        it never trained, e.g. loaded from a snapshot). State derived from a baseline, such as
+        the cascade's tier-1 statistics, is stale once the generation moves on.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        known = rows < len(self._baseline_gen)
+        generations = np.zeros(len(rows), dtype=np.int64)
+        generations[known] = self._baseline_gen[rows[known]]
+        return generations
 
     def calculate_instantaneous_deviation(self, student_id, X_t):
         """
         Inject new daily vector and get reconstruction error d_t.
         """
-        baseline = self.student_baselines[student_id]
-        
-        # Append new vector to sequence history to run through LSTM
-        baseline['historical_seq'].append(X_t.tolist())
-        seq = np.array(baseline['historical_seq'])
-        x_tensor = torch.tensor(seq, dtype=torch.float32).unsqueeze(0)
+        rows = self.store.rows([student_id])
         
+        # Append new vector to sequence history and get the error of the most recent timestep ONLY
+        return float(self._deviations(rows, np.asarray(X_t, dtype=np.float64)[np.newaxis])[0])
+
+    def _deviations(self, rows, X):
+        """
+        Pushes row i of X into the window of store row rows[i] (rows distinct) and returns the
+        reconstruction error of that newest timestep, windowed or streaming.
+        """
+        self.store.push(rows, X)
+        if self.reencode_every is not None:
+            return self._streaming_deviations(rows, X.astype(np.float32))
+        windows, lengths = self.store.gather(rows)
+
+        # One forward pass per window length (all full once the baseline window has filled)
+        d_t = np.empty(len(rows))
+        for length in np.unique(lengths):
+            idx = np.flatnonzero(lengths == length)
+            d_t[idx] = self._last_step_errors(windows[idx, :length])
+        return d_t
+
+    def _streaming_deviations(self, rows, x):
+        """
+        Streaming d_t: students with carried encoder state advance the encoder one step on
+        their new vector; students due a re-encode (or without state) run the windowed encoder
+        over their current window, which resets their state to the exact windowed one. Only the
+        final timestep is decoded: the decoder's constant-input unroll is window steps of a
+        features-wide LSTM, so the per-event cost no longer grows with the encoder.
+        """
+        encoder = self.autoencoder.encoder
+        capacity = self.store.capacity
+        if self._enc_h is None or len(self._enc_h) < capacity:
+            shape = (capacity, encoder.num_layers, encoder.hidden_size)
+            h, c, age = np.zeros(shape, dtype=np.float32), np.zeros(shape, dtype=np.float32), np.full(capacity, -1, dtype=np.int32)
+            if self._enc_h is not None:
+                n = len(self._enc_h)
+                h[:n], c[:n], age[:n] = self._enc_h, self._enc_c, self._enc_age
+            self._enc_h, self._enc_c, self._enc_age = h, c, age
+
+        age = self._enc_age[rows]
+        full = (age < 0) | (age >= self.reencode_every - 1)
         self.autoencoder.eval()
-        with torch.no_grad():
-            reconstructed = self.autoencoder(x_tensor)
-            
-        # Get error for the most recent timestep ONLY (the last one)
-        t_minus_1_target = x_tensor[:, -1, :]
-        t_minus_1_pred = reconstructed[:, -1, :]
-        d_t = torch.norm(t_minus_1_target - t_minus_1_pred).item()
-        
+        with torch.inference_mode():
+            step = rows[~full]
+            if len(step):
+                state = (torch.from_numpy(self._enc_h[step].transpose(1, 0, 2).copy()),
+                         torch.from_numpy(self._enc_c[step].transpose(1, 0, 2).copy()))
+                _, (h, c) = encoder(torch.from_numpy(x[~full, np.newaxis]), state)
+                self._enc_h[step], self._enc_c[step] = h.numpy().transpose(1, 0, 2), c.numpy().transpose(1, 0, 2)
+                self._enc_age[step] += 1
+
+            if full.any():
+                windows, lengths = self.store.gather(rows[full])
+                for length in np.unique(lengths):
+                    idx = np.flatnonzero(lengths == length)
+                    _, (h, c) = encoder(torch.from_numpy(windows[idx, :length]))
+                    reset = rows[full][idx]
+                    self._enc_h[reset], self._enc_c[reset] = h.numpy().transpose(1, 0, 2), c.numpy().transpose(1, 0, 2)
+                self._enc_age[rows[full]] = 0
+
+            # Decode only the newest timestep from the top layer's hidden state
+            lengths = self.store.counts[rows]
+            hidden = torch.from_numpy(self._enc_h[rows, -1])
+            d_t = np.empty(len(rows))
+            for length in np.unique(lengths):
+                idx = np.flatnonzero(lengths == length)
+                decoded, _ = self.autoencoder.decoder(hidden[idx].unsqueeze(1).expand(-1, int(length), -1))
+                d_t[idx] = torch.linalg.vector_norm(torch.from_numpy(x[idx]) - decoded[:, -1], dim=1).numpy()
         return d_t
 
     def update_drift_score(self, student_id, X_t):
         """
         Updates the EWMA drift score D(t) for a given student.
         """
-        if student_id not in self.student_baselines:
+        if student_id not in self.store:
             raise ValueError("Student baseline not set. Call train_baseline first.")
             
-        baseline = self.student_baselines[student_id]
+        row = self.store.index[student_id]
         d_t = self.calculate_instantaneous_deviation(student_id, X_t)
         
         # d_t normalized Z-score
-        z_score = (d_t - baseline['mu_error']) / baseline['sigma_error']
+        z_score = (d_t - self.store.mu[row]) / self.store.sigma[row]
         
         # EWMA
-        prev_D = self.current_drift_scores[student_id]
-        D_t = self.alpha * z_score + (1 - self.alpha) * prev_D
-        self.current_drift_scores[student_id] = D_t
+        prev_D = self.store.scores[row]
+        D_t = float(self.alpha * z_score + (1 - self.alpha) * prev_D)
+        self.store.scores[row] = D_t
         
         return D_t
 
+    def _last_step_errors(self, windows):
+        """
+        Reconstruction error of the final timestep of every window in one forward pass.
+        windows: (N, seq_len, features) array of equal-length sequences.
+        """
+        x_tensor = torch.from_numpy(np.ascontiguousarray(windows, dtype=np.float32))
+        self.autoencoder.eval()
+        with torch.inference_mode():
+            reconstructed = self.autoencoder(x_tensor)
+        return torch.linalg.vector_norm(x_tensor[:, -1, :] - reconstructed[:, -1, :], dim=1).numpy()
+
+    def update_drift_scores_batch(self, student_ids, X):
+        """
+        Batched update_drift_score: appends row i of X (N, features) to student_ids[i]'s
+        window, reconstructs all windows of the same length in a single autoencoder call (or
+        advances the carried encoder states in one call, in streaming mode) and advances the
+        EWMA drift scores as arrays.
+        A student listed more than once gets its rows applied in order.
+        Returns (D_t array, zone index array into DRIFT_ZONES).
+        """
+        store_rows, X = self.resolve_rows(student_ids, X)
+        D = np.empty(len(store_rows))
+        for sel in occurrence_passes(store_rows):
+            D[sel] = self.score_rows(store_rows[sel], X[sel])
+        return D, self.evaluate_thresholds(D)
+
+    def resolve_rows(self, student_ids, X):
+        """Validates a batch update and returns (store rows of the students, X as float64)."""
+        student_ids = list(student_ids)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or len(X) != len(student_ids):
+            raise ValueError(f"X must be (N, features) with one row per student id, got {X.shape} for {len(student_ids)} ids")
+        store_rows = self.store.rows(student_ids)
+        missing = np.flatnonzero(store_rows < 0)
+        if len(missing):
+            raise ValueError(f"Student baseline not set for {len(missing)} student(s) (e.g. {student_ids[missing[0]]!r}). "
+                             "Call train_baseline first.")
+        return store_rows, X
+
+    def score_rows(self, rows, X):
+        """Autoencoder update of distinct store rows: appends X, returns and stores the new D(t)."""
+        d_t = self._deviations(rows, X)
+        D_t = self.alpha * (d_t - self.store.mu[rows]) / self.store.sigma[rows] + (1 - self.alpha) * self.store.scores[rows]
+        self.store.scores[rows] = D_t
+        return D_t
+
+    def carry_rows(self, rows, X):
+        """
+        Update of distinct store rows without the autoencoder: X is appended to the windows and
+        the day counts as baseline-typical (z = 0), so D(t) decays by (1 - alpha). Carried
+        encoder states no longer match the windows and are re-encoded on the next score.
+        """
+        self.store.push(rows, X)
+        self.store.scores[rows] *= 1 - self.alpha
+        self._enc_age[rows[rows < len(self._enc_age)]] = -1
+        return self.store.scores[rows]
+
+    def evaluate_thresholds(self, D):
+        """Vectorized evaluate_threshold: zone index (0-3 into DRIFT_ZONES) of every D(t)."""
+        return np.searchsorted(DRIFT_ZONE_BOUNDS, np.asarray(D, dtype=np.float64), side='left')
+
     def evaluate_threshold(self, D_t):
         """
         Multi-Tiered Z-Score Thresholding Mechanism.
         """
-        if D_t <= 1.5:
-            return "Zone 0: Nominal", "Passive monitoring"
-        elif 1.5 < D_t <= 2.5:
-            return "Zone 1: Micro-Drift", "Trigger Subtle Generative Nudge"
-        elif 2.5 < D_t <= 3.5:
-            return "Zone 2: Structural Drift", "Trigger ReAct Reasoning Loop"
-        else:
-            return "Zone 3: Critical Rupture", "Trigger Emergency Escalation"
+        return DRIFT_ZONES[int(self.evaluate_thresholds(D_t))]
 
     def generate_micro_warning(self, student_id: str, D_t: float, X_t: np.ndarray) -> dict:
         """
@@ -228,7 +442,7 @@ if __name__ == "__main__":
     # Mock baseline data (10 days of normal activity)
     normal_data = np.random.normal(loc=[1.0, 0.5, 30, 0.2], scale=[0.1, 0.1, 5, 0.05], size=(10, 4))
     detector.train_baseline(student, normal_data)
-    print(f"Baseline trained. Mu: {detector.student_baselines[student]['mu_error']:.3f}")
+    print(f"Baseline trained. Mu: {detector.store.baseline(student)['mu_error']:.3f}")
     
     # Mock normal day
     X_normal = np.array([0.9, 0.6, 28, 0.25])
@@ -245,3 +459,8 @@ if __name__ == "__main__":
         if "Zone 1" in zone:
             warning = detector.generate_micro_warning(student, D_drift, X_drift)
             print("  [Micro-Warning Fired]:", warning["student_notification_text"])
+
+    # Start-of-term baselines for a whole cohort in one call
+    cohort = np.random.normal(loc=[1.0, 0.5, 30, 0.2], scale=[0.1, 0.1, 5, 0.05], size=(1000, 10, 4))
+    rows = detector.train_baselines([f"STU_{2000 + i}" for i in range(len(cohort))], cohort)
+    print(f"Bulk baselines for {len(rows)} students. Mean mu: {detector.store.mu[rows].mean():.3f}")
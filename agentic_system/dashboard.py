@@ -113,7 +113,9 @@ if st.sidebar.button("Run Simulation", type="primary"):
         if drift_score > 2.5: # Triggers intervention
             st.warning("⚠️ **Significant drift detected. Escalating to Risk Prediction...**")
             
-            risk_info = st.session_state.predictor.predict(behavior_vector, drift_score)
+            # The drift vector is [pace, lag, hesitation, volatility]; the predictor has its own layout
+            activity_vector = st.session_state.predictor.from_drift_vector(behavior_vector)
+            risk_info = st.session_state.predictor.predict(activity_vector, drift_score)
             
             r_col1, r_col2, r_col3 = st.columns(3)
             r_col1.metric("Dropout Probability", f"{risk_info['risk_score']:.2f}")
@@ -133,7 +135,8 @@ if st.sidebar.button("Run Simulation", type="primary"):
                 dropout_prob=risk_info['risk_score'],
                 time_to_dropout=risk_info['predicted_dropout_days'],
                 context={"student_id": student_id, "current_module": day},
-                intervention_history=history
+                intervention_history=history,
+                counterfactuals=st.session_state.predictor.evaluate_counterfactuals(activity_vector[np.newaxis], [drift_score])[0]
             )
             
             # Ethical check
@@ -158,7 +161,8 @@ if st.sidebar.button("Run Simulation", type="primary"):
                     st.error(f"🚨 **Critic Agent Validation REJECTED (Safety Override):** {critic_msg}")
                     
             # Counterfactual sandbox
-            cf_stats = st.session_state.predictor.simulate_intervention_impact(risk_info['risk_score'], action_params['strategy'])
+            cf_stats = st.session_state.predictor.simulate_intervention_impact(risk_info['risk_score'], action_params['strategy'],
+                                                                               activity_vector, drift_score)
             
             st.markdown(f"""
             **Sandboxed Counterfactual Risk Analysis ($X'_{{strategy}}$):** 
@@ -88,7 +88,9 @@ class DemoRunner:
             details_table.add_row("", "[bold red]Significant drift detected. Escalating to Risk Prediction...[/bold red]")
             
             # 2. Risk Prediction Layer
-            risk_info = self.predictor.predict(behavior_vector, drift_score)
+            # The drift vector is [pace, lag, hesitation, volatility]; the predictor has its own layout
+            activity_vector = self.predictor.from_drift_vector(behavior_vector)
+            risk_info = self.predictor.predict(activity_vector, drift_score)
             
             risk_str = f"Prob: [bold red]{risk_info['risk_score']:.2f}[/bold red] | Days Left: [bold yellow]{risk_info['predicted_dropout_days']}[/bold yellow] | Type: [bold]{risk_info['classification']['dropout_type']}[/bold]"
             flags_str = f"Top Flags: {risk_info['top_contributing_features']}"
@@ -103,7 +105,8 @@ class DemoRunner:
                 dropout_prob=risk_info['risk_score'],
                 time_to_dropout=risk_info['predicted_dropout_days'],
                 context={"student_id": student_id, "current_module": day},
-                intervention_history=history
+                intervention_history=history,
+                counterfactuals=self.predictor.evaluate_counterfactuals(activity_vector[np.newaxis], [drift_score])[0]
             )
             
             # Ethical Guardrail: Fatigue Check
@@ -126,7 +129,8 @@ class DemoRunner:
                 details_table.add_row("Critic Validation", f"[{status_color}]{'PASSED' if is_safe else 'REJECTED'}[/{status_color}]: {critic_msg}")
             
             # Counterfactual Risk Analysis
-            cf_stats = self.predictor.simulate_intervention_impact(risk_info['risk_score'], action_params['strategy'])
+            cf_stats = self.predictor.simulate_intervention_impact(risk_info['risk_score'], action_params['strategy'],
+                                                                   activity_vector, drift_score)
             cf_str = f"Base Risk: {cf_stats['risk_without_intervention']:.2f} | Est. New: {cf_stats['risk_with_intervention']:.2f} | Impact: [bold green]-{cf_stats['risk_reduction_percentage']:.1f}%[/bold green]"
             details_table.add_row("Counterfactual Analysis", cf_str)
             
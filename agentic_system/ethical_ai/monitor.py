@@ -9,6 +9,7 @@ class EthicalMonitor:
     def __init__(self):
         self.transparency_log = []
         self.max_interventions_per_week = 2
+        self.fatigue_blocks_issued = 0
 
     def check_fatigue(self, student_id: str, intervention_history: List[Dict], current_day: int) -> Tuple[bool, str]:
         """
@@ -24,6 +25,7 @@ class EthicalMonitor:
         ]
         
         if len(recent_interventions) >= self.max_interventions_per_week:
+            self.fatigue_blocks_issued += 1
             return True, f"Fatigue Limit Reached: {len(recent_interventions)} interventions in last 7 days."
             
         return False, "Clear to intervene."
@@ -53,7 +55,7 @@ class EthicalMonitor:
             "total_logs": len(self.transparency_log),
             "bias_check": "Pass (Simulated)",
             "false_positive_rate": "0.15 (Simulated)",
-            "fatigue_blocks_issued": 0
+            "fatigue_blocks_issued": self.fatigue_blocks_issued
         }
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ import numpy as np
 from agentic_system.behavioral_drift.drift_detector import BehavioralDriftDetector
 from agentic_system.react_planner.agent import ReActPlanner, StudentState
 from agentic_system.rl_intervention.environment import ContextualBanditRLEngine
+from agentic_system.risk_prediction.model_registry import get_model_registry
 
 class AgenticDropoutPreventionSystem:
     """
@@ -18,9 +19,8 @@ class AgenticDropoutPreventionSystem:
         # 3. Initialize RL Policy Engine
         self.rl_engine = ContextualBanditRLEngine()
         
-        # Mocks
-        self.mock_survival_engine = lambda xt: max(1, int(20 - np.sum(xt))) # Fake Time-to-dropout
-        self.mock_risk_classifier = lambda xt: min(0.99, np.sum(xt) / 10.0) # Fake Dropout Prob %
+        # 4. Predictive Intelligence Layer (shared, process-wide XGBoost + Survival models)
+        self.risk_predictor = get_model_registry().predictor()
 
     def process_student_event(self, student_id: str, new_activity_vector: np.ndarray):
         """
@@ -38,8 +38,11 @@ class AgenticDropoutPreventionSystem:
             print("  -> High Risk Detected! Triggering Agentic Planner...")
             
             # Step 2: GATHER FULL CONTEXT (Predictive Intelligence Layer)
-            t_drop = self.mock_survival_engine(new_activity_vector)
-            p_drop = self.mock_risk_classifier(new_activity_vector)
+            # The drift vector is [pace, lag, hesitation, volatility]; the predictor has its own layout
+            activity_vector = self.risk_predictor.from_drift_vector(new_activity_vector)
+            prediction = self.risk_predictor.predict(activity_vector, drift_score, student_id=student_id)
+            t_drop = prediction["predicted_dropout_days"]
+            p_drop = prediction["risk_score"]
             
             state = StudentState(
                 drift_score=drift_score,
@@ -47,7 +50,10 @@ class AgenticDropoutPreventionSystem:
                 dropout_prob=p_drop,
                 time_to_dropout=t_drop,
                 context={"student_id": student_id, "current_module": 4},
-                intervention_history=[]
+                intervention_history=[],
+                # Every strategy's perturbed vector scored in one batch for the planner
+                counterfactuals=self.risk_predictor.evaluate_counterfactuals(
+                    activity_vector[np.newaxis], [drift_score])[0]
             )
             
             # Step 3: RL STRATEGY SELECTION
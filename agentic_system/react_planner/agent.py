@@ -36,6 +36,7 @@ class StudentState:
     time_to_dropout: int
     context: Dict
     intervention_history: List[Dict]
+    counterfactuals: Optional[Dict] = None  # RiskPredictor.evaluate_counterfactuals entry for this student
 
 
 class ReActPlanner:
@@ -177,11 +178,23 @@ Return JSON: {{"thought": "one-sentence reasoning", "root_cause": "<chosen categ
             
         # Reflection Step: Adapt proposed strategy based on memory
         final_strategy = self._reflect_phase(proposed, state)
-        
+
+        # Sandbox Step: consult the modelled counterfactual risk of each strategy
+        projected = {s: cf for s, cf in ((state.counterfactuals or {}).get("strategies") or {}).items()
+                     if s in self.strategies}
+        if projected and final_strategy in projected and state.time_to_dropout > 2:
+            best = min(projected, key=lambda s: projected[s]["risk"])
+            if projected[final_strategy]["risk_delta"] >= 0 and projected[best]["risk_delta"] < 0:
+                print(f"  [Sandbox] '{final_strategy}' projects no risk reduction; switching to '{best}' "
+                      f"({projected[best]['risk_delta']:+.3f}).")
+                final_strategy = best
+
         action = {
             "strategy": final_strategy,
             "genai_strategy": self.strategy_mapping.get(final_strategy, "Motivation Boost")
         }
+        if final_strategy in projected:
+            action["projected_risk"] = projected[final_strategy]["risk"]
         return action
 
     def execute_react_loop(self, state: StudentState, top_features: list) -> Dict:
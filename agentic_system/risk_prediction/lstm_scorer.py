@@ -0,0 +1,204 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SequenceRingBuffer:
+    """
+    Last `seq_len` feature rows of every student in one preallocated
+    (capacity, seq_len, n_features) array. Each student owns a slot whose rows are written
+    round-robin, so an update is one row copy and gathering a batch is one fancy index.
+    Rows pushed with a week key replace the student's latest row when the week repeats, so
+    re-sending a week does not add a step to the sequence. Capacity doubles when a new
+    student does not fit.
+    """
+    def __init__(self, seq_len, n_features, capacity=1024, dtype=np.float32):
+        self.seq_len = seq_len
+        self.n_features = n_features
+        self.values = np.zeros((capacity, seq_len, n_features), dtype=dtype)
+        self.heads = np.zeros(capacity, dtype=np.int64)   # next position to write
+        self.counts = np.zeros(capacity, dtype=np.int64)  # rows seen, capped at seq_len
+        self.weeks = np.full(capacity, -1, dtype=np.int64)  # week key of the latest row, -1 if none
+        self.slots = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _slot(self, student_id):
+        slot = self.slots.get(student_id)
+        if slot is None:
+            slot = len(self.slots)
+            if slot == len(self.values):
+                grow = len(self.values)
+                self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+                self.heads = np.concatenate([self.heads, np.zeros(grow, dtype=np.int64)])
+                self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+                self.weeks = np.concatenate([self.weeks, np.full(grow, -1, dtype=np.int64)])
+            self.slots[student_id] = slot
+        return slot
+
+    def push(self, student_ids, rows, weeks=None):
+        """
+        Appends one feature row per student id (rows is (N, n_features)). With `weeks`
+        (non-negative, non-decreasing per student) a row for the week already at the end of
+        the student's sequence overwrites it instead of being appended.
+        """
+        rows = np.asarray(rows, dtype=self.values.dtype).reshape(-1, self.n_features)
+        weeks = None if weeks is None else np.asarray(weeks, dtype=np.int64).reshape(-1)
+        if weeks is not None and (len(weeks) != len(rows) or (weeks < 0).any()):
+            raise ValueError("weeks must hold one non-negative week per row")
+        with self._lock:
+            slots = np.array([self._slot(s) for s in student_ids], dtype=np.int64)
+            if len(np.unique(slots)) == len(slots):
+                if weeks is not None and (weeks < self.weeks[slots]).any():
+                    raise ValueError("Weeks must arrive in increasing order per student")
+                self._write(slots, rows, weeks)
+            else: # a student repeated within one call gets its rows in order
+                for i in range(len(slots)):
+                    week = None if weeks is None else weeks[i:i + 1]
+                    if week is not None and week[0] < self.weeks[slots[i]]:
+                        raise ValueError("Weeks must arrive in increasing order per student")
+                    self._write(slots[i:i + 1], rows[i:i + 1], week)
+
+    def _write(self, slots, rows, weeks=None):
+        repeat = np.zeros(len(slots), dtype=bool)
+        if weeks is not None:
+            repeat = (self.counts[slots] > 0) & (self.weeks[slots] == weeks)
+            self.weeks[slots] = weeks
+        # A repeated week rewrites the latest row; any other row advances the head
+        heads = np.where(repeat, (self.heads[slots] - 1) % self.seq_len, self.heads[slots])
+        self.values[slots, heads] = rows
+        self.heads[slots] = (heads + 1) % self.seq_len
+        self.counts[slots] = np.minimum(self.counts[slots] + ~repeat, self.seq_len)
+
+    def gather(self, student_ids):
+        """
+        Chronological (N, seq_len, n_features) batch, left-aligned with zero padding, and the
+        number of real rows of each sequence. Students never pushed get length 0.
+        """
+        with self._lock:
+            slots = np.array([self.slots.get(s, -1) for s in student_ids], dtype=np.int64)
+            known = slots >= 0
+            batch = np.zeros((len(slots), self.seq_len, self.n_features), dtype=self.values.dtype)
+            lengths = np.zeros(len(slots), dtype=np.int64)
+            s = slots[known]
+            # Oldest row first: a full slot starts at its head, a partial one at 0
+            order = (self.heads[s, np.newaxis] - self.counts[s, np.newaxis] + np.arange(self.seq_len)) % self.seq_len
+            batch[known] = self.values[s[:, np.newaxis], order]  # a partial slot has not wrapped: zeros after its rows
+            lengths[known] = self.counts[s]
+        return batch, lengths
+
+class OnlineLSTMScorer:
+    """
+    Serves the LightLSTM trained by train_models.py on live per-student sequences.
+
+    Rows are buffered per student in a SequenceRingBuffer. Scoring requests from any thread
+    are queued and a single worker thread drains them, up to `max_batch` sequences or
+    `max_wait_ms` after the first request, into one forward pass under torch.inference_mode.
+    `submit` returns a Future so callers can wait with their own latency budget.
+    """
+    def __init__(self, model, seq_features, seq_len, max_batch=256, max_wait_ms=2.0):
+        self.model = model.eval()
+        self.seq_features = list(seq_features)
+        self.seq_len = seq_len
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.buffer = SequenceRingBuffer(seq_len, len(self.seq_features))
+        self._requests = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def from_artifacts(cls, state_dict, meta, **kwargs):
+        """Rebuilds the LightLSTM from its saved state dict; sizes are read off the LSTM weights."""
+        from ml_pipeline.models.lstm_model import LightLSTM
+        in_feats = state_dict['lstm.weight_ih_l0'].shape[1]
+        hidden = state_dict['lstm.weight_hh_l0'].shape[1]
+        if in_feats != len(meta['seq_features']):
+            raise ValueError(f"LSTM expects {in_feats} features but lstm_meta lists {len(meta['seq_features'])}")
+        model = LightLSTM(in_feats, hidden=hidden)
+        model.load_state_dict(state_dict)
+        return cls(model, meta['seq_features'], meta['seq_len'], **kwargs)
+
+    def observe(self, student_ids, rows, weeks=None):
+        """
+        Appends the latest feature row (in `seq_features` order) of each student; a row for a
+        week already observed replaces that week's row (see SequenceRingBuffer.push).
+        """
+        self.buffer.push(student_ids, rows, weeks)
+
+    def submit(self, student_ids):
+        """Queues the students' current sequences for scoring; the Future resolves to their probabilities."""
+        future = Future()
+        self._ensure_worker()
+        self._requests.put((list(student_ids), future))
+        return future
+
+    def score(self, student_ids):
+        """
+        Synchronous scoring in the calling thread (one forward pass). Students with no
+        buffered rows score NaN.
+        """
+        import torch
+        batch, lengths = self.buffer.gather(student_ids)
+        scores = np.full(len(lengths), np.nan)
+        seen = lengths > 0
+        if seen.any():
+            with torch.inference_mode():
+                out = self.model(torch.from_numpy(batch[seen]), torch.from_numpy(lengths[seen]))
+            scores[seen] = out.squeeze(1).numpy()
+        return scores
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._closed = False
+                    self._worker = threading.Thread(target=self._run, name="lstm-scorer", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while not self._closed:
+            first = self._requests.get()
+            if first is None:
+                break
+            pending, n_rows = [first], len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            while n_rows < self.max_batch:
+                try:
+                    item = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._closed = True
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            # Requests whose caller already gave up (budget exceeded) are skipped
+            pending = [(ids, f) for ids, f in pending if f.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            try:
+                scores = self.score([s for ids, _ in pending for s in ids])
+            except Exception as e:
+                logger.warning(f"LSTM batch scoring failed: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for ids, future in pending:
+                future.set_result(scores[start:start + len(ids)])
+                start += len(ids)
+
+    def close(self):
+        """Stops the worker thread; buffered sequences are kept."""
+        self._closed = True
+        self._requests.put(None)
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import importlib
+from datetime import datetime, timezone
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+# Model paths relative to project root
+_MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ml_pipeline", "saved_models")
+
+def _load_joblib(path):
+    return joblib.load(path)
+
+def _load_xgboost(path):
+    import xgboost as xgb
+    booster = xgb.Booster()
+    booster.load_model(path)
+    return booster
+
+def _load_survival_scorer(path):
+    from agentic_system.risk_prediction.survival_scorer import SurvivalScorer
+    return SurvivalScorer.load(path)
+
+def _load_torch_state(path):
+    import torch
+    return torch.load(path, map_location="cpu", weights_only=True)
+
+# name -> (file name, loader)
+ARTIFACTS = {
+    "feature_scaler":  ("feature_scaler.pkl", _load_joblib),
+    "feature_columns": ("feature_columns.pkl", _load_joblib),
+    "survival_scorer": ("survival_scorer.npz", _load_survival_scorer),
+    "survival_model":  ("survival_model.pkl", _load_joblib),
+    "xgboost_model":   ("xgboost_model.json", _load_xgboost),
+    "lstm_meta":       ("lstm_meta.pkl", _load_joblib),
+    "lstm_model":      ("lstm_model.pt", _load_torch_state),
+}
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _artifact_version(name, path, obj):
+    """Version of the library that produced the artifact: XGBoost records it in the JSON model."""
+    if name == "survival_scorer":
+        return obj.source
+    if name == "lstm_model":
+        import torch
+        return f"torch {torch.__version__}"
+    if name == "xgboost_model":
+        with open(path) as f:
+            version = json.load(f).get("version")
+        return "xgboost " + ".".join(str(v) for v in version) if version else None
+    package = type(obj).__module__.split(".")[0]
+    if package == "builtins":
+        return None
+    return f"{package} {getattr(importlib.import_module(package), '__version__', 'unknown')}"
+
+class ModelRegistry:
+    """
+    Process-wide holder of the trained ML artifacts. Each artifact is loaded at most once,
+    on first use or by `load_all()` (called from the FastAPI lifespan), and then shared by
+    every route, the RiskPredictor and the agentic pipeline. Loading is guarded by a lock so
+    concurrent first requests do not load the same model twice.
+    """
+    def __init__(self, model_dir=_MODEL_DIR):
+        self.model_dir = model_dir
+        self._lock = threading.RLock()
+        self._models = {}
+        self._info = {}
+        self._predictor = None
+        self._lstm_scorer = None
+        self._lstm_built = False
+
+    def get(self, name):
+        """Returns the loaded artifact, or None when it is missing or fails to load."""
+        if name in self._models:
+            return self._models[name]
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def _load(self, name):
+        filename, loader = ARTIFACTS[name]
+        path = os.path.join(self.model_dir, filename)
+        info = {"file": filename, "loaded": False}
+        self._info[name] = info
+        if not os.path.exists(path):
+            info["error"] = "not found"
+            return None
+
+        t0 = time.perf_counter()
+        try:
+            obj = loader(path)
+        except Exception as e:
+            logger.warning(f"Could not load model {filename}: {e}")
+            info["error"] = str(e)
+            return None
+
+        info.update({
+            "loaded": True,
+            "load_time_ms": round(1000 * (time.perf_counter() - t0), 2),
+            "version": _artifact_version(name, path, obj),
+            "sha256": _sha256(path),
+            "modified": datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc).isoformat(),
+            "loaded_at": datetime.now(timezone.utc).isoformat(),
+        })
+        logger.info(f"Loaded {filename} in {info['load_time_ms']} ms")
+        return obj
+
+    def load_all(self):
+        for name in ARTIFACTS:
+            self.get(name)
+        return self
+
+    def predictor(self):
+        """The shared RiskPredictor built on this registry's artifacts."""
+        if self._predictor is None:
+            with self._lock:
+                if self._predictor is None:
+                    from agentic_system.risk_prediction.predictor import RiskPredictor
+                    self._predictor = RiskPredictor(registry=self)
+        return self._predictor
+
+    def lstm_scorer(self):
+        """
+        The shared OnlineLSTMScorer (one batching worker and one set of per-student sequence
+        buffers for every RiskPredictor on this registry), or None without LSTM artifacts.
+        """
+        if not self._lstm_built:
+            with self._lock:
+                if not self._lstm_built:
+                    self._lstm_scorer = self._build_lstm_scorer()
+                    self._lstm_built = True
+        return self._lstm_scorer
+
+    def _build_lstm_scorer(self):
+        state_dict, meta = self.get("lstm_model"), self.get("lstm_meta")
+        if state_dict is None or meta is None:
+            return None
+        try:
+            from agentic_system.risk_prediction.lstm_scorer import OnlineLSTMScorer
+            return OnlineLSTMScorer.from_artifacts(state_dict, meta)
+        except Exception as e:
+            logger.warning(f"Could not build the online LSTM scorer: {e}")
+            return None
+
+    def clear(self):
+        """Drops every loaded artifact; the next access reloads from disk."""
+        with self._lock:
+            if self._lstm_scorer is not None:
+                self._lstm_scorer.close()
+            self._models, self._info, self._predictor = {}, {}, None
+            self._lstm_scorer, self._lstm_built = None, False
+
+    def diagnostics(self):
+        with self._lock:
+            return {
+                "model_dir": os.path.abspath(self.model_dir),
+                "total_load_time_ms": round(sum(i.get("load_time_ms", 0) for i in self._info.values()), 2),
+                "artifacts": {name: dict(info) for name, info in self._info.items()},
+            }
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry():
+    """Returns the process-wide ModelRegistry, creating it on first call."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
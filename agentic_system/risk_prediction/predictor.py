@@ -1,28 +1,59 @@
-import os
-import numpy as np
-import joblib
+import time
 import logging
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from agentic_system.risk_prediction.model_registry import get_model_registry
 
 logger = logging.getLogger(__name__)
 
-# Model paths relative to project root
-_MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "ml_pipeline", "saved_models")
+# Static ensemble weighting of the tabular and sequence models (as in ml_pipeline/deployment/api.py)
+XGB_WEIGHT, LSTM_WEIGHT = 0.6, 0.4
+
+# Activity features each intervention acts on; the strategy's efficacy is the relative improvement
+STRATEGY_TARGETS = {
+    "micro_nudge":            ("pace", "lag"),
+    "content_simplification": ("pace", "pace_variance"),
+    "schedule_restructure":   ("lag", "volatility"),
+    "peer_sync":              ("pace", "volatility"),
+    "human_escalation":       ("pace", "lag", "volatility", "pace_variance"),
+}
 
-def _load_model(filename):
-    path = os.path.join(_MODEL_DIR, filename)
-    if os.path.exists(path):
-        try:
-            return joblib.load(path)
-        except Exception as e:
-            logger.warning(f"Could not load model {filename}: {e}")
-    return None
+# Dropout archetypes and their weights over the normalized
+# [low pace, lag, hesitation, volatility, accuracy decay] features (the design doc matrix)
+DROPOUT_ARCHETYPES = ["Burnout Dropout", "Cognitive Overload Dropout", "Conceptual Confusion Dropout",
+                      "Motivation Dropout", "Time-Management Dropout"]
+ARCHETYPE_WEIGHTS = np.array([
+    # pace  lag  hes  vol  acc
+    [0.0, 0.3, 0.0, 0.5, 0.2],  # Burnout
+    [0.2, 0.0, 0.4, 0.0, 0.4],  # Cognitive Overload
+    [0.0, 0.0, 0.3, 0.0, 0.7],  # Conceptual Confusion
+    [0.4, 0.6, 0.0, 0.0, 0.0],  # Motivation
+    [0.0, 0.4, 0.0, 0.6, 0.0],  # Time-Management
+])
+# Evidence flags: normalized feature (column of the matrix above) and the level it must exceed
+EVIDENCE_FLAGS = {"high_volatility": (3, 0.5), "assignment_lag": (1, 0.4),
+                  "high_hesitation": (2, 0.5), "pace_drop": (0, 0.4)}
+
+# Sandbox trajectories as feature multipliers
+SANDBOX_MULTIPLIERS = {
+    "alpha_do_nothing":           {},                                          # No change to trajectory
+    "beta_inject_simplification": {"pace_variance": 0.70, "volatility": 0.70}, # 30% reduction in cognitive load features
+    "zeta_syllabus_downgrade":    {"lag": 0.50, "volatility": 0.50},           # 50% reduction in pace/volume features
+}
 
 class RiskPredictor:
     """
     Risk Prediction Layer — uses real XGBoost and Survival models trained on OULAD data.
     Falls back to heuristics if models are not found.
     """
-    def __init__(self):
+    def __init__(self, registry=None, lstm_budget_ms=50.0):
+        """
+        Models come from the process-wide ModelRegistry (or the given one), so constructing a
+        RiskPredictor does not reload artifacts from disk. lstm_budget_ms is the default time
+        a prediction waits for the LSTM before answering with XGBoost alone.
+        """
         self.feature_names = ["pace", "lag", "volatility", "pace_variance"]
         self.efficacy_map = {
             "micro_nudge": 0.15,
@@ -32,223 +63,440 @@ class RiskPredictor:
             "human_escalation": 0.60
         }
         # Load trained models if available
-        self._scaler        = _load_model("feature_scaler.pkl")
-        self._feature_cols  = _load_model("feature_columns.pkl")
-        self._survival_model = _load_model("survival_model.pkl")
-        self._xgb_model     = None
-        try:
-            import xgboost as xgb
-            xgb_path = os.path.join(_MODEL_DIR, "xgboost_model.json")
-            if os.path.exists(xgb_path):
-                m = xgb.Booster()
-                m.load_model(xgb_path)
-                self._xgb_model = m
-                logger.info("XGBoost model loaded successfully.")
-        except Exception as e:
-            logger.warning(f"Could not load XGBoost model: {e}")
+        registry = registry if registry is not None else get_model_registry()
+        self._scaler        = registry.get("feature_scaler")
+        self._feature_cols  = registry.get("feature_columns")
+        # The exported array scorer serves survival without pandas/lifelines; the pickled model is the fallback
+        self._survival_scorer = registry.get("survival_scorer")
+        self._survival_model = registry.get("survival_model") if self._survival_scorer is None else None
+        self._xgb_model     = registry.get("xgboost_model")
+        self._lstm_scorer   = registry.lstm_scorer() # shared with every predictor on this registry
+        self.lstm_budget_ms = lstm_budget_ms
+        self._compile_feature_layout()
+        self._compile_counterfactuals()
 
         if self._xgb_model:
             logger.info("RiskPredictor initialised with real ML models.")
         else:
             logger.info("RiskPredictor initialised with heuristic fallback.")
 
-    def simulate_intervention_impact(self, base_risk: float, strategy: str) -> dict:
+    def _compile_counterfactuals(self):
+        """
+        One (4,) multiplier over [pace, lag, volatility, pace_variance] per counterfactual: each
+        efficacy_map strategy raises pace and lowers its other targeted features by its efficacy,
+        and each sandbox applies its fixed projection.
+        """
+        multipliers = {}
+        for strategy, efficacy in self.efficacy_map.items():
+            m = np.ones(len(self.feature_names))
+            for feature in STRATEGY_TARGETS.get(strategy, ()):
+                j = self.feature_names.index(feature)
+                m[j] = 1.0 + efficacy if feature == "pace" else 1.0 - efficacy
+            multipliers[strategy] = m
+        for sandbox, changes in SANDBOX_MULTIPLIERS.items():
+            m = np.ones(len(self.feature_names))
+            for feature, factor in changes.items():
+                m[self.feature_names.index(feature)] = factor
+            multipliers[sandbox] = m
+        self.counterfactual_names = list(multipliers)
+        self._cf_multipliers = np.stack(list(multipliers.values()))
+
+    def counterfactual_arrays(self, activity_matrix: np.ndarray, drift_scores, strategies=None,
+                              elapsed_weeks=0.0, horizon_weeks=4.0) -> dict:
+        """
+        Array form of evaluate_counterfactuals: the N x (1 + S) perturbed activity vectors are
+        stacked and scored in one XGBoost and one survival call. Column 0 of risk,
+        predicted_days and horizon_hazard ((N, 1 + S) arrays) is the unperturbed baseline.
+        """
+        strategies = self.counterfactual_names if strategies is None else list(strategies)
+        unknown = [name for name in strategies if name not in self.counterfactual_names]
+        if unknown:
+            raise ValueError(f"Unknown counterfactual strategies {unknown}; expected {self.counterfactual_names}")
+        activity_matrix = np.atleast_2d(np.asarray(activity_matrix, dtype=np.float64))
+        n, k = len(activity_matrix), len(strategies) + 1
+        multipliers = np.vstack([np.ones(len(self.feature_names)),
+                                 self._cf_multipliers[[self.counterfactual_names.index(s) for s in strategies]]])
+
+        perturbed = (activity_matrix[:, np.newaxis, :] * multipliers[np.newaxis]).reshape(n * k, -1)
+        drift = np.repeat(np.broadcast_to(np.asarray(drift_scores, dtype=np.float64), (n,)), k)
+        elapsed = np.repeat(np.broadcast_to(np.asarray(elapsed_weeks, dtype=np.float64), (n,)), k)
+        scored = self._score(self._activity_channels(perturbed, drift), elapsed, horizon_weeks)
+        return {
+            "strategies": strategies,
+            "risk": scored["dropout_prob"].reshape(n, k),
+            "predicted_days": scored["predicted_days"].reshape(n, k),
+            "horizon_hazard": scored["horizon_hazard"].reshape(n, k) if scored["horizon_hazard"] is not None else None,
+        }
+
+    def evaluate_counterfactuals(self, activity_matrix: np.ndarray, drift_scores, strategies=None,
+                                 elapsed_weeks=0.0, horizon_weeks=4.0) -> list:
+        """
+        Scores every counterfactual (efficacy_map strategies and sandboxes, or the given subset)
+        for N students in one batch (see counterfactual_arrays). Returns per student the unperturbed
+        "baseline" and, per strategy, its risk, risk_delta, predicted_dropout_days and
+        horizon_hazard (probability of dropping out within horizon_weeks, when the survival
+        scorer is available).
+        """
+        cf = self.counterfactual_arrays(activity_matrix, drift_scores, strategies, elapsed_weeks, horizon_weeks)
+        risk, days, hazard = cf["risk"], cf["predicted_days"], cf["horizon_hazard"]
+        results = []
+        for i in range(len(risk)):
+            def entry(j):
+                return {"risk": round(float(risk[i, j]), 4),
+                        "risk_delta": round(float(risk[i, j] - risk[i, 0]), 4),
+                        "predicted_dropout_days": int(days[i, j]),
+                        "horizon_hazard": None if hazard is None else round(float(hazard[i, j]), 4)}
+            results.append({"baseline": entry(0),
+                            "strategies": {name: entry(j + 1) for j, name in enumerate(cf["strategies"])}})
+        return results
+
+    def simulate_intervention_impact(self, base_risk: float, strategy: str, activity_vector=None,
+                                     drift_score: float = None) -> dict:
         """
         Calculates the counterfactual risk delta: What happens if we apply this intervention?
         Returns the original risk, the new theoretical risk, and the % reduction.
+        With the student's activity vector and drift score, the strategy's perturbed vector is
+        scored by the models and base_risk is scaled by the modelled risk ratio; without them
+        the strategy's prior efficacy is applied.
         """
-        efficacy_factor = self.efficacy_map.get(strategy, 0.10)
-        
-        # Add slight stochastic variance for realism (-5% to +5% of the factor)
-        variance = np.random.uniform(-0.05, 0.05)
-        applied_efficacy = max(0.01, min(0.99, efficacy_factor + variance))
-        
-        new_risk = base_risk * (1.0 - applied_efficacy)
+        if activity_vector is not None and strategy in self.counterfactual_names:
+            cf = self.evaluate_counterfactuals(np.asarray(activity_vector)[np.newaxis],
+                                               [1.0 if drift_score is None else drift_score], [strategy])[0]
+            ratio = cf["strategies"][strategy]["risk"] / max(cf["baseline"]["risk"], 1e-6)
+            new_risk = max(0.0, min(1.0, base_risk * ratio))
+            source = "model_counterfactual"
+        else:
+            efficacy_factor = self.efficacy_map.get(strategy, 0.10)
+
+            # Add slight stochastic variance for realism (-5% to +5% of the factor)
+            variance = np.random.uniform(-0.05, 0.05)
+            applied_efficacy = max(0.01, min(0.99, efficacy_factor + variance))
+
+            new_risk = base_risk * (1.0 - applied_efficacy)
+            source = "efficacy_prior"
         reduction_percentage = ((base_risk - new_risk) / base_risk) * 100 if base_risk > 0 else 0
-        
+
         return {
             "strategy_simulated": strategy,
             "risk_without_intervention": round(base_risk, 4),
             "risk_with_intervention": round(new_risk, 4),
-            "risk_reduction_percentage": round(reduction_percentage, 2)
+            "risk_reduction_percentage": round(reduction_percentage, 2),
+            "source": source
         }
 
-    def run_counterfactual_sandboxes(self, base_hazard_rate: float, user_features: dict) -> dict:
+    def run_counterfactual_sandboxes(self, base_hazard_rate: float, user_features: dict, drift_score: float = 1.0) -> dict:
         """
-        Executes three parallel sandboxes generating counterfactual vectors for the feature space.
-        Uses Temporal Convolution Networks (mocked here) to predict respective dropout hazard h(t|X').
-        Returns the strategy producing the minimal calculated cumulative hazard.
+        Executes three sandboxes generating counterfactual vectors for the feature space
+        (user_features: pace, lag, volatility, pace_variance; missing ones are 0) and scores
+        them in one batch. Each sandbox's cumulative hazard is base_hazard_rate scaled by its
+        modelled dropout hazard over 4 weeks (dropout risk without a survival scorer) relative
+        to doing nothing. Returns the strategy producing the minimal cumulative hazard.
         """
-        # Baseline Feature Projections based on strategies
-        strategies = {
-            "alpha_do_nothing": 1.0,                       # No change to trajectory
-            "beta_inject_simplification": 0.70,            # 30% reduction in cognitive load features
-            "zeta_syllabus_downgrade": 0.50                # 50% reduction in pace/volume features
-        }
-        
-        results = {}
-        min_hazard = float('inf')
-        optimal_strategy = None
-        
-        for strategy, impact_multiplier in strategies.items():
-            # Mocking the Temporal Convolution Network execution on the projected feature vector X'
-            # h(t|X')
-            projected_hazard = base_hazard_rate * impact_multiplier
-            
-            # Simulate the TCN adding temporal volatility
-            tcn_noise = np.random.normal(0, 0.05) 
-            final_cumulative_hazard = max(0.01, min(0.99, projected_hazard + tcn_noise))
-            
-            results[strategy] = round(final_cumulative_hazard, 4)
-            
-            if final_cumulative_hazard < min_hazard:
-                min_hazard = final_cumulative_hazard
-                optimal_strategy = strategy
-                
+        activity_vector = np.array([user_features.get(f, 0.0) for f in self.feature_names], dtype=np.float64)
+        sandboxes = list(SANDBOX_MULTIPLIERS)
+        cf = self.evaluate_counterfactuals(activity_vector[np.newaxis], [drift_score], sandboxes)[0]
+
+        metric = "horizon_hazard" if cf["baseline"]["horizon_hazard"] is not None else "risk"
+        reference = max(cf["strategies"]["alpha_do_nothing"][metric], 1e-6)
+        results = {name: round(max(0.01, min(0.99, base_hazard_rate * cf["strategies"][name][metric] / reference)), 4)
+                   for name in sandboxes}
+        optimal_strategy = min(results, key=results.get)
+
         return {
             "optimal_strategy": optimal_strategy,
-            "minimized_hazard_rate": min_hazard,
+            "minimized_hazard_rate": results[optimal_strategy],
             "sandbox_results": results
         }
 
-    def classify_dropout_type(self, pace: float, lag: float, hesitation: float, volatility: float, accuracy_decay: float) -> dict:
+    @staticmethod
+    def classify_dropout_types(pace, lag, hesitation, volatility, accuracy_decay) -> dict:
         """
-        Classifies the student into one of 5 dropout archetypes based on a heuristic weighting of features.
+        Vectorized archetype classifier for whole-cohort arrays. All five archetype scores are one
+        (N, 5) @ (5, 5) product of the normalized features with ARCHETYPE_WEIGHTS. Returns arrays:
+        archetype_index, dropout_type, confidence, evidence (N, 4 bool, columns EVIDENCE_FLAGS)
+        and scores.
         """
+        pace, lag, hesitation, volatility, accuracy_decay = np.broadcast_arrays(
+            *(np.asarray(a, dtype=np.float64) for a in (pace, lag, hesitation, volatility, accuracy_decay)))
         # Feature normalization heuristics
-        n_pace = max(0, 1.0 - pace) # Low pace is bad
-        n_lag = min(1.0, lag / 10.0)
-        n_hes = min(1.0, hesitation / 300.0)
-        n_vol = min(1.0, volatility / 3.0)
-        n_acc = min(1.0, accuracy_decay)
-
-        # Class scoring (Weights mapping to the design doc matrix)
-        scores = {
-            "Burnout Dropout": (n_lag * 0.3) + (n_vol * 0.5) + (n_acc * 0.2),
-            "Cognitive Overload Dropout": (n_pace * 0.2) + (n_hes * 0.4) + (n_acc * 0.4),
-            "Conceptual Confusion Dropout": (n_hes * 0.3) + (n_acc * 0.7),
-            "Motivation Dropout": (n_pace * 0.4) + (n_lag * 0.6),
-            "Time-Management Dropout": (n_lag * 0.4) + (n_vol * 0.6)
+        normalized = np.column_stack([
+            np.maximum(0, 1.0 - pace).ravel(),        # Low pace is bad
+            np.minimum(1.0, lag / 10.0).ravel(),
+            np.minimum(1.0, hesitation / 300.0).ravel(),
+            np.minimum(1.0, volatility / 3.0).ravel(),
+            np.minimum(1.0, accuracy_decay).ravel(),
+        ])
+        scores = normalized @ ARCHETYPE_WEIGHTS.T
+        archetype_index = np.argmax(scores, axis=1)
+        confidence = np.minimum(0.99, scores[np.arange(len(scores)), archetype_index] + 0.1) # Boost for demo display
+        evidence = np.column_stack([normalized[:, col] > level for col, level in EVIDENCE_FLAGS.values()])
+        return {
+            "archetype_index": archetype_index,
+            "dropout_type": np.array(DROPOUT_ARCHETYPES, dtype=object)[archetype_index],
+            "confidence": confidence,
+            "evidence": evidence,
+            "scores": scores,
         }
 
-        # Select top class
-        primary_class = max(scores, key=scores.get)
-        confidence = min(0.99, scores[primary_class] + 0.1) # Boost for demo display
-        
-        # Determine supporting evidence
+    @staticmethod
+    def _archetype_entry(classified, i, pace, lag, hesitation, volatility) -> dict:
+        """The classify_dropout_type dict of student i of a classify_dropout_types result."""
+        flags = classified["evidence"][i]
         evidence = []
-        if n_vol > 0.5: evidence.append(f"High Session Volatility ({volatility:.1f})")
-        if n_lag > 0.4: evidence.append(f"Significant Assignment Lag ({lag:.1f} days)")
-        if n_hes > 0.5: evidence.append(f"High Hesitation Time ({hesitation:.0f}s)")
-        if n_pace > 0.4: evidence.append(f"Pace Dropped (-{n_pace*100:.0f}%)")
+        if flags[0]: evidence.append(f"High Session Volatility ({volatility:.1f})")
+        if flags[1]: evidence.append(f"Significant Assignment Lag ({lag:.1f} days)")
+        if flags[2]: evidence.append(f"High Hesitation Time ({hesitation:.0f}s)")
+        if flags[3]: evidence.append(f"Pace Dropped (-{max(0, 1.0 - pace)*100:.0f}%)")
         if not evidence: evidence.append("General accuracy decay")
-
         return {
-            "dropout_type": primary_class,
-            "confidence_score": round(confidence, 2),
+            "dropout_type": classified["dropout_type"][i],
+            "confidence_score": round(float(classified["confidence"][i]), 2),
             "supporting_features": evidence
         }
 
-    def predict(self, activity_vector: np.ndarray, drift_score: float) -> dict:
+    def classify_dropout_type(self, pace: float, lag: float, hesitation: float, volatility: float, accuracy_decay: float) -> dict:
         """
-        Takes the current activity vector and drift score to predict dropout risk.
-        Uses trained XGBoost and Survival models when available; falls back to heuristics.
+        Classifies the student into one of 5 dropout archetypes based on a heuristic weighting of features.
+        """
+        classified = self.classify_dropout_types(pace, lag, hesitation, volatility, accuracy_decay)
+        return self._archetype_entry(classified, 0, pace, lag, hesitation, volatility)
+
+    def score_cohort(self, activity_matrix: np.ndarray, drift_scores, elapsed_weeks=0.0) -> dict:
+        """
+        Array-valued scoring for whole cohorts (no per-student dicts): risk, predicted_days and the
+        classify_dropout_types arrays for every row of the (N, 4) activity matrix.
+        """
+        activity_matrix = np.atleast_2d(np.asarray(activity_matrix, dtype=np.float64))
+        drift_scores = np.broadcast_to(np.asarray(drift_scores, dtype=np.float64), (len(activity_matrix),))
+        channels = self._activity_channels(activity_matrix, drift_scores)
+        scored = self._score(channels, elapsed_weeks)
+        pace, lag, vol, hesitation = channels[:, 0], channels[:, 1], channels[:, 2], channels[:, 3]
+        classified = self.classify_dropout_types(pace, lag, hesitation, vol, np.minimum(1.0, vol * 0.2))
+        return {"risk": scored["dropout_prob"], "predicted_days": scored["predicted_days"], **classified}
+
+    def _compile_feature_layout(self):
+        """
+        Precompiles how the activity channels map onto the training columns of each model as
+        (source channel, destination column) index arrays, so scoring N students is a single
+        scatter into an (N, n_cols) matrix. Channels are those built by `_activity_channels`.
+        """
+        xgb_cols = list(self._feature_cols or [])
+        xgb_map = {"pace": 0, "drift_idx": 4, "volatility_idx": 2, "synthesized_hesitation_sec": 3}
+        # Lag is written to any lag-like click column
+        xgb_pairs = [(1 if "lag" in c and "sum_click" in c else xgb_map[c], j) for j, c in enumerate(xgb_cols)
+                     if c in xgb_map or ("lag" in c and "sum_click" in c)]
+        self._xgb_n_cols = len(xgb_cols)
+        self._xgb_src = np.array([src for src, _ in xgb_pairs], dtype=np.intp)
+        self._xgb_dst = np.array([dst for _, dst in xgb_pairs], dtype=np.intp)
+
+        if self._survival_scorer is not None:
+            surv_cols = self._survival_scorer.covariates
+        else:
+            surv_cols = list(self._survival_model.params_.index) if self._survival_model is not None else []
+        surv_map = {"sum_click": 5, "volatility_idx": 2, "synthesized_hesitation_sec": 3, "drift_idx": 4}
+        surv_pairs = [(surv_map[c], j) for j, c in enumerate(surv_cols) if c in surv_map]
+        self._surv_cols = surv_cols
+        self._surv_src = np.array([src for src, _ in surv_pairs], dtype=np.intp)
+        self._surv_dst = np.array([dst for _, dst in surv_pairs], dtype=np.intp)
+
+        # The LSTM's weekly rows use the survival model's channels, except sum_click: it is trained
+        # on raw weekly clicks, which the lag-based click proxy does not reproduce, so that column
+        # is filled from the clicks passed to observe_week
+        lstm_cols = self._lstm_scorer.seq_features if self._lstm_scorer is not None else []
+        lstm_pairs = [(surv_map[c], j) for j, c in enumerate(lstm_cols) if c in surv_map and c != "sum_click"]
+        self._lstm_click_col = lstm_cols.index("sum_click") if "sum_click" in lstm_cols else None
+        self._lstm_n_cols = len(lstm_cols)
+        self._lstm_src = np.array([src for src, _ in lstm_pairs], dtype=np.intp)
+        self._lstm_dst = np.array([dst for _, dst in lstm_pairs], dtype=np.intp)
+
+    @staticmethod
+    def from_drift_vector(drift_vector) -> np.ndarray:
+        """
+        Maps the drift detector's X_t = [pace, lag, hesitation seconds, volatility] (one vector
+        or an (N, 4) matrix) onto the activity layout [pace, lag, volatility, pace_variance]
+        that predict/predict_batch/counterfactuals expect (pace_variance = hesitation / 100).
+        """
+        drift_vector = np.asarray(drift_vector, dtype=np.float64)
+        pace, lag, hesitation, volatility = np.moveaxis(drift_vector, -1, 0)
+        return np.stack([pace, lag, volatility, hesitation / 100.0], axis=-1)
+
+    @staticmethod
+    def _activity_channels(activity_matrix: np.ndarray, drift_scores: np.ndarray) -> np.ndarray:
+        """(N, 6) channels: pace, lag, volatility, hesitation seconds, drift, survival click proxy."""
+        pace, lag, vol, p_var = activity_matrix.T
+        return np.column_stack([pace, lag, vol, p_var * 100, drift_scores, np.maximum(0.1, 1.0 - lag * 0.1)])
+
+    def _score(self, channels: np.ndarray, elapsed_weeks=0.0, horizon_weeks=None) -> dict:
+        """
+        Dropout probability (one scaler transform + one XGBoost predict) and time-to-dropout
+        (one survival evaluation) for every row of the activity channels. With horizon_weeks and
+        the survival scorer, also the probability of dropping out within that horizon.
         """
-        pace, lag, vol, p_var = activity_vector
+        n = len(channels)
+        lag, vol, drift = channels[:, 1], channels[:, 2], channels[:, 4]
 
         # ── 1. Dropout Probability via XGBoost ──────────────────────────────
+        dropout_prob = None
         if self._xgb_model is not None:
             try:
-                import xgboost as xgb, pandas as pd
-                # Build a feature row aligned to training columns
-                row = {c: 0.0 for c in (self._feature_cols or [])}
-                # Map the four available features to likely column names
-                for key, val in [("pace", pace), ("drift_idx", drift_score),
-                                  ("volatility_idx", vol), ("synthesized_hesitation_sec", p_var * 100)]:
-                    if key in row:
-                        row[key] = val
-                # Also write lag as any lag-like column
-                for col in list(row.keys()):
-                    if "lag" in col and "sum_click" in col:
-                        row[col] = lag
-                df_row = pd.DataFrame([row])
+                import xgboost as xgb
+                X = np.zeros((n, self._xgb_n_cols))
+                X[:, self._xgb_dst] = channels[:, self._xgb_src]
                 if self._scaler:
-                    arr = self._scaler.transform(df_row.values)
-                else:
-                    arr = df_row.values
-                dmat = xgb.DMatrix(arr)
-                dropout_prob = float(self._xgb_model.predict(dmat)[0])
-                logger.debug(f"XGBoost dropout_prob={dropout_prob:.4f}")
+                    X = self._scaler.transform(X)
+                dropout_prob = self._xgb_model.predict(xgb.DMatrix(X)).astype(np.float64)
             except Exception as e:
                 logger.warning(f"XGBoost inference failed, using heuristic: {e}")
                 dropout_prob = None
-        else:
-            dropout_prob = None
+        from_xgb = dropout_prob is not None
 
         if dropout_prob is None:
             # Heuristic fallback
-            base_risk = min(0.99, (drift_score * 0.2) + (lag * 0.1) + (vol * 0.05))
-            dropout_prob = max(0.01, min(0.99, base_risk))
+            dropout_prob = np.clip((drift * 0.2) + (lag * 0.1) + (vol * 0.05), 0.01, 0.99)
 
         # ── 2. Time-to-Dropout via Survival Model ───────────────────────────
-        if self._survival_model is not None:
+        predicted_days, horizon_hazard = None, None
+        if self._survival_scorer is not None:
+            X_surv = np.zeros((n, len(self._surv_cols)))
+            X_surv[:, self._surv_dst] = channels[:, self._surv_src]
+            # Median remaining days from the baseline survival table; beyond follow-up caps at 180
+            median_days = self._survival_scorer.median_days_to_event(X_surv, elapsed_weeks)
+            predicted_days = np.clip(np.rint(np.minimum(median_days, 180)), 1, 180).astype(int)
+            if horizon_weeks is not None:
+                horizon_hazard = 1.0 - self._survival_scorer.conditional_survival(X_surv, elapsed_weeks, horizon_weeks)
+        elif self._survival_model is not None:
             try:
                 import pandas as pd
-                # Build a small dataframe with features the Cox model knows
-                surv_row = {}
-                for col in self._survival_model.params_.index:
-                    surv_row[col] = 0.0
-                for key, val in [("sum_click", max(0.1, 1.0 - lag * 0.1)),
-                                  ("volatility_idx", vol),
-                                  ("synthesized_hesitation_sec", p_var * 100),
-                                  ("drift_idx", drift_score)]:
-                    if key in surv_row:
-                        surv_row[key] = val
-                df_surv = pd.DataFrame([surv_row])
-                hazard = float(self._survival_model.predict_partial_hazard(df_surv).iloc[0])
+                X_surv = np.zeros((n, len(self._surv_cols)))
+                X_surv[:, self._surv_dst] = channels[:, self._surv_src]
+                hazard = np.asarray(self._survival_model.predict_partial_hazard(
+                    pd.DataFrame(X_surv, columns=self._surv_cols)), dtype=np.float64).ravel()
                 # Convert hazard to approximate days (higher hazard → fewer days)
-                predicted_days = max(1, int(round(30.0 / max(hazard, 0.01))))
-                predicted_days = min(predicted_days, 180)
-                logger.debug(f"Survival hazard={hazard:.4f} → predicted_days={predicted_days}")
+                predicted_days = np.clip(np.rint(30.0 / np.maximum(hazard, 0.01)), 1, 180).astype(int)
             except Exception as e:
                 logger.warning(f"Survival inference failed, using heuristic: {e}")
                 predicted_days = None
-        else:
-            predicted_days = None
 
         if predicted_days is None:
-            if dropout_prob > 0.8:
-                predicted_days = max(1, int(np.random.normal(3, 1)))
-            elif dropout_prob > 0.5:
-                predicted_days = max(1, int(np.random.normal(10, 2)))
-            else:
-                predicted_days = max(1, int(np.random.normal(30, 5)))
+            mean = np.select([dropout_prob > 0.8, dropout_prob > 0.5], [3, 10], 30)
+            std = np.select([dropout_prob > 0.8, dropout_prob > 0.5], [1, 2], 5)
+            predicted_days = np.maximum(1, np.random.normal(mean, std).astype(int))
+
+        return {"dropout_prob": dropout_prob, "predicted_days": predicted_days,
+                "horizon_hazard": horizon_hazard, "from_xgb": from_xgb}
+
+    def predict_batch(self, activity_matrix: np.ndarray, drift_scores, elapsed_weeks=0.0,
+                      student_ids=None, latency_budget_ms=None) -> list:
+        """
+        Scores N students at once. activity_matrix is (N, 4) [pace, lag, volatility, pace_variance]
+        and drift_scores has length N; returns one `predict`-style dict per student.
+        Uses one scaler transform, one XGBoost predict and one partial-hazard evaluation.
+        elapsed_weeks (scalar or N values) is how far into the course each student is; the
+        survival scorer's time-to-dropout is the median remaining time given survival so far.
+
+        With student_ids, the LSTM score over each student's weeks recorded by `observe_week` is
+        blended 0.6 XGBoost / 0.4 LSTM; scoring does not add to those sequences, so the same
+        week can be re-scored freely. The LSTM runs in the scorer's batching worker while
+        XGBoost runs here; if it has not answered within latency_budget_ms (default
+        lstm_budget_ms) the prediction is XGBoost alone.
+        """
+        t0 = time.perf_counter()
+        activity_matrix = np.atleast_2d(np.asarray(activity_matrix, dtype=np.float64))
+        drift_scores = np.broadcast_to(np.asarray(drift_scores, dtype=np.float64), (len(activity_matrix),))
+        if activity_matrix.shape[1] != 4:
+            raise ValueError(f"activity_matrix must have 4 columns {self.feature_names}, got {activity_matrix.shape[1]}")
+        n = len(activity_matrix)
+        channels = self._activity_channels(activity_matrix, drift_scores)
+        pace, lag, vol, hesitation, drift = channels[:, :5].T
+
+        lstm_future = None
+        if student_ids is not None and self._lstm_scorer is not None and self._xgb_model is not None:
+            if len(student_ids) != n:
+                raise ValueError(f"Expected {n} student_ids, got {len(student_ids)}")
+            lstm_future = self._lstm_scorer.submit(student_ids)
+
+        # ── 1-2. Dropout Probability and Time-to-Dropout (see _score) ──────
+        scored = self._score(channels, elapsed_weeks)
+        dropout_prob, predicted_days = scored["dropout_prob"], scored["predicted_days"]
+        if not scored["from_xgb"] and lstm_future is not None:
+            lstm_future.cancel()
+            lstm_future = None
+
+        # ── 1b. Sequence model blend (within the latency budget) ────────────
+        blended = np.zeros(n, dtype=bool)
+        if lstm_future is not None:
+            budget_ms = self.lstm_budget_ms if latency_budget_ms is None else latency_budget_ms
+            remaining = budget_ms / 1000.0 - (time.perf_counter() - t0)
+            try:
+                lstm_prob = lstm_future.result(timeout=max(0.0, remaining))
+                blended = ~np.isnan(lstm_prob)
+                dropout_prob = np.where(blended, XGB_WEIGHT * dropout_prob + LSTM_WEIGHT * lstm_prob, dropout_prob)
+            except FutureTimeoutError:
+                lstm_future.cancel()
+                logger.debug(f"LSTM exceeded the {budget_ms:.0f} ms budget, serving XGBoost alone")
+            except Exception as e:
+                logger.warning(f"LSTM inference failed, serving XGBoost alone: {e}")
 
         # ── 3. Engagement Trend ─────────────────────────────────────────────
-        decline_trend = "Accelerating Decline" if vol > 2.0 else "Stable"
+        decline_trend = np.where(vol > 2.0, "Accelerating Decline", "Stable")
 
         # ── 4. Top Contributing Features ────────────────────────────────────
-        contributions = {
-            "lag": lag * 0.5,
-            "volatility": vol * 0.3,
-            "low_pace": max(0, 1.0 - pace) * 0.6
-        }
-        sorted_features = sorted(contributions.items(), key=lambda item: item[1], reverse=True)
-        top_features = [k for k, v in sorted_features if v > 0.5] or ["general_drift"]
+        contributions = np.column_stack([lag * 0.5, vol * 0.3, np.maximum(0, 1.0 - pace) * 0.6])
+        contribution_names = np.array(["lag", "volatility", "low_pace"])
+        order = np.argsort(-contributions, axis=1, kind="stable")
 
+        inference_source = np.where(blended, "xgboost+lstm+survival",
+                                    "xgboost+survival" if self._xgb_model else "heuristic")
         # ── 5. Dropout Archetype Classification ─────────────────────────────
-        mock_hesitation = p_var * 100.0
-        mock_acc_decay = min(1.0, vol * 0.2)
-        dropout_class = self.classify_dropout_type(pace, lag, mock_hesitation, vol, mock_acc_decay)
+        mock_acc_decay = np.minimum(1.0, vol * 0.2)
+        classified = self.classify_dropout_types(pace, lag, hesitation, vol, mock_acc_decay)
 
-        return {
-            "risk_score": round(dropout_prob, 4),
-            "predicted_dropout_days": predicted_days,
-            "engagement_trend": decline_trend,
-            "top_contributing_features": top_features,
-            "classification": dropout_class,
-            "inference_source": "xgboost+survival" if self._xgb_model else "heuristic"
-        }
+        results = []
+        for i in range(n):
+            top_features = [str(contribution_names[k]) for k in order[i] if contributions[i, k] > 0.5] or ["general_drift"]
+            dropout_class = self._archetype_entry(classified, i, pace[i], lag[i], hesitation[i], vol[i])
+            results.append({
+                "risk_score": round(float(dropout_prob[i]), 4),
+                "predicted_dropout_days": int(predicted_days[i]),
+                "engagement_trend": str(decline_trend[i]),
+                "top_contributing_features": top_features,
+                "classification": dropout_class,
+                "inference_source": str(inference_source[i])
+            })
+        return results
+
+    def observe_week(self, student_ids, weeks, activity_matrix: np.ndarray, drift_scores, sum_clicks=None):
+        """
+        Records each student's activity for a finished course week in the LSTM sequence buffer,
+        in the (N, 4) predict_batch layout, with the week's raw click count (sum_clicks, as in
+        training) when the LSTM reads sum_click. A week sent again replaces that week's row;
+        weeks must not go backwards per student. No-op when the LSTM is not served.
+        """
+        if self._lstm_scorer is None:
+            return
+        activity_matrix = np.atleast_2d(np.asarray(activity_matrix, dtype=np.float64))
+        n = len(activity_matrix)
+        drift_scores = np.broadcast_to(np.asarray(drift_scores, dtype=np.float64), (n,))
+        if len(student_ids) != n or len(weeks) != n:
+            raise ValueError(f"Expected {n} student_ids and weeks")
+        if self._lstm_click_col is not None and (sum_clicks is None or len(sum_clicks) != n):
+            raise ValueError(f"The LSTM reads raw weekly clicks: expected {n} sum_clicks")
+        channels = self._activity_channels(activity_matrix, drift_scores)
+        rows = np.zeros((n, self._lstm_n_cols))
+        rows[:, self._lstm_dst] = channels[:, self._lstm_src]
+        if self._lstm_click_col is not None:
+            rows[:, self._lstm_click_col] = np.asarray(sum_clicks, dtype=np.float64)
+        self._lstm_scorer.observe(student_ids, rows, weeks)
+
+    def predict(self, activity_vector: np.ndarray, drift_score: float, elapsed_weeks: float = 0.0,
+                student_id=None, latency_budget_ms=None) -> dict:
+        """
+        Takes the current activity vector and drift score to predict dropout risk.
+        Uses trained XGBoost and Survival models when available; falls back to heuristics.
+        With a student_id the LSTM over the student's observed weeks is blended in (see predict_batch).
+        """
+        return self.predict_batch(np.asarray(activity_vector)[np.newaxis], [drift_score], elapsed_weeks,
+                                  None if student_id is None else [student_id], latency_budget_ms)[0]
 
     def calculate_csi(self, rewinds: int, difficulty_weight: float, hesitation_time: float, prev_csi: float = 0.0, gamma: float = 0.8) -> float:
         """
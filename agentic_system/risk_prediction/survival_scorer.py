@@ -0,0 +1,71 @@
+import numpy as np
+
+LN2 = np.log(2.0)
+
+class SurvivalScorer:
+    """
+    Numpy-only Cox model scorer built from the array artifact written by
+    ml_pipeline.models.survival_model.export_survival_scorer. No pandas or lifelines.
+
+    The partial hazard is one dot product and exp. The baseline cumulative hazard H0 is kept
+    as a sorted (times, cum_hazard) table: S(t | x) = exp(-H0(t) * partial_hazard) interpolates
+    it linearly between event times (as lifelines' predict_survival_function does), and the
+    median time-to-dropout is a searchsorted lookup on the table's steps (as predict_median).
+    Times are in the model's unit (weeks for the OULAD models); time_unit_days converts to days.
+    """
+    def __init__(self, covariates, coef, mean, times, cum_hazard, time_unit_days=7.0, source=None):
+        self.covariates = list(covariates)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.times = np.asarray(times, dtype=np.float64)
+        self.cum_hazard = np.asarray(cum_hazard, dtype=np.float64)
+        self.time_unit_days = float(time_unit_days)
+        self.source = source
+        self._offset = float(self.mean @ self.coef)  # (x - mean) . coef == x . coef - offset
+        if len(self.coef) != len(self.covariates) or len(self.mean) != len(self.covariates):
+            raise ValueError("coef and mean must have one entry per covariate")
+        if len(self.times) != len(self.cum_hazard) or np.any(np.diff(self.times) <= 0):
+            raise ValueError("The baseline table needs strictly increasing times with one cumulative hazard each")
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as a:
+            return cls(a['covariates'].tolist(), a['coef'], a['mean'], a['times'], a['cum_hazard'],
+                       float(a['time_unit_days']), str(a['source']))
+
+    def baseline_cumulative_hazard(self, t):
+        """H0 at time(s) t, linearly interpolated in the table and held flat outside it."""
+        return np.interp(t, self.times, self.cum_hazard)
+
+    def partial_hazard(self, X):
+        """exp((x - mean) . coef) for one covariate row or an (N, d) matrix in `covariates` order."""
+        return np.exp(np.asarray(X, dtype=np.float64) @ self.coef - self._offset)
+
+    def survival_function(self, X, times):
+        """S(t | x) for each row of X (N, d) at each of `times` (T,): an (N, T) matrix."""
+        ph = np.atleast_1d(self.partial_hazard(X))
+        return np.exp(-np.outer(ph, self.baseline_cumulative_hazard(np.asarray(times, dtype=np.float64))))
+
+    def conditional_survival(self, X, elapsed, horizon):
+        """S(t + T | x) / S(t | x): probability of still being enrolled `horizon` after `elapsed`."""
+        H_now = self.baseline_cumulative_hazard(elapsed)
+        H_later = self.baseline_cumulative_hazard(np.asarray(elapsed) + horizon)
+        return np.exp(-(H_later - H_now) * self.partial_hazard(X))
+
+    def median_time_to_event(self, X, elapsed=0.0):
+        """
+        Remaining time until S(t + T | x) / S(t | x) first drops to 0.5, in model time units.
+        inf when the baseline table ends before that (the median lies beyond follow-up).
+        """
+        ph = np.atleast_1d(self.partial_hazard(X))
+        elapsed = np.broadcast_to(np.asarray(elapsed, dtype=np.float64), ph.shape)
+        # H0 at the last event time <= elapsed (0 before the first)
+        H_now = np.concatenate([[0.0], self.cum_hazard])[np.searchsorted(self.times, elapsed, side='right')]
+        target = H_now + LN2 / ph
+        idx = np.searchsorted(self.cum_hazard, target, side='left')
+        reached = idx < len(self.times)
+        event_time = np.where(reached, self.times[np.minimum(idx, len(self.times) - 1)], np.inf)
+        return event_time - elapsed
+
+    def median_days_to_event(self, X, elapsed=0.0):
+        return self.median_time_to_event(X, elapsed) * self.time_unit_days
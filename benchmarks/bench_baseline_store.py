@@ -0,0 +1,76 @@
+"""
+Benchmark — BehavioralDriftDetector per-student state at platform scale.
+Compares the memory of the legacy dict-of-dicts layout (a deque of Python float lists,
+mu/sigma and a separate drift score per student, measured with tracemalloc on a sample
+and extrapolated) against the array-backed BaselineStore, and times a snapshot save and
+a memory-mapped restore of the full store.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+import numpy as np
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agentic_system.behavioral_drift.baseline_store import BaselineStore
+
+LEGACY_SAMPLE = 20_000
+
+def legacy_state(ids, windows, mu, sigma):
+    baselines, scores = {}, {}
+    for sid, window, m, s in zip(ids, windows.tolist(), mu.tolist(), sigma.tolist()):
+        baselines[sid] = {'mu_error': np.float32(m), 'sigma_error': np.float32(s),
+                          'historical_seq': deque(window, maxlen=len(window))}
+        scores[sid] = 0.0
+    return baselines, scores
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Baseline store memory and restart benchmark')
+    parser.add_argument('--students', type=int, default=1_000_000)
+    parser.add_argument('--window', type=int, default=10)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Baseline store benchmark — {args.students:,} students x window {args.window}")
+    print("=" * 60)
+
+    rng = np.random.default_rng(42)
+    ids = [f"STU_{i}" for i in range(args.students)]
+    windows = rng.normal(loc=[1.0, 0.5, 30, 0.2], scale=[0.1, 0.1, 5, 0.05],
+                         size=(args.students, args.window, 4)).astype(np.float32)
+    mu, sigma = rng.gamma(4.0, 5.0, args.students), rng.gamma(2.0, 1.0, args.students)
+
+    sample = min(LEGACY_SAMPLE, args.students)
+    tracemalloc.start()
+    legacy = legacy_state(ids[:sample], windows[:sample], mu[:sample], sigma[:sample])
+    legacy_bytes = tracemalloc.get_traced_memory()[0] * (args.students / sample)
+    tracemalloc.stop()
+    del legacy
+
+    t0 = time.perf_counter()
+    store = BaselineStore(args.window, capacity=args.students)
+    store.set_baselines(ids, windows, np.full(args.students, args.window), mu, sigma)
+    t_fill = time.perf_counter() - t0
+    array_bytes = sum(getattr(store, name).nbytes for name in ('windows', 'heads', 'counts', 'mu', 'sigma', 'scores'))
+
+    path = os.path.join(tempfile.mkdtemp(), "baselines")
+    t0 = time.perf_counter()
+    store.save(path)
+    t_save = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    restored = BaselineStore.load(path)
+    t_load = time.perf_counter() - t0
+
+    rows = restored.rows(ids[::97])
+    same = np.array_equal(restored.gather(rows)[0], store.gather(rows)[0])
+    print(f"\n  Legacy dict/deque state (extrapolated): {legacy_bytes / 2**20:9.1f} MB")
+    print(f"  BaselineStore arrays:                   {array_bytes / 2**20:9.1f} MB "
+          f"({legacy_bytes / array_bytes:,.0f}x smaller, {array_bytes / args.students:.0f} B/student)")
+    print(f"\n  Fill {t_fill:.2f}s | snapshot save {t_save:.2f}s | mmap restore {t_load:.2f}s | restored equal: {same}")
+    shutil.rmtree(os.path.dirname(path))
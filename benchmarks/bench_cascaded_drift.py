@@ -0,0 +1,93 @@
+"""
+Benchmark — cascaded drift detection (NumPy EWMA/CUSUM pre-filter + autoencoder) vs
+always-on autoencoder scoring.
+Replays a month of daily vectors for a synthetic cohort where a tenth of the students
+drift after the first week, and reports the autoencoder calls avoided, the scoring time
+per day, zone agreement and how many of the always-on alerts (Zone 1+) the cascade also
+raises, and how much later, overall and for the students that really drift.
+
+The drift ramps up over the whole replay, so --days sets how developed it is by the end.
+The default limits catch every drifting student over 30 days. Over 10 days
+(--students 3000 --days 10) the cascade alerts 70.9% of them, against 83.6% always-on;
+--ewma-limit 1.0 --cusum-h 2 brings that to 86.6% with fewer calls avoided.
+"""
+
+import os
+import sys
+import time
+import copy
+import argparse
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from agentic_system.behavioral_drift.drift_detector import BehavioralDriftDetector
+from agentic_system.behavioral_drift.cascade import CascadedDriftDetector
+
+def synth_days(n_students, window, n_days, drift_share=0.1, seed=42):
+    rng = np.random.default_rng(seed)
+    loc, scale = np.array([1.0, 0.5, 30, 0.2]), np.array([0.1, 0.1, 5, 0.05])
+    history = rng.normal(loc, scale, size=(n_students, window, 4))
+    days = rng.normal(loc, scale, size=(n_days, n_students, 4))
+    # Drifting students slide steadily away from their baseline after the first week
+    ramp = np.clip(np.arange(n_days) - 7, 0, None)[:, np.newaxis, np.newaxis] / n_days
+    drifting = rng.random(n_students) < drift_share
+    days += drifting[np.newaxis, :, np.newaxis] * ramp * np.array([-0.7, 3.0, 120, 1.3])
+    return history, days, drifting
+
+def first_alert(zones):
+    """Day of each student's first Zone 1+ alert, -1 if never."""
+    alerted = zones >= 1
+    return np.where(alerted.any(axis=0), alerted.argmax(axis=0), -1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Cascaded vs always-on drift scoring benchmark')
+    parser.add_argument('--students', type=int, default=50_000)
+    parser.add_argument('--window', type=int, default=14)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--audit-every', type=int, default=7)
+    parser.add_argument('--ewma-limit', type=float, default=2.0)
+    parser.add_argument('--cusum-h', type=float, default=4.0)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Cascaded drift benchmark — {args.students:,} students x {args.days} days, window {args.window}")
+    print("=" * 60)
+
+    torch.manual_seed(42)
+    history, days, drifting = synth_days(args.students, args.window, args.days)
+    ids = list(range(args.students))
+    always = BehavioralDriftDetector(alpha=0.3, baseline_window=args.window)
+    always.train_baselines(ids, history)
+    cascade = CascadedDriftDetector(copy.deepcopy(always), audit_every=args.audit_every,
+                                    ewma_limit=args.ewma_limit, cusum_h=args.cusum_h)
+    cascade.refit()
+
+    always_zones, cascade_zones = [], []
+    t_always = t_cascade = 0.0
+    for X in days:
+        t0 = time.perf_counter()
+        always_zones.append(always.update_drift_scores_batch(ids, X)[1])
+        t_always += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        cascade_zones.append(cascade.update(ids, X)[1])
+        t_cascade += time.perf_counter() - t0
+    always_zones, cascade_zones = np.array(always_zones), np.array(cascade_zones)
+
+    alerts = always_zones >= 1
+    first_always, first_cascade = first_alert(always_zones), first_alert(cascade_zones)
+    caught = (first_always >= 0) & (first_cascade >= 0)
+    stats = cascade.stats()
+    print(f"\n  Always-on autoencoder: {t_always / args.days * 1000:8.1f} ms/day")
+    print(f"  Cascaded:              {t_cascade / args.days * 1000:8.1f} ms/day ({t_always / t_cascade:.1f}x) "
+          f"| autoencoder calls avoided: {stats['avoided_fraction']:.1%}")
+    print(f"  Audits of unflagged students: {stats['audits']:,} ({stats['audit_alert_rate']:.2%} alerted)")
+    print(f"\n  Zone agreement: {np.mean(always_zones == cascade_zones):.2%} "
+          f"| Zone 1+ updates also alerted: {np.mean(cascade_zones[alerts] >= 1):.2%} "
+          f"| false alerts: {np.mean(cascade_zones[~alerts] >= 1):.3%}")
+    print(f"  Students ever alerted: always-on {np.sum(first_always >= 0):,}, cascade {np.sum(first_cascade >= 0):,}, "
+          f"both {caught.sum():,} | mean first-alert delay: {np.mean(first_cascade[caught] - first_always[caught]):.2f} days")
+    print(f"  Drifting students alerted ({drifting.sum():,}): always-on {np.mean(first_always[drifting] >= 0):.2%}, "
+          f"cascade {np.mean(first_cascade[drifting] >= 0):.2%} | alerted non-drifting: "
+          f"always-on {np.sum(first_always[~drifting] >= 0):,}, cascade {np.sum(first_cascade[~drifting] >= 0):,}")
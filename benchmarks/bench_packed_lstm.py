@@ -0,0 +1,116 @@
+"""
+Benchmark — LSTMDropoutPredictor on left-padded fixed-length tensors vs packed
+variable-length sequences with length-bucketed batches.
+Uses a synthetic cohort where most students have short tenure (the shape of the
+OULAD withdrawals), and reports training throughput plus train/held-out loss.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Subset, TensorDataset
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from ml_pipeline.data_prep.sequence_formatting import construct_lstm_tensors, construct_ragged_sequences
+from ml_pipeline.models.lstm_model import (LSTMDropoutPredictor, RaggedSequenceDataset,
+                                           LengthBucketSampler, collate_ragged)
+
+MAX_WEEKS = 40
+SEQ_FEATURES = ['sum_click', 'volatility_idx', 'synthesized_hesitation_sec']
+
+def synth_ragged_cohort(n_students, seed=42):
+    rng = np.random.default_rng(seed)
+    tenure = np.clip(rng.geometric(0.08, size=n_students), 1, MAX_WEEKS)
+    label = (rng.random(n_students) < 0.3).astype(int) # at-risk students engage less every week
+    ids = np.repeat(np.arange(n_students), tenure)
+    week = np.arange(len(ids)) - np.repeat(np.cumsum(tenure) - tenure, tenure)
+    clicks = rng.gamma(2.0, 25.0, size=len(ids)) * np.where(np.repeat(label, tenure) == 1, 0.6, 1.0)
+    return pd.DataFrame({
+        'id_student': ids,
+        'week': week,
+        'sum_click': np.log1p(clicks),
+        'volatility_idx': rng.normal(0, 1, len(ids)),
+        'synthesized_hesitation_sec': rng.normal(0, 1, len(ids)),
+        'age_band': np.repeat(rng.integers(0, 3, n_students), tenure).astype(float),
+        'label': np.repeat(label, tenure),
+    })
+
+def run_epochs(model, loader, epochs, packed):
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
+    criterion = nn.BCELoss()
+    model.train()
+    t0 = time.perf_counter()
+    for _ in range(epochs):
+        total_loss = 0.0
+        for batch in loader:
+            xb, sb, yb = batch[:3]
+            optimizer.zero_grad()
+            out = model(xb, sb, batch[3] if packed else None).squeeze(1)
+            loss = criterion(out, yb)
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+    return time.perf_counter() - t0, total_loss / len(loader)
+
+def evaluate(model, loader, packed):
+    criterion = nn.BCELoss(reduction='sum')
+    model.eval()
+    total, n = 0.0, 0
+    with torch.no_grad():
+        for batch in loader:
+            xb, sb, yb = batch[:3]
+            total += criterion(model(xb, sb, batch[3] if packed else None).squeeze(1), yb).item()
+            n += len(yb)
+    return total / n
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Packed vs padded LSTM benchmark')
+    parser.add_argument('--students', type=int, default=20_000)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    torch.manual_seed(42)
+    df = synth_ragged_cohort(args.students)
+    print("=" * 60)
+    print(f"Packed LSTM benchmark — {args.students:,} students, {len(df):,} student-weeks "
+          f"(mean tenure {len(df) / args.students:.1f} of {MAX_WEEKS} weeks)")
+    print("=" * 60)
+
+    X_pad, S_pad, y_pad, _ = construct_lstm_tensors(df, SEQ_FEATURES, sequence_length=MAX_WEEKS,
+                                                    static_cols=['age_band'], label_col='label')
+    values, offsets, S_rag, y_rag, _ = construct_ragged_sequences(df, SEQ_FEATURES, static_cols=['age_band'],
+                                                                  label_col='label')
+
+    idx = np.random.default_rng(0).permutation(args.students)
+    train_idx, test_idx = idx[:int(0.8 * len(idx))], idx[int(0.8 * len(idx)):]
+
+    padded = TensorDataset(torch.from_numpy(X_pad), torch.from_numpy(S_pad), torch.from_numpy(y_pad.astype(np.float32)))
+    ragged = RaggedSequenceDataset(values, offsets, S_rag, y_rag.astype(np.float32))
+
+    results = {}
+    for name, packed in (('padded', False), ('packed', True)):
+        torch.manual_seed(42)
+        model = LSTMDropoutPredictor(len(SEQ_FEATURES), 1)
+        if packed:
+            train_loader = DataLoader(Subset(ragged, train_idx), collate_fn=collate_ragged,
+                                      batch_sampler=LengthBucketSampler(ragged.lengths[train_idx], args.batch_size))
+            test_loader = DataLoader(Subset(ragged, test_idx), collate_fn=collate_ragged,
+                                     batch_sampler=LengthBucketSampler(ragged.lengths[test_idx], 1024, shuffle=False))
+        else:
+            train_loader = DataLoader(Subset(padded, train_idx), batch_size=args.batch_size, shuffle=True)
+            test_loader = DataLoader(Subset(padded, test_idx), batch_size=1024)
+        elapsed, train_loss = run_epochs(model, train_loader, args.epochs, packed)
+        results[name] = (elapsed, train_loss, evaluate(model, test_loader, packed))
+
+    for name, (elapsed, train_loss, test_loss) in results.items():
+        throughput = args.epochs * len(train_idx) / elapsed
+        print(f"  {name:>6}: {elapsed:7.2f}s  {throughput:9,.0f} students/s | "
+              f"train loss {train_loss:.4f} | held-out loss {test_loss:.4f}")
+    print(f"\n  Speed-up: {results['padded'][0] / results['packed'][0]:.1f}x")
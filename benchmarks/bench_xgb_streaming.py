@@ -0,0 +1,80 @@
+"""
+Benchmark — XGBoostPredictor in-memory training vs streaming from Parquet chunks
+(QuantileDMatrix and external memory). Each mode runs in its own process so the
+reported peak RSS belongs to that mode alone.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from ml_pipeline.models.xgboost_model import XGBoostPredictor, TabularChunkIter, peak_rss_mb
+
+DATA_DIR = "benchmarks/.xgb_streaming"
+N_FEATURES = 40
+ROWS_PER_GROUP = 250_000
+
+def write_synthetic_table(n_rows, path, seed):
+    """Synthetic tabular feature table written as Parquet with fixed-size row groups."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, N_FEATURES)).astype(np.float32)
+    logit = 1.5 * X[:, 0] - X[:, 1] + 0.5 * X[:, 2] * X[:, 3] - 1.5
+    df = pd.DataFrame(X, columns=[f"f{j}" for j in range(N_FEATURES)])
+    df['label'] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(np.int8)
+    df.to_parquet(path, row_group_size=ROWS_PER_GROUP, index=False)
+
+def run_mode(mode, rounds):
+    feature_cols = [f"f{j}" for j in range(N_FEATURES)]
+    train_path, val_path = f"{DATA_DIR}/train.parquet", f"{DATA_DIR}/val.parquet"
+    predictor = XGBoostPredictor({'objective': 'binary:logistic', 'eval_metric': 'aucpr', 'max_depth': 6,
+                                  'learning_rate': 0.1, 'tree_method': 'hist', 'seed': 42})
+    t0 = time.perf_counter()
+    if mode == 'dense':
+        train, val = pd.read_parquet(train_path), pd.read_parquet(val_path)
+        predictor.train(train[feature_cols].values, train['label'].values, val[feature_cols].values,
+                        val['label'].values, num_rounds=rounds, early_stopping_rounds=rounds)
+    else:
+        external = mode == 'external'
+        train_iter = TabularChunkIter.from_parquet(train_path, feature_cols, 'label',
+                                                   cache_prefix=f"{DATA_DIR}/cache" if external else None)
+        val_iter = TabularChunkIter.from_parquet(val_path, feature_cols, 'label')
+        predictor.train_streaming(train_iter, val_iter, num_rounds=rounds, early_stopping_rounds=rounds,
+                                  external_memory=external)
+    stats = predictor.resource_log.summary()
+    print(f"RESULT {mode} {time.perf_counter() - t0:.2f} {stats['ms_per_round']:.2f} {peak_rss_mb():.0f} "
+          f"{predictor.model.best_score:.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Streaming XGBoost training benchmark')
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--mode', choices=['dense', 'quantile', 'external'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.rounds)
+        sys.exit(0)
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    write_synthetic_table(args.rows, f"{DATA_DIR}/train.parquet", seed=42)
+    write_synthetic_table(args.rows // 10, f"{DATA_DIR}/val.parquet", seed=7)
+
+    print("=" * 60)
+    print(f"Streaming XGBoost benchmark — {args.rows:,} rows x {N_FEATURES} features, {args.rounds} rounds")
+    print("=" * 60)
+    for mode in ('dense', 'quantile', 'external'):
+        out = subprocess.run([sys.executable, __file__, '--mode', mode, '--rounds', str(args.rounds)],
+                             capture_output=True, text=True).stdout
+        result = [line for line in out.splitlines() if line.startswith('RESULT')]
+        if not result:
+            print(f"  {mode:>9}: failed\n{out}")
+            continue
+        _, _, total, per_round, rss, score = result[0].split()
+        print(f"  {mode:>9}: {float(total):7.2f}s total | {float(per_round):6.1f} ms/round | "
+              f"peak RSS {int(rss):>6,} MB | val PR-AUC {score}")
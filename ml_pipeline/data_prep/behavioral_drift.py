@@ -1,57 +1,115 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from scipy.spatial.distance import jensenshannon
-from fastdtw import fastdtw
-from scipy.spatial.distance import euclidean
+
+from .drift_kernels import segment_students, pad_by_student, prefix_dtw, window_jsd, sliding_jsd
+from .prototype_index import PrototypeIndex
+
+# Prototype trajectories (or PrototypeIndex) shipped once to each pool worker by its initializer
+_worker_prototypes = None
+
+def _init_worker(prototypes):
+    global _worker_prototypes
+    _worker_prototypes = prototypes
+
+def _jsd_rows(values, lengths, hist_win, cur_win):
+    """Intra-student JSD for a contiguous block of students, returned in flat row order."""
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    padded, rows, cols = pad_by_student(values, starts, lengths)
+    return sliding_jsd(padded, lengths, hist_win, cur_win)[rows, cols]
+
+def _dtw_rows(values, weeks, lengths, groups, prototypes, window):
+    """Prefix DTW for a contiguous block of students, returned in flat row order."""
+    if isinstance(prototypes, PrototypeIndex):
+        return prototypes.prefix_distances(values, weeks, lengths, groups, window=window)
+    
+    proto_weeks, proto_seq = prototypes
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    student_seqs, rows, cols = pad_by_student(values, starts, lengths)
+    
+    # A prefix ending at week w is compared with the prototype weeks <= w
+    proto_ends = np.zeros(student_seqs.shape[:2], dtype=np.int64)
+    proto_ends[rows, cols] = np.searchsorted(proto_weeks, weeks, side='right')
+    
+    distances = prefix_dtw(student_seqs, lengths, proto_seq, proto_ends, window=window)
+    return distances[rows, cols]
+
+def _dtw_rows_worker(values, weeks, lengths, groups, window):
+    return _dtw_rows(values, weeks, lengths, groups, _worker_prototypes, window)
+
+def _balanced_chunks(lengths, n_chunks):
+    """
+    Splits students into at most n_chunks contiguous blocks holding roughly the same
+    number of rows. Returns (student_slice, row_slice) pairs in original order.
+    """
+    row_ends = np.cumsum(lengths)
+    targets = row_ends[-1] * np.arange(1, n_chunks) / n_chunks
+    cuts = np.unique(np.concatenate(([0], np.searchsorted(row_ends, targets, side='left') + 1, [len(lengths)])))
+    
+    chunks = []
+    for lo, hi in zip(cuts[:-1], cuts[1:]):
+        row_lo = row_ends[lo - 1] if lo > 0 else 0
+        chunks.append((slice(lo, hi), slice(row_lo, row_ends[hi - 1])))
+    return chunks
+
+def sigmoid_shift(x):
+    """
+    Ensure DTW anomaly pushes upwards via Sigmoid scaling.
+    Sigmoid(Z) centers at 0.5. We shift it so a Z score of 0 contributes 0, and high Z pushes near 1.
+    """
+    return 1 / (1 + np.exp(-x)) - 0.5
 
 class BehavioralDriftDetector:
-    def __init__(self, historical_window=4, current_window=2):
+    def __init__(self, historical_window=4, current_window=2, dtw_window=None, n_jobs=1, alpha=0.6, beta=0.4, gamma=0.2):
         self.hist_win = historical_window
         self.cur_win = current_window
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma # UDI weights: JSD, DTW and acceleration terms
+        self.dtw_window = dtw_window # Sakoe-Chiba radius in weeks; None computes exact DTW
+        self.n_jobs = os.cpu_count() if n_jobs == -1 else max(1, n_jobs) # -1 uses every core
         self.prototype_trajectories = {} # Will store successful peer prototypes
+        self.prototype_index = None # Optional multi-prototype index, takes precedence when set
+        self.dtw_week_stats = None # Per-week mean/std of dtw_distance used for the DTW Z-score
+        self.jsd_feature_col = 'sum_click' # Feature of the last calculate_intra_student_drift run
+        self.dtw_feature_cols = None # Features of the last calculate_inter_student_drift run
 
     def compute_jsd(self, P, Q):
         """Computes Jensen-Shannon Divergence between two distributions."""
-        # Add small epsilon to avoid division by zero
-        P = np.array(P) + 1e-10
-        Q = np.array(Q) + 1e-10
-        
-        # Normalize to probability distributions
-        P = P / np.sum(P)
-        Q = Q / np.sum(Q)
-        
-        return jensenshannon(P, Q)
+        return window_jsd(P, Q)
 
     def calculate_intra_student_drift(self, df, feature_col='sum_click'):
         """
         Calculates JSD between historical baseline and current behavior window.
         """
         print(f"Calculating Intra-Student Drift (JSD) for {feature_col}...")
+        self.jsd_feature_col = feature_col
         df_sorted = df.sort_values(['id_student', 'week']).copy()
         
-        jsd_scores = []
-        
-        for student, group in df_sorted.groupby('id_student'):
-            vals = group[feature_col].values
-            n = len(vals)
-            
-            student_jsd = np.zeros(n)
-            
-            # We need at least (hist_win + cur_win) weeks of data to calculate drift
-            for i in range(self.hist_win + self.cur_win - 1, n):
-                # Historical distribution (e.g. weeks 1-4)
-                hist_dist = vals[i - self.cur_win - self.hist_win + 1 : i - self.cur_win + 1]
-                # Current distribution (e.g. weeks 5-6)
-                cur_dist = vals[i - self.cur_win + 1 : i + 1]
-                
-                jsd = self.compute_jsd(hist_dist, cur_dist)
-                student_jsd[i] = jsd
-                
-            jsd_scores.extend(student_jsd)
-            
-        df_sorted['drift_jsd'] = jsd_scores
+        _, lengths = segment_students(df_sorted['id_student'].values)
+        df_sorted['drift_jsd'] = self.intra_student_drift_values(df_sorted[feature_col].values, lengths)
         return df_sorted
 
+    def intra_student_drift_values(self, values, lengths):
+        """
+        Array form of calculate_intra_student_drift: `values` is one feature in flat row order
+        with each student's rows contiguous and sorted by week, `lengths` the rows per student.
+        """
+        # All students as one (Students, Weeks) matrix; every window pair is scored in one call.
+        # We need at least (hist_win + cur_win) weeks of data to calculate drift
+        if self.n_jobs == 1 or len(lengths) < 2:
+            return _jsd_rows(values, lengths, self.hist_win, self.cur_win)
+        
+        chunks = _balanced_chunks(lengths, self.n_jobs)
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            parts = pool.map(_jsd_rows,
+                             [values[r] for _, r in chunks],
+                             [lengths[s] for s, _ in chunks],
+                             [self.hist_win] * len(chunks),
+                             [self.cur_win] * len(chunks))
+            return np.concatenate(list(parts))
+
     def build_successful_prototypes(self, df_successful, feature_cols=['sum_click']):
         """
         Builds the Y_proto reference trajectories using DTW averaging or median 
@@ -61,60 +119,124 @@ class BehavioralDriftDetector:
         print("Building successful prototype trajectories...")
         self.prototype_trajectories = df_successful.groupby('week')[feature_cols].median().reset_index()
 
-    def calculate_inter_student_drift(self, df, feature_cols=['sum_click']):
+    def prototype_fingerprint(self):
+        """sha256 of the reference prototypes (median trajectories or the PrototypeIndex entries), for cache keys."""
+        digest = hashlib.sha256()
+        if self.prototype_index is not None:
+            digest.update(repr((self.prototype_index.feature_cols, self.prototype_index.window)).encode())
+            for key in sorted(self.prototype_index.entries, key=repr):
+                digest.update(repr(key).encode())
+                for name, values in sorted(self.prototype_index.entries[key].items()):
+                    digest.update(name.encode())
+                    digest.update(np.ascontiguousarray(values).tobytes())
+        elif len(self.prototype_trajectories):
+            digest.update(repr(list(self.prototype_trajectories.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(self.prototype_trajectories, index=False).values.tobytes())
+        return digest.hexdigest()
+
+    def build_prototype_index(self, df_successful, feature_cols=['sum_click'], n_prototypes=4, window=3):
+        """
+        Builds K clustered prototypes per code_module/code_presentation instead of a single
+        median curve. Each student is then compared with its nearest prototype.
+        """
+        self.prototype_index = PrototypeIndex(n_prototypes=n_prototypes, window=window).fit(df_successful, feature_cols)
+        return self.prototype_index
+
+    def calculate_inter_student_drift(self, df, feature_cols=['sum_click'], week_stats=None):
         """
         Calculates DTW distance between a student's current sequence and the prototype.
+        week_stats (per-week 'mean'/'std' of dtw_distance) freezes the Z-score reference,
+        e.g. to the training cohort; by default it is computed from df and kept on the detector.
         """
-        if self.prototype_trajectories is None or len(self.prototype_trajectories) == 0:
-            raise ValueError("Prototypes must be built before calculating inter-student drift.")
-            
         print("Calculating Inter-Student Drift (DTW Z-Score)...")
         df_sorted = df.sort_values(['id_student', 'week']).copy()
         
-        dtw_distances = []
-        
-        for student, group in df_sorted.groupby('id_student'):
-            dtw_student = np.zeros(len(group))
-            
-            for i in range(1, len(group) + 1):
-                student_seq = group.iloc[:i][feature_cols].values
-                proto_seq = self.prototype_trajectories[self.prototype_trajectories['week'] <= group.iloc[i-1]['week']][feature_cols].values
-                
-                # If prototype is shorter or missing, skip DTW
-                if len(proto_seq) == 0 or len(student_seq) == 0:
-                    dtw_student[i-1] = 0
-                    continue
-                    
-                distance, _ = fastdtw(student_seq, proto_seq, dist=euclidean)
-                dtw_student[i-1] = distance
-                
-            dtw_distances.extend(dtw_student)
-            
-        df_sorted['dtw_distance'] = dtw_distances
+        starts, lengths = segment_students(df_sorted['id_student'].values)
+        groups = self.prototype_index.group_keys(df_sorted.iloc[starts]) if self.prototype_index is not None else None
+        weeks = df_sorted['week'].values
         
-        # Convert absolute DTW to Z-scores per week to represent 'anomaly' severity
-        df_sorted['drift_dtw_zscore'] = df_sorted.groupby('week')['dtw_distance'].transform(
-            lambda x: (x - x.mean()) / (x.std() + 1e-5)
-        ).fillna(0)
+        df_sorted['dtw_distance'] = self.inter_student_drift_values(df_sorted[feature_cols].values, weeks, lengths,
+                                                                    groups, feature_cols)
+        df_sorted['drift_dtw_zscore'] = self.dtw_zscores(df_sorted['dtw_distance'].values, weeks, week_stats)
+        self.dtw_feature_cols = list(feature_cols)
         
         return df_sorted
 
-    def calculate_unified_drift_index(self, df, alpha=0.6, beta=0.4, gamma=0.2):
+    def inter_student_drift_values(self, values, weeks, lengths, groups=None, feature_cols=['sum_click']):
         """
-        Combines JSD and DTW Z-scores into a single Unified Drift Index (UDI)
+        Array form of the DTW distances in calculate_inter_student_drift. `groups` holds the
+        code_module/code_presentation key per student and is only used by the prototype index.
         """
-        # Ensure DTW anomaly pushes upwards via Sigmoid scaling
-        # Sigmoid(Z) centers at 0.5. We shift it so a Z score of 0 contributes 0, and high Z pushes near 1.
-        def sigmoid_shift(x):
-            return 1 / (1 + np.exp(-x)) - 0.5
-            
-        dtw_component = df['drift_dtw_zscore'].apply(sigmoid_shift).clip(lower=0)
+        if self.prototype_index is None and (self.prototype_trajectories is None or len(self.prototype_trajectories) == 0):
+            raise ValueError("Prototypes must be built before calculating inter-student drift.")
         
-        df['udi'] = (alpha * df['drift_jsd']) + (beta * dtw_component)
+        # Lay every student out as a row of a (Students, Weeks, Features) matrix and read
+        # each prefix distance off a single accumulated-cost matrix per student, instead
+        # of re-running DTW from scratch for every prefix.
+        if self.prototype_index is not None:
+            prototypes = self.prototype_index
+        else:
+            prototypes = (self.prototype_trajectories['week'].values, self.prototype_trajectories[feature_cols].values)
+        if groups is None:
+            groups = [()] * len(lengths)
         
-        # Derivative/Acceleration Term (difference from last week)
-        df['udi_derivative'] = df.groupby('id_student')['udi'].diff().fillna(0)
+        if self.n_jobs == 1 or len(lengths) < 2:
+            return _dtw_rows(values, weeks, lengths, groups, prototypes, self.dtw_window)
         
-        df['udi_final'] = df['udi'] + (gamma * df['udi_derivative'].clip(lower=0))
+        # Students are independent: each worker receives the prototypes once at start-up,
+        # then only its own block of rows. Blocks are re-joined in their original order.
+        chunks = _balanced_chunks(lengths, self.n_jobs)
+        with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_worker,
+                                 initargs=(prototypes,)) as pool:
+            parts = pool.map(_dtw_rows_worker,
+                             [values[r] for _, r in chunks],
+                             [weeks[r] for _, r in chunks],
+                             [lengths[s] for s, _ in chunks],
+                             [groups[s] for s, _ in chunks],
+                             [self.dtw_window] * len(chunks))
+            return np.concatenate(list(parts))
+
+    def dtw_zscores(self, dtw_distances, weeks, week_stats=None):
+        """
+        Convert absolute DTW to Z-scores per week to represent 'anomaly' severity.
+        """
+        dtw_distances = pd.Series(dtw_distances)
+        weeks = pd.Series(weeks)
+        if week_stats is None:
+            week_stats = dtw_distances.groupby(weeks).agg(['mean', 'std'])
+        self.dtw_week_stats = week_stats
+        
+        week_mean = weeks.map(week_stats['mean'])
+        week_std = weeks.map(week_stats['std'])
+        return ((dtw_distances - week_mean) / (week_std + 1e-5)).fillna(0).values
+
+    def calculate_unified_drift_index(self, df):
+        """
+        Combines JSD and DTW Z-scores into a single Unified Drift Index (UDI)
+        """
+        # Students contiguous, each keeping its own row order (what groupby().diff() follows)
+        order = np.argsort(df['id_student'].values, kind='stable')
+        _, lengths = segment_students(df['id_student'].values[order])
+        columns = self.unified_drift_index_values(df['drift_jsd'].values[order],
+                                                  df['drift_dtw_zscore'].values[order], lengths)
+        for name, values in zip(['udi', 'udi_derivative', 'udi_final'], columns):
+            column = np.empty(len(df))
+            column[order] = values
+            df[name] = column
         
         return df
+
+    def unified_drift_index_values(self, drift_jsd, drift_dtw_zscore, lengths):
+        """
+        Array form of calculate_unified_drift_index over rows with each student's weeks
+        contiguous and in order. Returns (udi, udi_derivative, udi_final).
+        """
+        udi = (self.alpha * np.asarray(drift_jsd, dtype=np.float64)) + \
+              (self.beta * np.maximum(sigmoid_shift(np.asarray(drift_dtw_zscore, dtype=np.float64)), 0))
+        
+        # Derivative/Acceleration Term (difference from last week)
+        udi_derivative = np.zeros(len(udi))
+        udi_derivative[1:] = udi[1:] - udi[:-1]
+        udi_derivative[np.cumsum(lengths) - lengths] = 0 # first week of each student
+        
+        return udi, udi_derivative, udi + (self.gamma * np.maximum(udi_derivative, 0))
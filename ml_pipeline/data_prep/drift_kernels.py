@@ -0,0 +1,201 @@
+"""
+Array kernels backing the Behavioral Drift Framework.
+
+Every kernel works on a students x weeks layout instead of looping over
+`groupby('id_student')`, so a full presentation is processed with a handful
+of NumPy calls per week rather than one Python call per student-week.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.special import rel_entr
+
+def segment_students(student_ids):
+    """
+    Computes the group boundaries of a student id column that is already sorted
+    (all rows of a student contiguous). Returns (starts, lengths).
+    """
+    ids = np.asarray(student_ids)
+    n = len(ids)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    boundaries = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    starts = np.concatenate(([0], boundaries)).astype(np.int64)
+    lengths = np.diff(np.append(starts, n)).astype(np.int64)
+    return starts, lengths
+
+def pad_by_student(values, starts, lengths, fill=0.0):
+    """
+    Scatters flat per-row values into a (Students, Max_Weeks, ...) matrix.
+    Returns the padded matrix plus the (row, col) coordinates of every input row
+    so results can be gathered back into the original flat order.
+    """
+    values = np.asarray(values)
+    n_students = len(starts)
+    max_len = int(lengths.max()) if n_students else 0
+
+    rows = np.repeat(np.arange(n_students), lengths)
+    cols = np.arange(len(values)) - np.repeat(starts, lengths)
+
+    padded = np.full((n_students, max_len) + values.shape[1:], fill, dtype=np.float64)
+    padded[rows, cols] = values
+    return padded, rows, cols
+
+def dtw_band(i, proto_ends, window):
+    """
+    Sakoe-Chiba band (inclusive prototype columns lo, hi) of student row i (1-based). The
+    band covers |i - j| <= window and is widened to reach proto_ends, the prototype prefix
+    the row is read at, so students with gap weeks (whose prefixes end far past prototype
+    column i) stay reachable. Works for a scalar or a (Batch,) array of proto_ends; both
+    limits are non-decreasing in i, so every cell of the widened band is reachable.
+    """
+    return np.minimum(i, proto_ends) - window, np.maximum(i, proto_ends) + window
+
+def dtw_row_update(prev_row, cost_row, lo=1, hi=None):
+    """
+    Advances the DTW accumulated-cost matrix by one student timestep.
+
+    prev_row: (Batch, m+1) accumulated costs D[i-1, :], column 0 is the empty prototype prefix
+    cost_row: (Batch, m) local costs d(x_i, y_j) for j = 1..m
+    lo, hi:   inclusive band of prototype columns allowed on this row (Sakoe-Chiba), shared
+              scalars or one limit per batch row
+
+    The recurrence D[i, j] = d_ij + min(D[i-1, j], D[i-1, j-1], D[i, j-1]) is sequential
+    along j, but unrolling it gives D[i, j] = C[j] + min_{k<=j}(a[k] - C[k-1]) with
+    a[k] = min(D[i-1, k], D[i-1, k-1]) and C the running sum of local costs, so the
+    whole row is a cumsum plus a minimum.accumulate.
+    """
+    m = cost_row.shape[1]
+    hi = m if hi is None else hi
+    cur_row = np.full_like(prev_row, np.inf)
+
+    if np.ndim(lo) or np.ndim(hi):
+        # Per-row bands: entries outside a row's band cannot start a horizontal run
+        cols = np.arange(1, m + 1)
+        band = (cols >= np.reshape(lo, (-1, 1))) & (cols <= np.reshape(hi, (-1, 1)))
+        running = np.cumsum(cost_row, axis=1)
+        entry = np.where(band, np.minimum(prev_row[:, 1:], prev_row[:, :-1]), np.inf)
+        cur_row[:, 1:] = np.where(band, running + np.minimum.accumulate(entry - (running - cost_row), axis=1), np.inf)
+        return cur_row
+
+    hi = min(hi, m)
+    lo = max(lo, 1)
+    if lo > hi:
+        return cur_row
+
+    costs = cost_row[:, lo - 1:hi]
+    running = np.cumsum(costs, axis=1)
+    running_before = running - costs
+    entry = np.minimum(prev_row[:, lo:hi + 1], prev_row[:, lo - 1:hi])
+    cur_row[:, lo:hi + 1] = running + np.minimum.accumulate(entry - running_before, axis=1)
+    return cur_row
+
+def prefix_dtw(student_seqs, lengths, proto_seq, proto_ends, window=None):
+    """
+    DTW distance of every student prefix against its matching prototype prefix, in a
+    single pass over one accumulated-cost matrix per student.
+
+    student_seqs: (Students, n, Features) padded student trajectories
+    lengths:      (Students,) number of valid weeks per student
+    proto_seq:    (m, Features) shared prototype, or (Students, m, Features) per student
+    proto_ends:   (Students, n) prototype prefix length compared with each student prefix
+    window:       Sakoe-Chiba radius |i - j| <= window, widened per row by dtw_band to
+                  reach proto_ends; None runs exact DTW
+
+    Returns a (Students, n) matrix where entry [s, i] is DTW(x_s[:i+1], y[:proto_ends[s, i]]),
+    0 where the prototype prefix is empty and beyond each student's length. Every entry is
+    finite.
+    """
+    student_seqs = np.asarray(student_seqs, dtype=np.float64)
+    proto_seq = np.asarray(proto_seq, dtype=np.float64)
+    n_students, n_weeks = student_seqs.shape[:2]
+    if proto_seq.ndim == 2:
+        proto_seq = proto_seq[np.newaxis]
+    m = proto_seq.shape[1]
+
+    distances = np.zeros((n_students, n_weeks))
+    if n_students == 0 or m == 0:
+        return distances
+
+    # D[0, :] -- only the empty/empty alignment has zero cost
+    prev_row = np.full((n_students, m + 1), np.inf)
+    prev_row[:, 0] = 0.0
+
+    for i in range(1, n_weeks + 1):
+        active = lengths >= i
+        if not active.any():
+            break
+
+        # Euclidean local cost between week i and every prototype week
+        diff = student_seqs[:, i - 1, np.newaxis, :] - proto_seq
+        cost_row = np.sqrt(np.einsum('smf,smf->sm', diff, diff))
+
+        if window is None:
+            cur_row = dtw_row_update(prev_row, cost_row)
+        else:
+            lo, hi = dtw_band(i, proto_ends[:, i - 1], window)
+            cur_row = dtw_row_update(prev_row, cost_row, lo=lo, hi=hi)
+
+        ends = proto_ends[:, i - 1]
+        read = np.take_along_axis(cur_row, ends[:, np.newaxis], axis=1)[:, 0]
+        distances[:, i - 1] = np.where(active & (ends > 0), read, 0.0)
+        prev_row = cur_row
+
+    return distances
+
+def window_jsd(hist, cur):
+    """
+    Jensen-Shannon distance between historical and current engagement windows along the
+    last axis, for any number of leading (student, week) axes.
+
+    Windows of equal width (or width 1) are compared element-wise exactly like
+    scipy's `jensenshannon`. A wider historical window is pooled into as many
+    equal blocks as the current window has weeks, so e.g. weeks 1-4 are compared
+    as two 2-week blocks against weeks 5-6.
+    """
+    hist = np.asarray(hist, dtype=np.float64)
+    cur = np.asarray(cur, dtype=np.float64)
+    hist_win, cur_win = hist.shape[-1], cur.shape[-1]
+
+    if hist_win != cur_win and 1 not in (hist_win, cur_win):
+        if hist_win % cur_win != 0:
+            raise ValueError(f"historical_window ({hist_win}) must be a multiple of current_window ({cur_win}).")
+        hist = hist.reshape(hist.shape[:-1] + (cur_win, hist_win // cur_win)).sum(axis=-1)
+
+    # Add small epsilon to avoid division by zero, then normalize to probability distributions
+    P = hist + 1e-10
+    Q = cur + 1e-10
+    P = P / np.sum(P, axis=-1, keepdims=True)
+    Q = Q / np.sum(Q, axis=-1, keepdims=True)
+
+    # Same reduction as scipy's jensenshannon, clipped so rounding never yields sqrt(-0.0...)
+    M = (P + Q) / 2.0
+    js = np.sum(rel_entr(P, M), axis=-1) + np.sum(rel_entr(Q, M), axis=-1)
+    return np.sqrt(np.maximum(js, 0.0) / 2.0)
+
+def sliding_jsd(padded, lengths, hist_win, cur_win):
+    """
+    Intra-student drift for every student-week at once.
+
+    padded:  (Students, Weeks) padded feature matrix
+    lengths: (Students,) number of valid weeks per student
+
+    Builds the historical and current windows as strided views over the padded
+    matrix and returns a (Students, Weeks) matrix of JSD values. Weeks before
+    the first full (hist_win + cur_win) window, and padding, are 0.
+    """
+    padded = np.asarray(padded, dtype=np.float64)
+    n_students, n_weeks = padded.shape
+    span = hist_win + cur_win
+
+    jsd = np.zeros((n_students, n_weeks))
+    if n_weeks < span:
+        return jsd
+
+    # windows[s, k] covers weeks k .. k + span - 1, i.e. the window ending at week k + span - 1
+    windows = sliding_window_view(padded, span, axis=1)
+    values = window_jsd(windows[..., :hist_win], windows[..., hist_win:])
+
+    ends = np.arange(span - 1, n_weeks)
+    jsd[:, span - 1:] = np.where(ends[np.newaxis, :] < lengths[:, np.newaxis], values, 0.0)
+    return jsd
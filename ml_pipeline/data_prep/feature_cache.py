@@ -0,0 +1,166 @@
+import os
+import glob
+import json
+import time
+import hashlib
+
+import pandas as pd
+
+# Bump to invalidate every cached table regardless of the source hash below
+FEATURE_CODE_VERSION = "1"
+
+_DATA_PREP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def feature_code_version():
+    """FEATURE_CODE_VERSION plus a hash of the data_prep sources, so editing the feature code invalidates the cache."""
+    digest = hashlib.sha256(FEATURE_CODE_VERSION.encode())
+    for path in sorted(glob.glob(os.path.join(_DATA_PREP_DIR, '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+class FeatureCache:
+    """
+    Content-addressed on-disk cache for engineered feature tables.
+
+    A table is keyed by the hash of its inputs (file contents, DataFrames, or the keys of
+    upstream cached stages), the builder parameters and the feature code version, and is
+    stored as Parquet (or Feather). Entries are evicted least-recently-used once the cache
+    grows past `max_bytes`.
+    """
+    def __init__(self, cache_dir, max_bytes=2 * 1024**3, fmt='parquet', enabled=True):
+        if fmt not in ('parquet', 'feather'):
+            raise ValueError("fmt must be 'parquet' or 'feather'")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        self.enabled = enabled
+        self.code_version = feature_code_version()
+        self.stage_stats = {} # stage -> 'hit' / 'miss' / 'off'
+        self.stage_keys = {} # stage -> key of the table it produced in this run
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, 'index.json')
+        self._index = self._load_index()
+
+    def _load_index(self):
+        if os.path.exists(self._index_path):
+            try:
+                with open(self._index_path) as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {'entries': {}, 'files': {}}
+
+    def _save_index(self):
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp_path, self._index_path)
+
+    def _file_hash(self, path):
+        """sha256 of a file's contents, memoised on (size, mtime) so unchanged inputs are not re-read."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        memo = self._index['files'].get(path)
+        if memo and memo['size'] == stat.st_size and memo['mtime'] == stat.st_mtime:
+            return memo['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self._index['files'][path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def _input_hash(self, item):
+        if isinstance(item, pd.DataFrame):
+            digest = hashlib.sha256(pd.util.hash_pandas_object(item, index=True).values.tobytes())
+            digest.update(repr(list(item.columns)).encode())
+            return digest.hexdigest()
+        if isinstance(item, str) and item in self.stage_keys:
+            return self.stage_keys[item] # upstream stage: its key already covers its own inputs
+        return self._file_hash(item)
+
+    def key(self, stage, inputs=(), params=None):
+        payload = json.dumps({
+            'stage': stage,
+            'inputs': [self._input_hash(i) for i in inputs],
+            'params': params or {},
+            'code': self.code_version,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.{self.fmt}")
+
+    def cached(self, stage, builder, inputs=(), params=None):
+        """
+        Returns the table for `stage`, loading it from disk when an entry with the same key
+        exists and calling `builder()` (then storing its result) otherwise.
+        `inputs` may hold file paths, DataFrames or names of stages computed earlier in this run.
+        """
+        if not self.enabled:
+            self.stage_stats[stage] = 'off'
+            return builder()
+
+        key = self.key(stage, inputs, params)
+        self.stage_keys[stage] = key
+        entry = self._index['entries'].get(key)
+        if entry and os.path.exists(self._path(key)):
+            df = pd.read_parquet(self._path(key)) if self.fmt == 'parquet' else pd.read_feather(self._path(key))
+            entry['last_access'] = time.time()
+            self._save_index()
+            self.stage_stats[stage] = 'hit'
+            return df
+
+        df = builder()
+        self.stage_stats[stage] = 'miss'
+        try:
+            if self.fmt == 'parquet':
+                df.to_parquet(self._path(key), index=True)
+            else:
+                df.reset_index(drop=True).to_feather(self._path(key))
+        except Exception as e:
+            print(f"  Feature cache: could not store stage '{stage}' ({e}); continuing uncached.")
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+            return df
+
+        now = time.time()
+        self._index['entries'][key] = {'stage': stage, 'bytes': os.path.getsize(self._path(key)),
+                                       'created': now, 'last_access': now}
+        self._evict()
+        self._save_index()
+        return df
+
+    def _evict(self):
+        """Drops least-recently-used tables until the cache fits in max_bytes."""
+        entries = self._index['entries']
+        total = sum(e['bytes'] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]['bytes']
+            self._remove(key)
+
+    def _remove(self, key):
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+        self._index['entries'].pop(key, None)
+
+    def invalidate(self, stage=None):
+        """Removes every cached table, or only those of one stage."""
+        for key in [k for k, e in self._index['entries'].items() if stage is None or e['stage'] == stage]:
+            self._remove(key)
+        if stage is None:
+            self._index['files'] = {}
+        self._save_index()
+
+    def size_bytes(self):
+        return sum(e['bytes'] for e in self._index['entries'].values())
+
+    def stats_line(self):
+        stages = ' | '.join(f"{stage}: {result}" for stage, result in self.stage_stats.items()) or 'no stages'
+        return (f"Feature cache [{stages}] — {self.size_bytes() / 1e6:,.1f} MB of "
+                f"{self.max_bytes / 1e6:,.0f} MB in {self.cache_dir}")
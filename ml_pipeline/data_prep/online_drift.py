@@ -0,0 +1,123 @@
+from collections import deque
+
+import numpy as np
+
+from .behavioral_drift import sigmoid_shift
+from .drift_kernels import window_jsd, dtw_band, dtw_row_update
+
+class OnlineDriftState:
+    """
+    Online counterpart of the batch Behavioral Drift Framework for live students.
+
+    Each `update(student_id, week, values)` advances one student by one week:
+      - JSD:  the last (historical_window + current_window) weeks are kept in a ring buffer
+      - DTW:  one row of the accumulated-cost matrix against the prototype (m + 1 floats)
+      - UDI:  the previous week's UDI, for the derivative term
+    so state is O(window + m) per student and each event costs O(window + m).
+
+    The detector must have been run through `calculate_inter_student_drift` (or given
+    `dtw_week_stats`) so Z-scores use the same per-week reference as the batch path. The
+    features are taken from the detector: DTW uses the `feature_cols` of that run (else every
+    prototype column), JSD the `feature_col` of `calculate_intra_student_drift`.
+    Replaying a student's weeks in order reproduces the batch `drift_jsd`, `dtw_distance`,
+    `drift_dtw_zscore` and `udi_final` values exactly.
+    """
+    def __init__(self, detector):
+        if detector.prototype_index is not None:
+            raise ValueError("Online drift state supports the single median prototype only; "
+                             "the prototype index is only queried on the batch path.")
+        if detector.prototype_trajectories is None or len(detector.prototype_trajectories) == 0:
+            raise ValueError("Prototypes must be built before tracking online drift.")
+        if detector.dtw_week_stats is None:
+            raise ValueError("Run calculate_inter_student_drift first to fix the DTW Z-score reference.")
+
+        self.hist_win = detector.hist_win
+        self.cur_win = detector.cur_win
+        self.dtw_window = detector.dtw_window
+        self.alpha, self.beta, self.gamma = detector.alpha, detector.beta, detector.gamma # UDI weights
+
+        self.feature_cols = list(detector.dtw_feature_cols or
+                                 [c for c in detector.prototype_trajectories.columns if c != 'week'])
+        self.jsd_feature_col = detector.jsd_feature_col
+        self.proto_weeks = detector.prototype_trajectories['week'].values
+        self.proto_seq = detector.prototype_trajectories[self.feature_cols].values.astype(np.float64)[np.newaxis]
+        self.week_mean = detector.dtw_week_stats['mean'].to_dict()
+        self.week_std = detector.dtw_week_stats['std'].to_dict()
+
+        self.students = {} # student_id -> per-student state
+
+    def _new_state(self):
+        dtw_row = np.full((1, self.proto_seq.shape[1] + 1), np.inf)
+        dtw_row[0, 0] = 0.0
+        return {
+            'window': deque(maxlen=self.hist_win + self.cur_win),
+            'n_weeks': 0,
+            'last_week': None,
+            'dtw_row': dtw_row,
+            'prev_udi': None,
+        }
+
+    def _feature_values(self, values):
+        """(DTW feature vector, JSD value) from a {feature: value} mapping or, with one feature, a scalar."""
+        if not isinstance(values, dict):
+            if len(self.feature_cols) != 1 or self.jsd_feature_col != self.feature_cols[0]:
+                raise ValueError(f"Pass a mapping with {sorted(set(self.feature_cols) | {self.jsd_feature_col})}")
+            values = {self.feature_cols[0]: values}
+        missing = [c for c in self.feature_cols + [self.jsd_feature_col] if c not in values]
+        if missing:
+            raise ValueError(f"Missing drift features {missing}")
+        return np.array([float(values[c]) for c in self.feature_cols]), float(values[self.jsd_feature_col])
+
+    def update(self, student_id, week, values):
+        """
+        Ingests one finished week for a student and returns the drift features for it.
+        `values` maps each drift feature to this week's value; a scalar is accepted when the
+        detector tracks a single feature (e.g. sum_click). Weeks must arrive in increasing
+        order per student.
+        """
+        features, jsd_value = self._feature_values(values)
+        state = self.students.get(student_id)
+        if state is None:
+            state = self.students[student_id] = self._new_state()
+        if state['last_week'] is not None and week <= state['last_week']:
+            raise ValueError(f"Week {week} for student {student_id} arrived after week {state['last_week']}.")
+
+        state['window'].append(jsd_value)
+        state['n_weeks'] += 1
+        state['last_week'] = week
+        i = state['n_weeks']
+
+        # 1. Intra-student JSD over the buffered historical/current windows
+        if i >= self.hist_win + self.cur_win:
+            buffered = np.array(state['window'])
+            drift_jsd = float(window_jsd(buffered[:self.hist_win], buffered[self.hist_win:]))
+        else:
+            drift_jsd = 0.0
+
+        # 2. Extend the DTW accumulated-cost row by this week, read the prefix distance off it
+        diff = features[np.newaxis, np.newaxis] - self.proto_seq
+        cost_row = np.sqrt(np.einsum('smf,smf->sm', diff, diff))
+        proto_end = int(np.searchsorted(self.proto_weeks, week, side='right'))
+        if self.dtw_window is None:
+            state['dtw_row'] = dtw_row_update(state['dtw_row'], cost_row)
+        else:
+            lo, hi = dtw_band(i, proto_end, self.dtw_window)
+            state['dtw_row'] = dtw_row_update(state['dtw_row'], cost_row, lo=lo, hi=hi)
+        dtw_distance = float(state['dtw_row'][0, proto_end]) if proto_end > 0 else 0.0
+
+        # 3. Z-score against the per-week reference, then the Unified Drift Index
+        zscore = (dtw_distance - self.week_mean.get(week, np.nan)) / (self.week_std.get(week, np.nan) + 1e-5)
+        if np.isnan(zscore):
+            zscore = 0.0
+        udi = (self.alpha * drift_jsd) + (self.beta * max(sigmoid_shift(zscore), 0))
+        udi_derivative = 0.0 if state['prev_udi'] is None else udi - state['prev_udi']
+        state['prev_udi'] = udi
+
+        return {
+            'drift_jsd': drift_jsd,
+            'dtw_distance': dtw_distance,
+            'drift_dtw_zscore': zscore,
+            'udi': udi,
+            'udi_derivative': udi_derivative,
+            'udi_final': udi + (self.gamma * max(udi_derivative, 0)),
+        }
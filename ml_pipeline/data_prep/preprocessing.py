@@ -1,11 +1,16 @@
+import os
+import tracemalloc
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 
-def load_and_merge_data(ts_path, info_path):
+def load_and_merge_data(ts_path, info_path, chunksize=None):
     """
     Loads time-series behavioral data and merges it with static demographic student information.
+    With chunksize, ts_path is a raw studentVle-style clickstream (a `date` column in days): it is
+    streamed through the weekly fold of `load_weekly_clickstream`, so only one raw chunk and the
+    weekly per-student sums are held in memory, and only the weekly table is merged.
     """
-    ts_df = pd.read_csv(ts_path)
     info_df = pd.read_csv(info_path)
     
     # Merge on id_student
@@ -13,8 +18,18 @@ def load_and_merge_data(ts_path, info_path):
     # For simplicity, we keep the first occurrence of demographics per student.
     info_df_unique = info_df.drop_duplicates(subset=['id_student'], keep='first')
     
-    merged_df = pd.merge(ts_df, info_df_unique, on='id_student', how='left')
-    return merged_df
+    if chunksize is None:
+        ts_df = pd.read_csv(ts_path)
+        return pd.merge(ts_df, info_df_unique, on='id_student', how='left')
+    
+    if 'date' not in pd.read_csv(ts_path, nrows=0).columns:
+        raise ValueError(f"chunksize streams a raw clickstream with a 'date' column; {ts_path} has none "
+                         "(weekly tables are loaded without chunksize)")
+    from oulad_augmentation.preprocessing.time_series import load_weekly_clickstream
+    weekly = load_weekly_clickstream(ts_path, chunksize=chunksize)
+    # The weekly table keeps each enrolment's course keys; demographics come from studentInfo
+    info_cols = [c for c in info_df_unique.columns if c not in ('code_module', 'code_presentation')]
+    return pd.merge(weekly, info_df_unique[info_cols], on='id_student', how='left')
 
 def impute_missing_values(df):
     """
@@ -28,6 +43,10 @@ def impute_missing_values(df):
     
     # Forward fill temporal data if needed (though our previous pipeline handles sparse weeks natively)
     df_clean.fillna(method='ffill', inplace=True)
+    # Categorical columns (chunked loading) only accept known values: register the fallback first
+    for col in df_clean.select_dtypes('category').columns:
+        if df_clean[col].isna().any() and 0 not in df_clean[col].cat.categories:
+            df_clean[col] = df_clean[col].cat.add_categories([0])
     df_clean.fillna(0, inplace=True) # Final fallback for starting NAs
     
     return df_clean
@@ -40,50 +59,134 @@ def encode_categorical(df, cat_cols):
     return df_encoded
 
 from .behavioral_drift import BehavioralDriftDetector
+from .drift_kernels import segment_students, pad_by_student
+from .prototype_index import PrototypeIndex
 
-def construct_tabular_features(df, n_lags=3):
+# Per-student features flattened into `<feature>_lag_<k>` columns for the tabular models
+FEATURES_TO_LAG = [
+    'sum_click', 'drift_idx', 'volatility_idx', 'synthesized_hesitation_sec',
+    'drift_jsd', 'drift_dtw_zscore', 'udi_final'
+]
+
+# Columns the drift stage reads: its cache key hashes only these
+DRIFT_INPUT_COLS = ['id_student', 'week', 'sum_click', 'code_module', 'code_presentation']
+
+def _lag_within_student(values, positions, lag):
+    """values shifted down by `lag` rows without crossing student boundaries, NaN/missing -> 0."""
+    lagged = np.zeros_like(values)
+    lagged[lag:] = values[:-lag]
+    lagged[positions < lag] = 0
+    return np.where(np.isnan(lagged), 0, lagged)
+
+def construct_tabular_features(df, n_lags=3, n_jobs=1, n_prototypes=1, prototype_index_path=None,
+                               dtype=np.float64, report_memory=False, cache=None):
     """
     Transforms sequence data into flattened tabular format suitable for XGBoost and Survival models.
     Also injects Advanced Behavioral Drift metrics (JSD/DTW).
+    n_jobs shards the drift computations across a process pool (-1 uses every core).
+    n_prototypes > 1 compares students with the nearest of K clustered prototypes per presentation;
+    prototype_index_path loads that index if it exists, otherwise builds and saves it there.
+    dtype=np.float32 halves the footprint of the engineered columns; report_memory prints the
+    peak memory allocated while building them.
+    cache (a FeatureCache) returns the stored table when the input frame, parameters and
+    feature code are unchanged, and stores the freshly built one otherwise. On a miss, the
+    JSD/DTW/UDI columns are a stage of their own ('drift'), keyed on the clickstream, the
+    detector parameters and a fingerprint of the prototypes, so changing only n_lags or dtype
+    does not recompute the DTW distances.
+    
+    The frame is sorted once and student boundaries are computed once; every cross, drift
+    and lag column is then produced with array operations over the flat columns.
     """
+    if cache is not None:
+        params = {'n_lags': n_lags, 'n_prototypes': n_prototypes, 'dtype': np.dtype(dtype).name,
+                  **_drift_params(BehavioralDriftDetector(historical_window=4, current_window=2))}
+        inputs = [df] + ([prototype_index_path] if prototype_index_path and os.path.exists(prototype_index_path) else [])
+        return cache.cached('tabular_features',
+                            lambda: _build_tabular_features(df, n_lags, n_jobs, n_prototypes, prototype_index_path,
+                                                            dtype, report_memory, cache),
+                            inputs=inputs, params=params)
+    return _build_tabular_features(df, n_lags, n_jobs, n_prototypes, prototype_index_path, dtype, report_memory)
+
+def _drift_params(drift_detector):
+    return {'historical_window': drift_detector.hist_win, 'current_window': drift_detector.cur_win,
+            'dtw_window': drift_detector.dtw_window, 'alpha': drift_detector.alpha,
+            'beta': drift_detector.beta, 'gamma': drift_detector.gamma}
+
+def _build_tabular_features(df, n_lags, n_jobs, n_prototypes, prototype_index_path, dtype, report_memory, cache=None):
+    drift_detector = BehavioralDriftDetector(historical_window=4, current_window=2, n_jobs=n_jobs)
     print("Constructing tabular cross-features and lag variables...")
+    if report_memory:
+        tracemalloc.start()
     
-    # Create temporal cross-features
-    global_avg_clicks = df.groupby('week')['sum_click'].transform('mean')
-    df['cumulative_engagement_rate'] = df.groupby('id_student')['sum_click'].cumsum() / df.groupby(['id_student', 'week'])['week'].transform(lambda w: (w+1) * global_avg_clicks.mean() + 1e-5)
+    df_sorted = df.sort_values(['id_student', 'week'], kind='stable')
+    starts, lengths = segment_students(df_sorted['id_student'].values)
+    positions = np.arange(len(df_sorted)) - np.repeat(starts, lengths) # week index within each student
     
-    df['volatilty_hesitation_ratio'] = df['volatility_idx'] / (df['synthesized_hesitation_sec'] + 1e-5)
+    week = df_sorted['week'].values.astype(np.float64)
+    sum_click = df_sorted['sum_click'].values.astype(np.float64)
+    features = {}
     
-    # === INTEGRATE BEHAVIORAL DRIFT FRAMEWORK ===
-    drift_detector = BehavioralDriftDetector(historical_window=4, current_window=2)
-    # 1. Intra-student
-    df = drift_detector.calculate_intra_student_drift(df, feature_col='sum_click')
+    # Create temporal cross-features
+    # Cumulative clicks relative to an average student's clicks by this week: the mean of the
+    # per-week cohort averages over all rows is simply the global mean of sum_click.
+    padded_clicks, rows, cols = pad_by_student(sum_click, starts, lengths)
+    cumulative_clicks = np.cumsum(padded_clicks, axis=1)[rows, cols]
+    features['cumulative_engagement_rate'] = cumulative_clicks / ((week + 1) * sum_click.mean() + 1e-5)
     
-    # 2. Inter-student (Assuming students who didn't collapse are 'successful' prototypes for this simplified run)
-    df_successful = df[df['is_collapsed'] == False].copy()
-    drift_detector.build_successful_prototypes(df_successful)
-    df = drift_detector.calculate_inter_student_drift(df, feature_cols=['sum_click'])
+    features['volatilty_hesitation_ratio'] = df_sorted['volatility_idx'].values / (df_sorted['synthesized_hesitation_sec'].values + 1e-5)
     
-    # 3. Unified Index
-    df = drift_detector.calculate_unified_drift_index(df)
+    # === INTEGRATE BEHAVIORAL DRIFT FRAMEWORK ===
+    # Inter-student prototypes (Assuming students who didn't collapse are 'successful' prototypes for this simplified run)
+    if prototype_index_path and os.path.exists(prototype_index_path):
+        drift_detector.prototype_index = PrototypeIndex.load(prototype_index_path)
+    elif n_prototypes > 1 or prototype_index_path:
+        df_successful = df_sorted[df_sorted['is_collapsed'] == False]
+        drift_detector.build_prototype_index(df_successful, n_prototypes=n_prototypes)
+        if prototype_index_path:
+            drift_detector.prototype_index.save(prototype_index_path)
+    else:
+        df_successful = df_sorted[df_sorted['is_collapsed'] == False]
+        drift_detector.build_successful_prototypes(df_successful)
+    
+    def build_drift():
+        drift = {}
+        # 1. Intra-student
+        print("Calculating Intra-Student Drift (JSD) for sum_click...")
+        drift['drift_jsd'] = drift_detector.intra_student_drift_values(sum_click, lengths)
+        
+        # 2. Inter-student
+        print("Calculating Inter-Student Drift (DTW Z-Score)...")
+        groups = drift_detector.prototype_index.group_keys(df_sorted.iloc[starts]) if drift_detector.prototype_index is not None else None
+        drift['dtw_distance'] = drift_detector.inter_student_drift_values(sum_click[:, np.newaxis], df_sorted['week'].values,
+                                                                         lengths, groups)
+        drift['drift_dtw_zscore'] = drift_detector.dtw_zscores(drift['dtw_distance'], df_sorted['week'].values)
+        
+        # 3. Unified Index (the detector's alpha/beta/gamma weights)
+        drift['udi'], drift['udi_derivative'], drift['udi_final'] = drift_detector.unified_drift_index_values(
+            drift['drift_jsd'], drift['drift_dtw_zscore'], lengths)
+        return pd.DataFrame(drift, index=df_sorted.index)
+    
+    if cache is not None:
+        drift_inputs = [df_sorted[[c for c in DRIFT_INPUT_COLS if c in df_sorted.columns]]]
+        drift_params = {**_drift_params(drift_detector), 'prototypes': drift_detector.prototype_fingerprint()}
+        drift_table = cache.cached('drift', build_drift, inputs=drift_inputs, params=drift_params)
+    else:
+        drift_table = build_drift()
+    features.update({name: drift_table[name].values for name in drift_table.columns})
     
     # Flatten the last N weeks of behavioral metrics for Tabular models
-    tabular_df = df.copy()
-    
-    # Adding the new drift features to the flattening list
-    features_to_lag = [
-        'sum_click', 'drift_idx', 'volatility_idx', 'synthesized_hesitation_sec',
-        'drift_jsd', 'drift_dtw_zscore', 'udi_final'
-    ]
-    
-    for feature in features_to_lag:
+    for feature in FEATURES_TO_LAG:
+        values = features[feature] if feature in features else df_sorted[feature].values.astype(np.float64)
         for lag in range(1, n_lags + 1):
-            tabular_df[f'{feature}_lag_{lag}'] = tabular_df.groupby('id_student')[feature].shift(lag).fillna(0)
+            features[f'{feature}_lag_{lag}'] = _lag_within_student(values, positions, lag)
     
-    return tabular_df
+    engineered = pd.DataFrame({name: col.astype(dtype, copy=False) for name, col in features.items()},
+                              index=df_sorted.index)
+    tabular_df = pd.concat([df_sorted.drop(columns=[c for c in features if c in df_sorted.columns]), engineered], axis=1)
     
-    for feature in features_to_lag:
-        for lag in range(1, n_lags + 1):
-            tabular_df[f'{feature}_lag_{lag}'] = tabular_df.groupby('id_student')[feature].shift(lag).fillna(0)
+    if report_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  Peak memory while building features: {peak / 1e6:,.1f} MB")
     
     return tabular_df
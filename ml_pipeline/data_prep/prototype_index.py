@@ -0,0 +1,222 @@
+import warnings
+
+import joblib
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .drift_kernels import segment_students, pad_by_student, prefix_dtw
+
+class PrototypeIndex:
+    """
+    Holds K successful-student prototype trajectories per code_module/code_presentation
+    and matches every student prefix to its nearest prototype under banded DTW.
+
+    LB_Kim (first/last week) and LB_Keogh (distance to the prototype's Sakoe-Chiba
+    envelope) are evaluated for every prefix/prototype pair first; a full DTW is only run
+    while a candidate's lower bound is below the best distance found so far for one of the
+    student's prefixes.
+    """
+    def __init__(self, n_prototypes=4, window=3, group_cols=('code_module', 'code_presentation'), random_state=42):
+        self.n_prototypes = n_prototypes
+        self.window = window # Sakoe-Chiba radius used for matching and for the envelopes
+        self.group_cols = tuple(group_cols)
+        self.random_state = random_state
+        self.feature_cols = None
+        self.entries = {} # group key -> {'weeks', 'prototypes', 'upper', 'lower'}
+        self.last_query_stats = {}
+
+    def group_keys(self, df):
+        """Per-row group key; () when the frame carries no module/presentation columns."""
+        cols = [c for c in self.group_cols if c in df.columns]
+        if not cols:
+            return [()] * len(df)
+        return list(zip(*(df[c].astype(str).values for c in cols)))
+
+    def fit(self, df_successful, feature_cols=['sum_click']):
+        """
+        Clusters successful trajectories per group with K-Means and keeps the weekly median
+        of each cluster as a prototype. A global entry (key ()) is always fitted as a
+        fallback for groups unseen at training time.
+        """
+        print(f"Building prototype index (K={self.n_prototypes}) from successful trajectories...")
+        self.feature_cols = list(feature_cols)
+        self.entries = {}
+
+        cols = [c for c in self.group_cols if c in df_successful.columns]
+        df = df_successful[cols + ['id_student', 'week'] + self.feature_cols].copy()
+        df[cols] = df[cols].astype(str)
+        df['_unit'] = df.groupby(cols + ['id_student'], sort=False).ngroup()
+
+        self.entries[()] = self._fit_group(df)
+        if cols:
+            for key, group in df.groupby(cols, sort=True):
+                self.entries[tuple(key)] = self._fit_group(group)
+
+        return self
+
+    def _fit_group(self, group):
+        from sklearn.cluster import KMeans
+
+        group = group.sort_values(['_unit', 'week'])
+        weeks = np.unique(group['week'].values)
+
+        # (Students, Weeks, Features) with NaN where a student has no record for a week
+        starts, lengths = segment_students(group['_unit'].values)
+        trajectories = np.full((len(starts), len(weeks), len(self.feature_cols)), np.nan)
+        rows = np.repeat(np.arange(len(starts)), lengths)
+        trajectories[rows, np.searchsorted(weeks, group['week'].values)] = group[self.feature_cols].values
+
+        k = min(self.n_prototypes, len(starts))
+        if k > 1:
+            flat = np.nan_to_num(trajectories).reshape(len(starts), -1)
+            labels = KMeans(n_clusters=k, n_init=10, random_state=self.random_state).fit_predict(flat)
+        else:
+            labels = np.zeros(len(starts), dtype=np.int64)
+
+        # Weekly median of each cluster, over the students observed that week
+        overall = np.nan_to_num(np.nanmedian(trajectories, axis=0))
+        prototypes = np.empty((k, len(weeks), len(self.feature_cols)))
+        for c in range(k):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning) # weeks no member of the cluster reached
+                medians = np.nanmedian(trajectories[labels == c], axis=0)
+            prototypes[c] = np.where(np.isnan(medians), overall, medians)
+
+        upper, lower = self._envelopes(prototypes)
+        return {'weeks': weeks, 'prototypes': prototypes, 'upper': upper, 'lower': lower}
+
+    def _envelopes(self, prototypes):
+        """LB_Keogh upper/lower envelopes: max/min of each prototype over [j - r, j + r]."""
+        r = self.window
+        pad = ((0, 0), (r, r), (0, 0))
+        upper = sliding_window_view(np.pad(prototypes, pad, constant_values=-np.inf), 2 * r + 1, axis=1).max(axis=-1)
+        lower = sliding_window_view(np.pad(prototypes, pad, constant_values=np.inf), 2 * r + 1, axis=1).min(axis=-1)
+        return upper, lower
+
+    def _lower_bounds(self, entry, student_seqs, lengths, proto_ends, window):
+        """
+        Lower bound on the DTW distance of every prefix against every prototype ->
+        (Students, K, Weeks), 0 beyond each student's length and where the prototype prefix is
+        empty. LB_Kim holds for any band; LB_Keogh only while the band lies inside the
+        envelope radius, so it is skipped when window is None or wider than self.window.
+        """
+        prototypes, upper, lower = entry['prototypes'], entry['upper'], entry['lower']
+        n_students, n_weeks = student_seqs.shape[:2]
+        m = prototypes.shape[1]
+        positions = np.arange(n_weeks)
+        valid = (positions[np.newaxis, :] < lengths[:, np.newaxis]) & (proto_ends > 0)
+
+        # LB_Kim: every warping path contains the first cell and the prefix's last cell
+        first = np.linalg.norm(student_seqs[:, np.newaxis, 0] - prototypes[np.newaxis, :, 0], axis=-1)
+        last_y = prototypes[:, np.maximum(proto_ends - 1, 0)].transpose(1, 0, 2, 3)
+        last = np.linalg.norm(student_seqs[:, np.newaxis] - last_y, axis=-1)
+        single_cell = ((positions == 0) & (proto_ends == 1))[:, np.newaxis]
+        bounds = first[..., np.newaxis] + np.where(single_cell, 0.0, last)
+
+        # LB_Keogh: a row whose band is |i - j| <= window is matched inside the envelope
+        # around prototype week i; the excess over those rows accumulates along the prefix
+        if window is not None and window <= self.window:
+            idx = np.minimum(positions, m - 1)
+            above = np.maximum(student_seqs[:, np.newaxis] - upper[np.newaxis, :, idx], 0)
+            below = np.maximum(lower[np.newaxis, :, idx] - student_seqs[:, np.newaxis], 0)
+            excess = np.linalg.norm(above + below, axis=-1)
+            centred = valid & (proto_ends == positions + 1)
+            bounds = np.maximum(bounds, np.cumsum(excess * centred[:, np.newaxis, :], axis=-1))
+
+        return np.where(valid[:, np.newaxis, :], bounds, 0.0)
+
+    def _match_group(self, entry, student_seqs, lengths, proto_ends, window):
+        """
+        Distance of every prefix of one group's students to its nearest prototype, chosen per
+        prefix from the weeks observed so far. Returns the (Students, Weeks) distances and the
+        number of DTW rows computed.
+        """
+        prototypes = entry['prototypes']
+        n_students = len(lengths)
+        students = np.arange(n_students)
+
+        bounds = self._lower_bounds(entry, student_seqs, lengths, proto_ends, window)
+        # Candidates in order of the bound on the full sequence, the prefix that prunes most
+        order = np.argsort(bounds[students, :, lengths - 1], axis=1, kind='stable')
+
+        valid = (np.arange(student_seqs.shape[1])[np.newaxis, :] < lengths[:, np.newaxis]) & (proto_ends > 0)
+        best_rows = np.where(valid, np.inf, 0.0)
+        dtw_runs = 0
+
+        for rank in range(prototypes.shape[0]):
+            candidate = order[:, rank]
+            # DTW only runs up to the last prefix this candidate could still improve
+            open_rows = bounds[students, candidate] < best_rows
+            reach = np.where(open_rows.any(axis=1), open_rows.shape[1] - np.argmax(open_rows[:, ::-1], axis=1), 0)
+            todo = np.flatnonzero(reach)
+            if len(todo) == 0:
+                break
+
+            rows = prefix_dtw(student_seqs[todo], reach[todo], prototypes[candidate[todo]],
+                              proto_ends[todo], window=window)
+            reached = np.arange(rows.shape[1])[np.newaxis, :] < reach[todo, np.newaxis]
+            best_rows[todo] = np.where(reached, np.minimum(best_rows[todo], rows), best_rows[todo])
+            dtw_runs += int(reach.sum())
+
+        return best_rows, dtw_runs
+
+    def prefix_distances(self, values, weeks, lengths, groups, window=None):
+        """
+        DTW distance of every student prefix against the prototype nearest to that prefix, so a
+        week's value never depends on the student's later weeks.
+
+        values, weeks: flat per-row arrays, students contiguous and sorted by week
+        lengths:       rows per student
+        groups:        group key per student
+        window:        Sakoe-Chiba radius of the reported distances (None = exact)
+        """
+        if not self.entries:
+            raise ValueError("PrototypeIndex must be fitted before querying.")
+
+        values = np.asarray(values, dtype=np.float64).reshape(len(weeks), -1)
+        keys = [g if g in self.entries else () for g in groups]
+        key_order = list(dict.fromkeys(keys))
+        code_of = {k: c for c, k in enumerate(key_order)}
+        codes = np.array([code_of[k] for k in keys], dtype=np.int64)
+        distances = np.zeros(len(weeks))
+        total_runs, total_pairs = 0, 0
+
+        for code, key in enumerate(key_order):
+            entry = self.entries[key]
+            members = codes == code
+            member_rows = np.flatnonzero(np.repeat(members, lengths))
+            member_lengths = lengths[members]
+            member_starts = np.concatenate(([0], np.cumsum(member_lengths)[:-1]))
+
+            student_seqs, rows, cols = pad_by_student(values[member_rows], member_starts, member_lengths)
+            proto_ends = np.zeros(student_seqs.shape[:2], dtype=np.int64)
+            proto_ends[rows, cols] = np.searchsorted(entry['weeks'], weeks[member_rows], side='right')
+
+            matched, dtw_runs = self._match_group(entry, student_seqs, member_lengths, proto_ends, window)
+            total_runs += dtw_runs
+            total_pairs += int(member_lengths.sum()) * entry['prototypes'].shape[0]
+            distances[member_rows] = matched[rows, cols]
+
+        pruned = 1.0 - total_runs / total_pairs if total_pairs else 0.0
+        self.last_query_stats = {'dtw_rows': total_runs, 'candidate_rows': total_pairs, 'pruned_fraction': pruned}
+        print(f"  Prototype index: {total_runs:,} DTW rows for {total_pairs:,} prefix candidates ({pruned:.1%} pruned)")
+        return distances
+
+    def save(self, path):
+        """Persists the index so the training pipeline and the serving layer share it."""
+        joblib.dump({
+            'n_prototypes': self.n_prototypes,
+            'window': self.window,
+            'group_cols': self.group_cols,
+            'random_state': self.random_state,
+            'feature_cols': self.feature_cols,
+            'entries': self.entries,
+        }, path)
+
+    @classmethod
+    def load(cls, path):
+        state = joblib.load(path)
+        index = cls(state['n_prototypes'], state['window'], state['group_cols'], state['random_state'])
+        index.feature_cols = state['feature_cols']
+        index.entries = state['entries']
+        return index
@@ -1,51 +1,111 @@
 import numpy as np
 import pandas as pd
 
-def construct_lstm_tensors(df, feature_cols, sequence_length=10):
+from .drift_kernels import segment_students
+
+def _student_layout(df):
+    """
+    Chronological order without copying the frame: only the id/week keys are sorted.
+    Returns (order, starts, lengths, student_ids) where order[starts[i]:starts[i] + lengths[i]]
+    are the row positions of student i, week ascending.
+    """
+    keys = pd.DataFrame({'id_student': df['id_student'].values, 'week': df['week'].values})
+    order = keys.sort_values(['id_student', 'week'], kind='stable').index.values
+    sorted_ids = keys['id_student'].values[order]
+    starts, lengths = segment_students(sorted_ids)
+    return order, starts, lengths, sorted_ids[starts]
+
+def _student_targets_and_statics(df, order, starts, lengths, feature_cols, static_cols, label_col):
+    """Targets and static features, read from the first/last row of each student."""
+    first_rows = order[starts]
+    last_rows = order[starts + lengths - 1]
+    if label_col is not None:
+        y_target = df[label_col].values[last_rows].astype(np.int32)
+    elif 'dropout_week' in df.columns:
+        y_target = df['dropout_week'].notna().values[first_rows].astype(np.int32)
+    else:
+        y_target = np.zeros(len(starts), dtype=np.int32)
+
+    # Also collect static features for the embedding layer alongside LSTM
+    # (Assuming static features don't change over the sequence)
+    if static_cols is None:
+        static_cols = [c for c in df.columns if c not in feature_cols and c != label_col
+                       and c not in ['id_student', 'week', 'dropout_week', 'is_collapsed']]
+    static_tensor = np.empty((len(starts), len(static_cols)), dtype=np.float32)
+    for j, col in enumerate(static_cols):
+        static_tensor[:, j] = df[col].values[last_rows]
+    return y_target, static_tensor
+
+def construct_lstm_tensors(df, feature_cols, sequence_length=10, static_cols=None, label_col=None,
+                           memmap_path=None, dtype=np.float32):
     """
     Transforms flat weekly time-series data into 3D tensors: (Students, Time_Steps, Features)
-    Expected input DataFrame should be sorted by id_student and then week.
+    Each student's last `sequence_length` weeks are kept; shorter histories are zero-padded at the start.
+
+    static_cols: per-student columns for the embedding layer, taken from the student's last row
+                 (default: every column that is not a sequence feature, id, week or outcome)
+    label_col:   target column read from the student's last row; without it the target is whether
+                 the student has a recorded dropout week
+    memmap_path: writes the sequence tensor to this .npy file as a memory map (reopen with
+                 np.load(path, mmap_mode='c')) so cohorts larger than RAM can feed a Dataset
+
+    Student offsets are computed once and every row is scattered into its (student, step)
+    slot with fancy indexing, one feature column at a time.
     """
     print(f"Constructing LSTM tensors with sequence length {sequence_length}...")
-    
-    # Ensure chronological sort
-    df_sorted = df.sort_values(['id_student', 'week']).copy()
-    
-    student_ids = df_sorted['id_student'].unique()
-    num_students = len(student_ids)
+
+    order, starts, lengths, student_ids = _student_layout(df)
+    num_students = len(starts)
     num_features = len(feature_cols)
-    
+
     # Pre-allocate tensor: [Samples, Sequence_Length, Features]
-    # If a student has fewer than sequence_length weeks, padded with zeros
-    X_tensor = np.zeros((num_students, sequence_length, num_features), dtype=np.float32)
-    y_target = np.zeros(num_students, dtype=np.int32)
-    
-    for idx, (student, group) in enumerate(df_sorted.groupby('id_student')):
-        group_len = len(group)
-        
-        # Take up to the last `sequence_length` weeks
-        if group_len >= sequence_length:
-            window = group.iloc[-sequence_length:][feature_cols].values
-        else:
-            # Pad sequences that are too short (padding at the start)
-            window = np.zeros((sequence_length, num_features))
-            window[-group_len:] = group[feature_cols].values
-            
-        X_tensor[idx] = window
-        
-        # Determine the target for the student: did they drop out this semester?
-        # Target based on if they have a recorded dropout week
-        if 'dropout_week' in group.columns and not pd.isna(group['dropout_week'].iloc[0]):
-            y_target[idx] = 1
-        else:
-            y_target[idx] = 0
-            
-    # Also collect static features for the embedding layer alongside LSTM
-    # (Assuming static features don't change over the sequence)
-    static_cols = [c for c in df.columns if c not in feature_cols and c not in ['id_student', 'week', 'dropout_week', 'is_collapsed']]
-    
-    # Get one row per student to extract static features
-    static_features_df = df_sorted.drop_duplicates(subset=['id_student'], keep='last')[static_cols]
-    static_tensor = static_features_df.values.astype(np.float32)
-            
+    shape = (num_students, sequence_length, num_features)
+    if memmap_path is not None:
+        X_tensor = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=dtype, shape=shape)
+        X_tensor[:] = 0
+    else:
+        X_tensor = np.zeros(shape, dtype=dtype)
+
+    # Keep the last `sequence_length` rows of each student, right-aligned in the window
+    positions = np.arange(len(order)) - np.repeat(starts, lengths)
+    offsets = np.repeat(sequence_length - lengths, lengths) # step of each row once right-aligned
+    steps = positions + offsets
+    kept = steps >= 0
+    rows = np.repeat(np.arange(num_students), lengths)[kept]
+    steps = steps[kept]
+    source = order[kept]
+
+    for j, col in enumerate(feature_cols):
+        X_tensor[rows, steps, j] = df[col].values[source]
+    if memmap_path is not None:
+        X_tensor.flush()
+
+    y_target, static_tensor = _student_targets_and_statics(df, order, starts, lengths, feature_cols,
+                                                           static_cols, label_col)
+
     return X_tensor, static_tensor, y_target, student_ids
+
+def construct_ragged_sequences(df, feature_cols, max_length=None, static_cols=None, label_col=None, dtype=np.float32):
+    """
+    Variable-length counterpart of construct_lstm_tensors: every student keeps only their own
+    weeks (the last `max_length` of them when given), with no padding.
+
+    Returns (values, offsets, static_tensor, y_target, student_ids) where values is the flat
+    (Rows, Features) array and student i's sequence is values[offsets[i]:offsets[i + 1]].
+    """
+    print(f"Constructing ragged LSTM sequences (max length {max_length})...")
+    order, starts, lengths, student_ids = _student_layout(df)
+
+    positions = np.arange(len(order)) - np.repeat(starts, lengths)
+    kept_lengths = lengths if max_length is None else np.minimum(lengths, max_length)
+    kept = positions >= np.repeat(lengths - kept_lengths, lengths)
+    source = order[kept]
+
+    values = np.empty((len(source), len(feature_cols)), dtype=dtype)
+    for j, col in enumerate(feature_cols):
+        values[:, j] = df[col].values[source]
+    offsets = np.concatenate(([0], np.cumsum(kept_lengths))).astype(np.int64)
+
+    y_target, static_tensor = _student_targets_and_statics(df, order, starts, lengths, feature_cols,
+                                                           static_cols, label_col)
+    return values, offsets, static_tensor, y_target, student_ids
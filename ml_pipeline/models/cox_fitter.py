@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+class NativeCoxTimeVaryingFitter:
+    """
+    Newton-Raphson Cox proportional hazards fitter for start/stop (time-varying) data.
+
+    Mirrors lifelines' CoxTimeVaryingFitter: covariates are standardized over the rows,
+    ties use Efron's method and the L2 penalty is n_rows * penalizer * 0.5 * ||beta_std||^2,
+    so coefficients agree with lifelines for the same penalizer.
+
+    Risk-set sums are never rebuilt per event time. Every row is at risk for the event
+    times in [a_i, b_i) (indices into the sorted unique event times), so its contribution
+    is added at a_i and removed at b_i of a difference array whose cumulative sum gives
+    every risk set at once. Row-level work runs in the dtype of the input (float32 or
+    float64); per-event-time accumulators are float64.
+    """
+    def __init__(self, penalizer=0.1, tol=1e-9, max_iter=50):
+        self.penalizer = penalizer
+        self.tol = tol
+        self.max_iter = max_iter
+        self.params_ = None
+        self.log_likelihood_ = None
+        self.covariates_ = None
+        self.norm_mean_ = None
+        self.norm_std_ = None
+        self.baseline_cumulative_hazard_ = None
+
+    def fit(self, df, id_col='id_student', event_col='event_occurred', start_col='start_time', stop_col='stop_time',
+            dtype=np.float64, show_progress=False):
+        """DataFrame entry point with lifelines' column arguments; every other column is a covariate."""
+        covariates = [c for c in df.columns if c not in (id_col, event_col, start_col, stop_col)]
+        self.fit_arrays(df[covariates].values.astype(dtype), df[start_col].values, df[stop_col].values,
+                        df[event_col].values, covariates, show_progress=show_progress)
+        return self
+
+    def fit_arrays(self, X, start, stop, event, covariates=None, show_progress=False):
+        X = np.asarray(X)
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+        start = np.asarray(start, dtype=np.float64)
+        stop = np.asarray(stop, dtype=np.float64)
+        event = np.asarray(event).astype(bool)
+        n, d = X.shape
+        if np.any(start >= stop):
+            raise ValueError("Every interval must have start < stop.")
+        if not event.any():
+            raise ValueError("At least one event is required to fit a Cox model.")
+
+        self.covariates_ = list(covariates) if covariates is not None else [f"x{j}" for j in range(d)]
+        self.norm_mean_ = X.mean(0, dtype=np.float64)
+        self.norm_std_ = X.std(0, ddof=1, dtype=np.float64)
+        if np.any(self.norm_std_ == 0):
+            raise ValueError("Constant covariates cannot be standardized: "
+                             f"{[c for c, s in zip(self.covariates_, self.norm_std_) if s == 0]}")
+        Z = ((X - self.norm_mean_.astype(X.dtype)) / self.norm_std_.astype(X.dtype)).astype(X.dtype, copy=False)
+
+        # Each row is at risk for event times t with start < t <= stop: indices [a, b) of the unique event times
+        times = np.unique(stop[event])
+        a = np.searchsorted(times, start, side='right')
+        b = np.searchsorted(times, stop, side='right')
+        layout = _RiskSetLayout(Z, a, b, len(times), event, np.searchsorted(times, stop[event]))
+
+        penalizer = n * np.broadcast_to(np.asarray(self.penalizer, dtype=np.float64), (d,))
+        beta = np.zeros(d)
+        ll, grad, hess = layout.efron(beta)
+        ll, grad, hess = ll - 0.5 * np.sum(penalizer * beta**2), grad - penalizer * beta, hess - np.diag(penalizer)
+
+        noise = 10 * np.finfo(X.dtype).eps # relative log-likelihood resolution of the row dtype
+        for i in range(self.max_iter):
+            delta = np.linalg.solve(-hess, grad)
+            step = 1.0
+            while True: # halve the Newton step until the penalized log-likelihood improves
+                candidate = beta + step * delta
+                c_ll, c_grad, c_hess = layout.efron(candidate)
+                c_ll -= 0.5 * np.sum(penalizer * candidate**2)
+                if c_ll >= ll - noise * abs(ll) or step < 1e-6:
+                    break
+                step *= 0.5
+            improvement = c_ll - ll
+            beta, ll = candidate, c_ll
+            grad, hess = c_grad - penalizer * beta, c_hess - np.diag(penalizer)
+            if show_progress:
+                print(f"  Iteration {i + 1}: norm_delta = {np.linalg.norm(step * delta):.2e}, log_lik = {ll:.5f}")
+            # float32 rows stop improving the log-likelihood before the step norm reaches tol
+            if np.linalg.norm(step * delta) < self.tol or abs(improvement) <= noise * abs(ll):
+                break
+
+        self.log_likelihood_ = ll
+        self.hessian_ = hess
+        self.params_ = pd.Series(beta / self.norm_std_, index=pd.Index(self.covariates_, name='covariate'), name='coef')
+        # Breslow estimate, like lifelines: events at t over the partial hazard at risk at t
+        self.baseline_cumulative_hazard_ = pd.DataFrame({'baseline hazard': np.cumsum(layout.breslow(beta))},
+                                                        index=times)
+        return self
+
+    def predict_log_partial_hazard(self, X):
+        if isinstance(X, pd.DataFrame):
+            return pd.Series((X[self.covariates_].values - self.norm_mean_) @ self.params_.values, index=X.index)
+        return (np.asarray(X) - self.norm_mean_) @ self.params_.values
+
+    def predict_partial_hazard(self, X):
+        return np.exp(self.predict_log_partial_hazard(X))
+
+    def print_summary(self):
+        se = np.sqrt(np.diag(np.linalg.inv(-self.hessian_))) / self.norm_std_
+        summary = pd.DataFrame({'coef': self.params_, 'exp(coef)': np.exp(self.params_), 'se(coef)': se})
+        print(summary.to_string())
+        print(f"Penalized log-likelihood: {self.log_likelihood_:.4f}")
+
+class _RiskSetLayout:
+    """Per-row group indices reused by every Newton iteration: when each row enters/leaves the risk set."""
+    def __init__(self, Z, a, b, n_times, event, event_times):
+        self.Z = Z
+        self.a, self.b = a, b
+        self.n_times = n_times
+        self.Z_event = Z[event]
+        self.event_times = event_times
+        self.n_events = np.bincount(event_times, minlength=n_times)
+        self.pairs = np.triu_indices(Z.shape[1])
+
+    def _grouped_moments(self, Z, w, groups):
+        """
+        Sums of w, w * z and w * z z^T per event-time group, as bincounts over the rows
+        (O(rows * d^2) work with no loop over event times). Group n_times collects rows that
+        never enter / leave before the last event time and is dropped.
+        """
+        d = Z.shape[1]
+        size = self.n_times + 1
+        s0 = np.bincount(groups, weights=w, minlength=size)[:self.n_times]
+        wZ = Z * w[:, np.newaxis]
+        s1 = np.stack([np.bincount(groups, weights=wZ[:, j], minlength=size)[:self.n_times] for j in range(d)], axis=1)
+        s2 = np.zeros((self.n_times, d, d))
+        for i, j in zip(*self.pairs):
+            s2[:, i, j] = s2[:, j, i] = np.bincount(groups, weights=wZ[:, i] * Z[:, j], minlength=size)[:self.n_times]
+        return s0, s1, s2
+
+    def breslow(self, beta):
+        """Breslow baseline hazard at every event time: tied events over the at-risk sum of exp(z . beta)."""
+        eta = self.Z @ beta.astype(self.Z.dtype)
+        shift = float(eta.max())
+        w = np.exp(eta - shift)
+        S0 = np.cumsum(np.bincount(self.a, weights=w, minlength=self.n_times + 1)[:self.n_times]
+                       - np.bincount(self.b, weights=w, minlength=self.n_times + 1)[:self.n_times])
+        return self.n_events / (S0 * np.exp(shift))
+
+    def efron(self, beta):
+        """Efron log partial likelihood, gradient and Hessian in the standardized parameterization."""
+        beta_z = beta.astype(self.Z.dtype)
+        eta = self.Z @ beta_z
+        shift = float(eta.max())
+        w = np.exp(eta - shift) # scaled by exp(-shift) for stability; the shift is added back to log(phi)
+
+        # Risk-set sums for every event time: cumulative sum of (entries - exits)
+        e0, e1, e2 = self._grouped_moments(self.Z, w, self.a)
+        x0, x1, x2 = self._grouped_moments(self.Z, w, self.b)
+        S0, S1, S2 = np.cumsum(e0 - x0), np.cumsum(e1 - x1, axis=0), np.cumsum(e2 - x2, axis=0)
+
+        # Sums over the events tied at each time
+        eta_event = self.Z_event @ beta_z
+        t0, t1, t2 = self._grouped_moments(self.Z_event, np.exp(eta_event - shift), self.event_times)
+
+        # Efron: the l-th of d_k tied events sees the risk set minus l/d_k of the tied mass
+        ek = np.repeat(np.arange(self.n_times), self.n_events)
+        frac = (np.arange(len(ek)) - np.repeat(np.cumsum(self.n_events) - self.n_events, self.n_events)) / self.n_events[ek]
+        phi = S0[ek] - frac * t0[ek]
+        num1 = S1[ek] - frac[:, np.newaxis] * t1[ek]
+
+        ll = float(np.sum(eta_event, dtype=np.float64) - np.sum(np.log(phi) + shift))
+        grad = self.Z_event.sum(0, dtype=np.float64) - np.sum(num1 / phi[:, np.newaxis], axis=0)
+
+        inv_phi = np.bincount(ek, weights=1.0 / phi, minlength=self.n_times)
+        frac_phi = np.bincount(ek, weights=frac / phi, minlength=self.n_times)
+        second = np.einsum('k,kij->ij', inv_phi, S2) - np.einsum('k,kij->ij', frac_phi, t2)
+        mean_term = num1 / phi[:, np.newaxis]
+        hess = -(second - mean_term.T @ mean_term)
+        return ll, grad, hess
@@ -1,5 +1,90 @@
+import numpy as np
 import torch
 import torch.nn as nn
+from torch.nn.utils.rnn import pad_sequence, pack_padded_sequence
+from torch.utils.data import Dataset, Sampler
+
+class SequenceTensorDataset(Dataset):
+    """
+    Serves (sequence, static, label) triples from the arrays returned by construct_lstm_tensors.
+    The sequence tensor may be an np.memmap: samples are wrapped with torch.from_numpy, so only
+    the requested rows are paged in and nothing is copied into a second in-memory tensor.
+    """
+    def __init__(self, X_seq, X_static, y):
+        self.X_seq = X_seq
+        self.X_static = X_static
+        self.y = y
+
+    def __len__(self):
+        return len(self.y)
+
+    def __getitem__(self, idx):
+        return (torch.from_numpy(np.asarray(self.X_seq[idx])),
+                torch.from_numpy(np.asarray(self.X_static[idx])),
+                torch.tensor(self.y[idx], dtype=torch.float32))
+
+class RaggedSequenceDataset(Dataset):
+    """
+    Serves (sequence, static, label) triples from the flat values + offsets returned by
+    construct_ragged_sequences; each sequence has the student's own length.
+    Batch it with LengthBucketSampler and collate_ragged.
+    """
+    def __init__(self, values, offsets, X_static, y):
+        self.values = values
+        self.offsets = offsets
+        self.X_static = X_static
+        self.y = y
+        self.lengths = np.diff(offsets)
+
+    def __len__(self):
+        return len(self.y)
+
+    def __getitem__(self, idx):
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return (torch.from_numpy(np.asarray(self.values[start:end])),
+                torch.from_numpy(np.asarray(self.X_static[idx])),
+                torch.tensor(self.y[idx], dtype=torch.float32))
+
+class LengthBucketSampler(Sampler):
+    """
+    Batch sampler that groups students of similar sequence length, so a padded batch carries
+    little padding. Lengths are shuffled within ties and the batch order is shuffled per epoch.
+    """
+    def __init__(self, lengths, batch_size=64, shuffle=True, seed=42):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+    def __iter__(self):
+        if self.shuffle:
+            order = np.lexsort((self.rng.random(len(self.lengths)), self.lengths))
+        else:
+            order = np.argsort(self.lengths, kind='stable')
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        if self.shuffle:
+            self.rng.shuffle(batches)
+        for batch in batches:
+            yield batch.tolist()
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+def collate_ragged(batch):
+    """Pads a batch of ragged sequences at the end and returns (seq, static, y, lengths)."""
+    seqs, statics, ys = zip(*batch)
+    lengths = torch.tensor([len(seq) for seq in seqs], dtype=torch.int64)
+    return pad_sequence(seqs, batch_first=True), torch.stack(statics), torch.stack(ys), lengths
+
+def final_hidden_state(lstm, x_seq, lengths=None):
+    """
+    Hidden state of the LSTM's final layer after each sequence's last real step.
+    With lengths, x_seq is packed so the padding steps are never computed.
+    """
+    if lengths is not None:
+        x_seq = pack_padded_sequence(x_seq, lengths.cpu(), batch_first=True, enforce_sorted=False)
+    _, (hn, _) = lstm(x_seq)
+    return hn[-1]
 
 class LSTMDropoutPredictor(nn.Module):
     def __init__(self, sequence_features, static_features, hidden_dim=64, num_layers=2, dropout=0.3):
@@ -27,19 +112,15 @@ class LSTMDropoutPredictor(nn.Module):
         self.classifier = nn.Linear(hidden_dim // 2, 1)
         self.sigmoid = nn.Sigmoid()
         
-    def forward(self, x_seq, x_static):
+    def forward(self, x_seq, x_static, lengths=None):
         """
         x_seq: (Batch, Sequence_Length, Seq_Features)
         x_static: (Batch, Static_Features)
+        lengths: (Batch,) true sequence lengths when x_seq is padded at the end (packed path)
         """
-        # LSTM output
-        # out: (batch, seq_len, hidden_size)
-        # hn: (num_layers, batch, hidden_size) - hidden state of last time step
-        lstm_out, (hn, cn) = self.lstm(x_seq)
-        
         # We take the hidden state of the final layer of the LSTM
         # Shape: (Batch, Hidden_Dim)
-        last_hidden_state = hn[-1, :, :]
+        last_hidden_state = final_hidden_state(self.lstm, x_seq, lengths)
         
         # Concatenate sequential embedding with static demographic embedding
         combined = torch.cat((last_hidden_state, x_static), dim=1)
@@ -55,6 +136,16 @@ class LSTMDropoutPredictor(nn.Module):
         
         return probs
 
+class LightLSTM(nn.Module):
+    """Single-layer sequence-only LSTM trained by train_models.py (no static branch)."""
+    def __init__(self, in_feats, hidden=32):
+        super().__init__()
+        self.lstm  = nn.LSTM(in_feats, hidden, batch_first=True)
+        self.head  = nn.Linear(hidden, 1)
+        self.sig   = nn.Sigmoid()
+    def forward(self, x, lengths=None):
+        return self.sig(self.head(final_hidden_state(self.lstm, x, lengths)))
+
 def train_lstm(model, dataloader_train, dataloader_val, epochs=50, lr=1e-3, device='cpu'):
     criterion = nn.BCELoss() # Binary Cross Entropy Loss
     optimizer = torch.optim.Adam(model.parameters(), lr=lr)
@@ -67,14 +158,15 @@ def train_lstm(model, dataloader_train, dataloader_val, epochs=50, lr=1e-3, devi
         model.train()
         train_loss = 0.0
         
-        for batch_seq, batch_static, batch_y in dataloader_train:
+        for batch_seq, batch_static, batch_y, *batch_lengths in dataloader_train:
             batch_seq, batch_static, batch_y = batch_seq.to(device), batch_static.to(device), batch_y.to(device)
+            lengths = batch_lengths[0] if batch_lengths else None # collate_ragged batches carry lengths
             
             optimizer.zero_grad()
             
             # Forward pass
             # Ensure target shape matches output shape: (Batch, 1)
-            outputs = model(batch_seq, batch_static)
+            outputs = model(batch_seq, batch_static, lengths)
             batch_y = batch_y.unsqueeze(1).float()
             
             loss = criterion(outputs, batch_y)
@@ -89,10 +181,11 @@ def train_lstm(model, dataloader_train, dataloader_val, epochs=50, lr=1e-3, devi
         model.eval()
         val_loss = 0.0
         with torch.no_grad():
-            for batch_seq, batch_static, batch_y in dataloader_val:
+            for batch_seq, batch_static, batch_y, *batch_lengths in dataloader_val:
                 batch_seq, batch_static, batch_y = batch_seq.to(device), batch_static.to(device), batch_y.to(device)
+                lengths = batch_lengths[0] if batch_lengths else None
                 
-                outputs = model(batch_seq, batch_static)
+                outputs = model(batch_seq, batch_static, lengths)
                 batch_y = batch_y.unsqueeze(1).float()
                 
                 loss = criterion(outputs, batch_y)
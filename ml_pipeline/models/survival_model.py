@@ -1,17 +1,77 @@
+import numpy as np
 from lifelines import CoxTimeVaryingFitter
 
+from .cox_fitter import NativeCoxTimeVaryingFitter
+from ..data_prep.survival_formatting import compress_survival_episodes
+
+SCORER_FORMAT_VERSION = 1
+
+def export_survival_scorer(model, path, time_unit_days=7.0):
+    """
+    Exports a fitted Cox model (lifelines CoxPHFitter / CoxTimeVaryingFitter or
+    NativeCoxTimeVaryingFitter) as a compact .npz array artifact for serving: coefficients,
+    covariate means and the baseline cumulative hazard table. With these, the partial hazard
+    is exp((x - mean) . coef) and S(t | x) = exp(-H0(t) * partial_hazard), so scoring needs
+    neither pandas nor lifelines. time_unit_days converts the model's time axis to days.
+    """
+    if getattr(model, 'strata', None):
+        raise ValueError("Stratified Cox models have one baseline per stratum and cannot be exported.")
+    mean = getattr(model, 'norm_mean_', None)
+    if mean is None:
+        mean = model._norm_mean
+    baseline = model.baseline_cumulative_hazard_.iloc[:, 0]
+    covariates = list(model.params_.index)
+
+    package = type(model).__module__.split('.')[0]
+    version = getattr(__import__(package), '__version__', 'unknown')
+    np.savez(path,
+             format_version=SCORER_FORMAT_VERSION,
+             source=f"{package} {version} {type(model).__name__}",
+             covariates=np.array(covariates),
+             coef=model.params_.values.astype(np.float64),
+             mean=np.asarray(mean.loc[covariates] if hasattr(mean, 'loc') else mean, dtype=np.float64),
+             times=baseline.index.values.astype(np.float64),
+             cum_hazard=baseline.values.astype(np.float64),
+             time_unit_days=float(time_unit_days))
+    print(f"  Exported survival scorer ({len(covariates)} covariates, {len(baseline)} baseline times) → {path}")
+
 class SurvivalAnalysisPredictor:
-    def __init__(self, penalizer=0.1):
+    def __init__(self, penalizer=0.1, backend='lifelines'):
+        """
+        backend='native' fits with the in-repo NativeCoxTimeVaryingFitter, which reproduces the
+        lifelines coefficients with vectorized risk-set sums for cohorts of many student-weeks.
+        """
+        if backend not in ('lifelines', 'native'):
+            raise ValueError("backend must be 'lifelines' or 'native'")
         self.penalizer = penalizer
+        self.backend = backend
         # We use a Time-Varying Cox Proportional Hazards model to handle data that changes every week
-        self.model = CoxTimeVaryingFitter(penalizer=self.penalizer)
+        if backend == 'native':
+            self.model = NativeCoxTimeVaryingFitter(penalizer=self.penalizer)
+        else:
+            self.model = CoxTimeVaryingFitter(penalizer=self.penalizer)
         
-    def train(self, df_survival_format, id_col='id_student', start_col='start_time', stop_col='stop_time', event_col='event_occurred'):
+    def train(self, df_survival_format, id_col='id_student', start_col='start_time', stop_col='stop_time', event_col='event_occurred',
+              compress=False, quantization=None):
         """
         Trains the Cox Time-Varying model on longitudinal event data.
         df_survival_format must contain columns for id, start, stop, and event flag.
+        
+        compress=True first merges consecutive weeks with unchanged covariates (within
+        `quantization`, see compress_survival_episodes) into single episodes.
         """
         print("Training Cox Time-Varying Survival Model...")
+        if compress:
+            # lifelines scales its L2 term by the row count and applies it to covariates standardized
+            # over those rows; rescale the penalizer so the compressed fit optimizes the full objective
+            covariate_cols = [c for c in df_survival_format.columns if c not in (id_col, start_col, stop_col, event_col)]
+            n_rows, row_std = len(df_survival_format), df_survival_format[covariate_cols].std(0).values
+            df_survival_format = compress_survival_episodes(df_survival_format, quantization, id_col, start_col, stop_col, event_col)
+            episode_std = df_survival_format[covariate_cols].std(0).values
+            scale = np.divide(row_std, episode_std, out=np.ones_like(row_std), where=episode_std > 0) ** 2
+            self.model.penalizer = self.penalizer * scale * n_rows / len(df_survival_format)
+        else:
+            self.model.penalizer = self.penalizer
         self.model.fit(
             df_survival_format,
             id_col=id_col,
@@ -30,6 +90,10 @@ class SurvivalAnalysisPredictor:
         """
         return self.model.predict_partial_hazard(df_current_state)
         
+    def export_scorer(self, path, time_unit_days=7.0):
+        """Writes the serving artifact for this model; see export_survival_scorer."""
+        export_survival_scorer(self.model, path, time_unit_days)
+
     def plot_covariate_effects(self):
         """
         Visualizes the log-hazard ratio for each tracked behavioral or static factor.
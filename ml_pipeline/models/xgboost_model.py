@@ -1,6 +1,100 @@
+import sys
+import time
+
+import numpy as np
 import xgboost as xgb
 from sklearn.metrics import precision_recall_curve, auc, f1_score
 
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS).
+    NaN where the resource module does not exist (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+def quantile_dmatrix(data, label=None, ref=None, max_bin=256):
+    """
+    QuantileDMatrix (xgboost>=1.7) from arrays or a DataIter. Older xgboost gets a plain
+    DMatrix for in-memory arrays; iterators need QuantileDMatrix.
+    """
+    if hasattr(xgb, 'QuantileDMatrix'):
+        return xgb.QuantileDMatrix(data, label=label, ref=ref, max_bin=max_bin)
+    if isinstance(data, xgb.DataIter):
+        raise ValueError(f"Chunked training needs xgboost>=1.7 (installed {xgb.__version__})")
+    return xgb.DMatrix(data, label=label)
+
+class ResourceLogger(xgb.callback.TrainingCallback):
+    """Logs wall time per boosting round and the process peak RSS every `period` rounds."""
+    def __init__(self, period=50):
+        self.period = period
+        self.round_times = []
+        self._t0 = None
+
+    def before_iteration(self, model, epoch, evals_log):
+        self._t0 = time.perf_counter()
+        return False
+
+    def after_iteration(self, model, epoch, evals_log):
+        self.round_times.append(time.perf_counter() - self._t0)
+        if (epoch + 1) % self.period == 0:
+            recent = self.round_times[-self.period:]
+            print(f"  [round {epoch + 1}] {1000 * np.mean(recent):.1f} ms/round | peak RSS {peak_rss_mb():,.0f} MB")
+        return False
+
+    def summary(self):
+        return {'rounds': len(self.round_times),
+                'ms_per_round': 1000 * float(np.mean(self.round_times)) if self.round_times else 0.0,
+                'peak_rss_mb': peak_rss_mb()}
+
+class TabularChunkIter(xgb.DataIter):
+    """
+    Feeds the tabular feature table to XGBoost one chunk at a time, so the training matrix is
+    built (QuantileDMatrix) or paged (external memory) without the full table in RAM.
+    Use from_parquet for Parquet part files / row groups and from_arrays for (memmapped) arrays.
+    """
+    def __init__(self, chunk_loaders, cache_prefix=None):
+        self.chunk_loaders = chunk_loaders # callables returning (X, y) for one chunk
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    @classmethod
+    def from_parquet(cls, paths, feature_cols, label_col, cache_prefix=None):
+        """One chunk per Parquet row group, reading only the feature and label columns."""
+        import pyarrow.parquet as pq
+
+        def loader(path, row_group):
+            table = pq.ParquetFile(path).read_row_group(row_group, columns=list(feature_cols) + [label_col])
+            X = np.column_stack([table.column(c).to_numpy() for c in feature_cols]).astype(np.float32)
+            return X, table.column(label_col).to_numpy()
+
+        loaders = [lambda p=path, g=group: loader(p, g)
+                   for path in ([paths] if isinstance(paths, str) else paths)
+                   for group in range(pq.ParquetFile(path).num_row_groups)]
+        return cls(loaders, cache_prefix)
+
+    @classmethod
+    def from_arrays(cls, X, y, chunk_rows=100_000, cache_prefix=None):
+        """Row slices of X/y; with np.memmap inputs only the current slice is paged in."""
+        loaders = [lambda lo=lo: (np.asarray(X[lo:lo + chunk_rows]), np.asarray(y[lo:lo + chunk_rows]))
+                   for lo in range(0, len(y), chunk_rows)]
+        return cls(loaders, cache_prefix)
+
+    def next(self, input_data):
+        if self._it == len(self.chunk_loaders):
+            return False
+        X, y = self.chunk_loaders[self._it]()
+        input_data(data=X, label=y)
+        self._it += 1
+        return True
+
+    def reset(self):
+        self._it = 0
+
 class XGBoostPredictor:
     def __init__(self, params=None):
         if params is None:
@@ -21,8 +115,35 @@ class XGBoostPredictor:
         print("Training XGBoost Tabular Model...")
         dtrain = xgb.DMatrix(X_train, label=y_train)
         dval = xgb.DMatrix(X_val, label=y_val)
+        self._boost(dtrain, dval, num_rounds, early_stopping_rounds)
+        
+    def train_streaming(self, train_iter, val_iter, num_rounds=500, early_stopping_rounds=50,
+                        external_memory=False, max_bin=256):
+        """
+        Trains from TabularChunkIter instances instead of in-memory arrays.
+        By default the chunks are sketched into a QuantileDMatrix (only the compressed histogram
+        index is kept in RAM); external_memory=True pages that index through the iterator's
+        cache_prefix on disk as well, for tables larger than a worker's memory.
+        """
+        print(f"Training XGBoost Tabular Model from {len(train_iter.chunk_loaders)} chunks "
+              f"({'external memory' if external_memory else 'QuantileDMatrix'})...")
+        if external_memory:
+            if train_iter.cache_prefix is None:
+                raise ValueError("External-memory training needs a TabularChunkIter with a cache_prefix.")
+            # Only this path needs xgboost>=3.0
+            ExtMemQuantileDMatrix = getattr(xgb, 'ExtMemQuantileDMatrix', None)
+            if ExtMemQuantileDMatrix is None:
+                raise ValueError(f"External-memory training needs xgboost>=3.0 (installed {xgb.__version__})")
+            dtrain = ExtMemQuantileDMatrix(train_iter, max_bin=max_bin)
+        else:
+            dtrain = quantile_dmatrix(train_iter, max_bin=max_bin)
+        dval = quantile_dmatrix(val_iter, ref=dtrain)
+        print(f"  Training matrix built: {dtrain.num_row():,} rows | peak RSS {peak_rss_mb():,.0f} MB")
+        self._boost(dtrain, dval, num_rounds, early_stopping_rounds)
         
+    def _boost(self, dtrain, dval, num_rounds, early_stopping_rounds):
         evals = [(dtrain, 'train'), (dval, 'val')]
+        self.resource_log = ResourceLogger(period=50)
         
         self.model = xgb.train(
             self.params,
@@ -30,9 +151,12 @@ class XGBoostPredictor:
             num_boost_round=num_rounds,
             evals=evals,
             early_stopping_rounds=early_stopping_rounds,
-            verbose_eval=50
+            verbose_eval=50,
+            callbacks=[self.resource_log]
         )
-        print(f"Training completed. Best PR-AUC: {self.model.best_score:.4f}")
+        stats = self.resource_log.summary()
+        print(f"Training completed. Best PR-AUC: {self.model.best_score:.4f} | "
+              f"{stats['ms_per_round']:.1f} ms/round | peak RSS {stats['peak_rss_mb']:,.0f} MB")
         
     def predict_proba(self, X):
         dtest = xgb.DMatrix(X)
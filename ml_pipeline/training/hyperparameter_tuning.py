@@ -1,38 +1,140 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import optuna
+import xgboost as xgb
+from optuna.trial import TrialState
+from sklearn.metrics import precision_recall_curve, auc
 from sklearn.model_selection import StratifiedGroupKFold
-from .xgboost_model import XGBoostPredictor
 
-def tune_xgboost(X_df, y_series, groups, n_trials=50):
-    print("Starting Optuna Hyperparameter Optimization for XGBoost...")
-    
+from ..models.xgboost_model import quantile_dmatrix
+
+class AucprPruningCallback(xgb.callback.TrainingCallback):
+    """
+    Reports the validation aucpr of every boosting round to the Optuna trial and stops
+    the trial once the pruner judges it hopeless. Folds report at fold * num_rounds + round
+    so every trial's steps line up with the same fold and round.
+    """
+    def __init__(self, trial, step_offset, observation_key='val-aucpr'):
+        self.trial = trial
+        self.step_offset = step_offset
+        self.data_name, self.metric_name = observation_key.split('-', 1)
+
+    def after_iteration(self, model, epoch, evals_log):
+        score = evals_log[self.data_name][self.metric_name][-1]
+        self.trial.report(float(score), step=self.step_offset + epoch)
+        if self.trial.should_prune():
+            raise optuna.TrialPruned(f"Trial pruned at fold step {epoch} (val aucpr {score:.4f}).")
+        return False
+
+def build_fold_matrices(X, y, groups, n_splits=3):
+    """
+    Builds the cross-validation matrices once so every trial reuses them: a QuantileDMatrix
+    per training fold and a validation matrix sharing its quantile cuts.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    cv = StratifiedGroupKFold(n_splits=n_splits)
+    folds = []
+    for train_idx, val_idx in cv.split(X, y, groups):
+        dtrain = quantile_dmatrix(X[train_idx], label=y[train_idx])
+        dval = quantile_dmatrix(X[val_idx], label=y[val_idx], ref=dtrain)
+        folds.append((dtrain, dval, y[val_idx]))
+    return folds
+
+def make_objective(folds, num_rounds=300, early_stopping_rounds=20, nthread=None):
     def objective(trial):
         params = {
             'objective': 'binary:logistic',
             'eval_metric': 'aucpr',
+            'tree_method': 'hist',
             'max_depth': trial.suggest_int('max_depth', 3, 9),
             'learning_rate': trial.suggest_float('learning_rate', 1e-3, 0.1, log=True),
             'subsample': trial.suggest_float('subsample', 0.6, 1.0),
             'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
             'scale_pos_weight': trial.suggest_int('scale_pos_weight', 1, 15)
         }
-        
-        cv = StratifiedGroupKFold(n_splits=3)
+        if nthread:
+            params['nthread'] = nthread
+
         pr_aucs = []
-        
-        for train_idx, val_idx in cv.split(X_df, y_series, groups):
-            X_train, X_val = X_df.iloc[train_idx], X_df.iloc[val_idx]
-            y_train, y_val = y_series.iloc[train_idx], y_series.iloc[val_idx]
-            
-            xgb = XGBoostPredictor(params=params)
-            xgb.train(X_train, y_train, X_val, y_val, num_rounds=300, early_stopping_rounds=20)
-            
-            res = xgb.evaluate(X_val, y_val)
-            pr_aucs.append(res['pr_auc'])
-            
+        for fold, (dtrain, dval, y_val) in enumerate(folds):
+            bst = xgb.train(params, dtrain, num_boost_round=num_rounds, evals=[(dval, 'val')],
+                            early_stopping_rounds=early_stopping_rounds, verbose_eval=False,
+                            callbacks=[AucprPruningCallback(trial, fold * num_rounds)])
+            preds_proba = bst.predict(dval, iteration_range=(0, bst.best_iteration + 1))
+            precision, recall, _ = precision_recall_curve(y_val, preds_proba)
+            pr_aucs.append(auc(recall, precision))
+
         return sum(pr_aucs) / len(pr_aucs)
-    
-    study = optuna.create_study(direction="maximize")
-    study.optimize(objective, n_trials=n_trials)
-    
+    return objective
+
+def _make_pruner(early_stopping_rounds):
+    return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=early_stopping_rounds)
+
+def _run_worker(storage, study_name, X, y, groups, n_trials, num_rounds, early_stopping_rounds, nthread):
+    """Process-pool worker: builds its fold matrices once, then pulls trials from the shared study."""
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    folds = build_fold_matrices(X, y, groups)
+    study = optuna.load_study(study_name=study_name, storage=storage, pruner=_make_pruner(early_stopping_rounds))
+    study.optimize(make_objective(folds, num_rounds, early_stopping_rounds, nthread),
+                   callbacks=[optuna.study.MaxTrialsCallback(n_trials, states=(TrialState.COMPLETE, TrialState.PRUNED))])
+
+def tune_xgboost(X_df, y_series, groups, n_trials=50, n_jobs=1, storage_path=None, study_name='xgboost_tuning',
+                 num_rounds=300, early_stopping_rounds=20):
+    """
+    Optuna search over XGBoost hyperparameters with 3-fold StratifiedGroupKFold.
+
+    The fold matrices are built once (per worker) and reused by every trial, and a
+    MedianPruner fed with each round's validation aucpr stops unpromising trials early.
+    n_jobs > 1 runs that many worker processes against a SQLite-backed study until n_trials
+    more trials have finished (workers already mid-trial may each add one more); XGBoost
+    threads are split evenly between them.
+
+    Only an explicit storage_path persists the study: an existing study_name in it is
+    resumed. Without one every run starts fresh, and parallel workers share a temporary
+    SQLite file that is removed afterwards.
+    """
+    print("Starting Optuna Hyperparameter Optimization for XGBoost...")
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    scratch_dir = None
+    if storage_path is not None:
+        storage = f"sqlite:///{storage_path}"
+        print(f"  Study '{study_name}' in {storage_path} (resumed if it exists)")
+    elif n_jobs > 1:
+        scratch_dir = tempfile.mkdtemp(prefix="optuna_xgboost_")
+        storage = f"sqlite:///{os.path.join(scratch_dir, 'study.db')}"
+    else:
+        storage = None
+
+    try:
+        return _tune(X_df, y_series, groups, n_trials, n_jobs, storage, study_name, num_rounds,
+                     early_stopping_rounds, load_if_exists=storage_path is not None)
+    finally:
+        if scratch_dir is not None:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+def _tune(X_df, y_series, groups, n_trials, n_jobs, storage, study_name, num_rounds, early_stopping_rounds, load_if_exists):
+    study = optuna.create_study(direction="maximize", study_name=study_name, storage=storage,
+                                pruner=_make_pruner(early_stopping_rounds), load_if_exists=load_if_exists)
+
+    X, y = np.asarray(X_df, dtype=np.float32), np.asarray(y_series)
+    finished = len(study.get_trials(states=(TrialState.COMPLETE, TrialState.PRUNED)))
+    if n_jobs == 1:
+        folds = build_fold_matrices(X, y, groups)
+        study.optimize(make_objective(folds, num_rounds, early_stopping_rounds), n_trials=n_trials)
+    else:
+        nthread = max(1, (os.cpu_count() or 1) // n_jobs)
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_run_worker, storage, study_name, X, y, np.asarray(groups), finished + n_trials,
+                                   num_rounds, early_stopping_rounds, nthread) for _ in range(n_jobs)]
+            for future in futures:
+                future.result()
+
+    pruned = len(study.get_trials(states=(TrialState.PRUNED,)))
+    print(f"  {len(study.trials)} trials ({pruned} pruned)")
     print("Best hyperparameters found: ", study.best_params)
     return study.best_params
@@ -2,19 +2,20 @@ import pandas as pd
 import os
 import argparse
 
-from preprocessing.time_series import convert_to_weekly
+from preprocessing.time_series import convert_to_weekly, load_weekly_clickstream
 from augmentation.decay_simulator import simulate_decay_pattern, inject_dropout_timing
 from augmentation.hesitation_model import generate_hesitation_time
 from feature_engineering.behavioral_metrics import compute_behavioral_indices
 from rl_env.intervention_sim import simulate_rl_transitions
 
-def run_augmentation_pipeline(raw_vle_path):
+def run_augmentation_pipeline(raw_vle_path, chunksize=1_000_000):
     print("1. Loading and converting to weekly time series...")
     if not os.path.exists(raw_vle_path):
         raise FileNotFoundError(f"Data file not found: {raw_vle_path}")
         
-    vle_df = pd.read_csv(raw_vle_path)
-    weekly_ts = convert_to_weekly(vle_df)
+    # Stream the raw clickstream in chunks; only weekly per-student sums are kept in memory
+    weekly_clicks = load_weekly_clickstream(raw_vle_path, chunksize=chunksize)
+    weekly_ts = convert_to_weekly(weekly_clicks)
     
     print("2. Augmenting trajectories with decay patterns (Data Multiplication)...")
     # Duplicate dataframe for augmentation
@@ -49,10 +50,11 @@ if __name__ == "__main__":
     parser.add_argument('--input', type=str, default='studentVle.csv', help='Path to studentVle.csv')
     parser.add_argument('--output_ts', type=str, default='augmented_ts.csv', help='Path to output time series')
     parser.add_argument('--output_rl', type=str, default='rl_dataset.csv', help='Path to output RL tuples')
+    parser.add_argument('--chunksize', type=int, default=1_000_000, help='Rows of studentVle.csv read per chunk')
     args = parser.parse_args()
     
     try:
-        ts_features, rl_data = run_augmentation_pipeline(args.input)
+        ts_features, rl_data = run_augmentation_pipeline(args.input, chunksize=args.chunksize)
         
         # Save results
         ts_features.to_csv(args.output_ts, index=False)
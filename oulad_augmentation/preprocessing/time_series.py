@@ -1,10 +1,60 @@
 import pandas as pd
 import numpy as np
 
+# Compact dtypes for the raw studentVle clickstream (~10M rows)
+CLICKSTREAM_DTYPES = {
+    'code_module': 'category',
+    'code_presentation': 'category',
+    'id_student': np.int32,
+    'id_site': np.int32,
+    'date': np.int16,
+    'sum_click': np.int32,
+}
+WEEKLY_KEYS = ['code_module', 'code_presentation', 'id_student', 'week']
+
+def _align_categories(frames, cols):
+    """Gives every frame the union of the categories seen so far so concat keeps the category dtype."""
+    for col in cols:
+        categories = pd.api.types.union_categoricals([f[col] for f in frames]).categories
+        for f in frames:
+            f[col] = f[col].cat.set_categories(categories)
+    return frames
+
+def load_weekly_clickstream(vle_path, chunksize=1_000_000, start_week=0, end_week=40):
+    """
+    Streams studentVle.csv in chunks and aggregates clicks to weekly per-student sums as it
+    goes, so only one raw chunk plus the running weekly table is ever held in memory.
+    The result has a `week` column and plugs straight into `convert_to_weekly`.
+    """
+    usecols = ['code_module', 'code_presentation', 'id_student', 'date', 'sum_click']
+    dtypes = {c: CLICKSTREAM_DTYPES[c] for c in usecols}
+    
+    weekly = None
+    for chunk in pd.read_csv(vle_path, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        chunk['week'] = (chunk['date'] // 7).astype(np.int16)
+        chunk = chunk[(chunk['week'] >= start_week) & (chunk['week'] <= end_week)]
+        partial = chunk.groupby(WEEKLY_KEYS, observed=True)['sum_click'].sum().reset_index()
+        
+        # Fold the chunk into the running table; a student-week split across chunks is summed here
+        if weekly is not None:
+            partial = pd.concat(_align_categories([weekly, partial], ['code_module', 'code_presentation']), ignore_index=True)
+            partial = partial.groupby(WEEKLY_KEYS, observed=True)['sum_click'].sum().reset_index()
+        weekly = partial
+    
+    if weekly is None:
+        return pd.DataFrame({c: pd.Series(dtype=d) for c, d in
+                             [('code_module', 'category'), ('code_presentation', 'category'), ('id_student', np.int32),
+                              ('week', np.int16), ('sum_click', np.int64)]})
+    return weekly
+
 def convert_to_weekly(student_vle_df, start_week=0, end_week=40):
-    """Aggregates raw daily logs into weekly time-series per student."""
-    # Convert 'date' (days) to weeks
-    student_vle_df['week'] = np.floor(student_vle_df['date'] / 7).astype(int)
+    """
+    Aggregates raw daily logs into weekly time-series per student.
+    Also accepts the pre-aggregated output of `load_weekly_clickstream` (already has `week`).
+    """
+    if 'week' not in student_vle_df.columns:
+        # Convert 'date' (days) to weeks
+        student_vle_df['week'] = np.floor(student_vle_df['date'] / 7).astype(int)
     
     # Filter valid weeks
     df = student_vle_df[(student_vle_df['week'] >= start_week) & (student_vle_df['week'] <= end_week)]
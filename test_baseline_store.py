@@ -0,0 +1,77 @@
+import sys, os, shutil, tempfile, numpy as np
+sys.path.insert(0, os.path.abspath('.'))
+
+from agentic_system.behavioral_drift.baseline_store import BaselineStore
+from agentic_system.behavioral_drift.drift_detector import BehavioralDriftDetector
+
+rng = np.random.default_rng(3)
+FIELDS = ["windows", "heads", "counts", "mu", "sigma", "scores"]
+
+def same_state(a, b):
+    n = len(a)
+    assert a.ids == b.ids and a.index == b.index, "student ids differ"
+    for name in FIELDS:
+        assert np.array_equal(getattr(a, name)[:n], getattr(b, name)[:n]), f"{name} differs"
+    rows = np.arange(n)
+    assert all(np.array_equal(x, y) for x, y in zip(a.gather(rows), b.gather(rows))), "gathered windows differ"
+
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, "baselines")
+
+print("--- Test 1: save/load round trip with partial and wrapped windows ---")
+store = BaselineStore(window=5, n_features=4, capacity=2)
+ids = [f"STU_{i}" for i in range(7)]
+lengths = rng.integers(1, 6, len(ids))
+store.set_baselines(ids, rng.normal(size=(len(ids), 5, 4)), lengths, rng.random(len(ids)), rng.random(len(ids)) + 0.5)
+for _ in range(3): # some windows wrap, some stay partial
+    rows = store.rows(ids[:4])
+    store.push(rows, rng.normal(size=(4, 4)))
+store.scores[:len(store)] = rng.normal(size=len(store))
+store.save(path)
+loaded = BaselineStore.load(path)
+same_state(store, loaded)
+print(f"{len(loaded)} students restored")
+
+print("\n--- Test 2: copy-on-write updates stay private, r+ writes through ---")
+loaded.push(loaded.rows(["STU_0"]), np.ones((1, 4)))
+loaded.scores[0] = 99.0
+same_state(store, BaselineStore.load(path))
+shared = BaselineStore.load(path, mmap_mode="r+")
+shared.scores[1] = -7.0
+shared.scores.flush()
+assert BaselineStore.load(path).scores[1] == -7.0
+print("file unchanged by mmap_mode='c', updated by mmap_mode='r+'")
+
+print("\n--- Test 3: new students after load, re-save over the old snapshot ---")
+loaded.set_baselines(["STU_new"], rng.normal(size=(1, 5, 4)), [5], [0.3], [0.9])
+assert loaded.capacity >= len(loaded) == len(ids) + 1
+loaded.save(path)
+same_state(loaded, BaselineStore.load(path))
+print(f"{len(loaded)} students after growing and saving again")
+
+print("\n--- Test 4: integer ids round trip, mixed ids are rejected ---")
+numeric = BaselineStore(window=5, n_features=4)
+numeric.set_baselines([11, 22], rng.normal(size=(2, 5, 4)), [5, 2], [0.1, 0.2], [1.0, 1.0])
+numeric.save(path)
+assert BaselineStore.load(path).index == {11: 0, 22: 1}
+numeric.set_baselines(["STU_x"], rng.normal(size=(1, 5, 4)), [1], [0.1], [1.0])
+try:
+    numeric.save(path)
+    raise AssertionError("mixed string/integer ids were saved")
+except ValueError as e:
+    print(f"rejected: {e}")
+
+print("\n--- Test 5: a detector resumed from a snapshot scores identically ---")
+detector = BehavioralDriftDetector(baseline_window=5)
+history = rng.normal(size=(6, 8, 4))
+student_ids = [f"STU_{i}" for i in range(6)]
+detector.train_baselines(student_ids, history)
+detector.store.save(path)
+resumed = BehavioralDriftDetector(baseline_window=5, store=BaselineStore.load(path))
+resumed.autoencoder.load_state_dict(detector.autoencoder.state_dict())
+for _ in range(3):
+    X = rng.normal(size=(6, 4))
+    expected = detector.update_drift_scores_batch(student_ids, X)
+    assert np.allclose(resumed.update_drift_scores_batch(student_ids, X), expected)
+print("drift scores match after 3 updates")
+shutil.rmtree(tmp)
@@ -0,0 +1,86 @@
+import sys, os, numpy as np, pandas as pd
+sys.path.insert(0, os.path.abspath('.'))
+
+from ml_pipeline.data_prep.behavioral_drift import BehavioralDriftDetector
+from ml_pipeline.data_prep.drift_kernels import dtw_band, prefix_dtw
+from ml_pipeline.data_prep.online_drift import OnlineDriftState
+
+def reference_dtw(x, y, band=None):
+    """Textbook O(n*m) DTW; band(i) gives the allowed (lo, hi) prototype columns of row i."""
+    n, m = len(x), len(y)
+    D = np.full((n + 1, m + 1), np.inf)
+    D[0, 0] = 0.0
+    for i in range(1, n + 1):
+        lo, hi = band(i) if band else (1, m)
+        for j in range(max(lo, 1), min(hi, m) + 1):
+            cost = np.linalg.norm(x[i - 1] - y[j - 1])
+            D[i, j] = cost + min(D[i - 1, j], D[i - 1, j - 1], D[i, j - 1])
+    return D
+
+rng = np.random.default_rng(0)
+n_students, n_weeks, m = 40, 12, 15
+lengths = rng.integers(1, n_weeks + 1, n_students)
+seqs = rng.gamma(2.0, 10.0, (n_students, n_weeks, 2))
+proto = rng.gamma(2.0, 10.0, (m, 2))
+# Students with gap weeks: prefix i is compared with a prototype prefix that can run far past i
+steps = rng.choice([1, 1, 1, 3], size=(n_students, n_weeks))
+proto_ends = np.minimum(np.cumsum(steps, axis=1), m)
+
+print("--- Test 1: prefix DTW vs reference DTW ---")
+for window in (None, 1, 3):
+    got = prefix_dtw(seqs, lengths, proto, proto_ends, window=window)
+    assert np.isfinite(got).all(), f"non-finite prefix distances with window={window}"
+    for s in range(n_students):
+        rows = proto_ends[s]
+        band = None if window is None else (lambda i: tuple(int(v) for v in dtw_band(i, rows[i - 1], window)))
+        D = reference_dtw(seqs[s, :lengths[s]], proto, band)
+        expected = [D[i + 1, rows[i]] for i in range(lengths[s])]
+        assert np.allclose(got[s, :lengths[s]], expected), f"student {s} differs with window={window}"
+    print(f"window={window}: {n_students} students match")
+
+# A band wider than both sequences is exact DTW
+assert np.allclose(prefix_dtw(seqs, lengths, proto, proto_ends, window=n_weeks + m),
+                   prefix_dtw(seqs, lengths, proto, proto_ends))
+
+print("\n--- Test 2: drift feature table is finite with gap weeks and a DTW window ---")
+records = []
+for sid in range(200):
+    weeks = np.sort(rng.choice(np.arange(0, 30), size=rng.integers(3, 20), replace=False))
+    for week in weeks:
+        records.append({'id_student': sid, 'week': int(week), 'sum_click': float(rng.gamma(2.0, 20.0))})
+df = pd.DataFrame(records)
+
+detector = BehavioralDriftDetector(dtw_window=3)
+detector.build_successful_prototypes(df[df['id_student'] < 100])
+features = detector.calculate_inter_student_drift(detector.calculate_intra_student_drift(df))
+numeric = features[['drift_jsd', 'dtw_distance', 'drift_dtw_zscore']].values
+assert np.isfinite(numeric).all(), f"{(~np.isfinite(numeric)).sum()} non-finite drift features"
+print(f"{len(features)} rows, all drift features finite")
+
+print("\n--- Test 3: online replay reproduces the batch DTW distances and UDI ---")
+features = detector.calculate_unified_drift_index(features)
+online = OnlineDriftState(detector)
+replayed = pd.DataFrame([online.update(row.id_student, row.week, row.sum_click) for row in features.itertuples()])
+for column in ('dtw_distance', 'udi_final'):
+    assert np.allclose(replayed[column].values, features[column].values), f"{column} differs"
+print(f"{len(replayed)} online updates match the batch path")
+
+print("\n--- Test 4: online replay with the detector's multi-feature DTW ---")
+df['volatility_idx'] = rng.gamma(1.5, 2.0, len(df))
+cols = ['sum_click', 'volatility_idx']
+detector = BehavioralDriftDetector(dtw_window=3)
+detector.build_successful_prototypes(df[df['id_student'] < 100], feature_cols=cols)
+features = detector.calculate_unified_drift_index(
+    detector.calculate_inter_student_drift(detector.calculate_intra_student_drift(df), feature_cols=cols))
+online = OnlineDriftState(detector)
+assert online.feature_cols == cols
+replayed = pd.DataFrame([online.update(row.id_student, row.week, {c: getattr(row, c) for c in cols})
+                         for row in features.itertuples()])
+for column in ('dtw_distance', 'udi_final'):
+    assert np.allclose(replayed[column].values, features[column].values), f"{column} differs"
+try:
+    OnlineDriftState(detector).update(0, 0, 12.0)
+    raise AssertionError("a scalar was accepted for two drift features")
+except ValueError as e:
+    print(f"rejected: {e}")
+print(f"{len(replayed)} online updates over {cols} match the batch path")
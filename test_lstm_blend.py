@@ -0,0 +1,49 @@
+import sys, os, numpy as np
+sys.path.insert(0, os.path.abspath('.'))
+
+from agentic_system.risk_prediction.model_registry import get_model_registry
+from agentic_system.risk_prediction.predictor import RiskPredictor, XGB_WEIGHT, LSTM_WEIGHT
+
+registry = get_model_registry()
+predictor = RiskPredictor()
+assert predictor._lstm_scorer is not None, "LSTM artifacts are not served"
+
+print("--- Test 1: predictors on one registry share the LSTM scorer ---")
+assert RiskPredictor()._lstm_scorer is predictor._lstm_scorer is registry.lstm_scorer()
+print("one scorer for every predictor")
+
+rng = np.random.default_rng(5)
+n, n_weeks = 6, 4
+ids = [f"STU_{i}" for i in range(n)]
+activity = np.column_stack([rng.uniform(0.2, 1.0, n), rng.uniform(0.0, 5.0, n),
+                            rng.uniform(10.0, 60.0, n), rng.uniform(0.5, 3.0, n)])
+drift = rng.uniform(0.5, 2.5, n)
+for week in range(n_weeks):
+    predictor.observe_week(ids, [week] * n, activity, drift, sum_clicks=rng.gamma(2.0, 30.0, n))
+
+print("\n--- Test 2: observe_week needs raw clicks when the LSTM reads sum_click ---")
+try:
+    predictor.observe_week(ids, [n_weeks] * n, activity, drift)
+    raise AssertionError("a week without sum_clicks was recorded")
+except ValueError as e:
+    print(f"rejected: {e}")
+
+print("\n--- Test 3: predict_batch and predict blend XGBoost with the LSTM ---")
+xgb_only = predictor.predict_batch(activity, drift)
+lstm_prob = predictor._lstm_scorer.score(ids)
+assert not np.isnan(lstm_prob).any()
+blended = predictor.predict_batch(activity, drift, student_ids=ids, latency_budget_ms=60000)
+for i, result in enumerate(blended):
+    assert result["inference_source"] == "xgboost+lstm+survival", result["inference_source"]
+    expected = XGB_WEIGHT * xgb_only[i]["risk_score"] + LSTM_WEIGHT * lstm_prob[i]
+    assert abs(result["risk_score"] - expected) < 1e-3, f"{ids[i]}: {result['risk_score']} vs {expected:.4f}"
+single = predictor.predict(activity[0], drift[0], student_id=ids[0], latency_budget_ms=60000)
+assert single["inference_source"] == "xgboost+lstm+survival"
+assert single["risk_score"] == blended[0]["risk_score"]
+print(f"{n} students blended, e.g. xgb {xgb_only[0]['risk_score']} + lstm {lstm_prob[0]:.4f} -> {single['risk_score']}")
+
+print("\n--- Test 4: unseen students are served by XGBoost alone ---")
+unseen = predictor.predict(activity[0], drift[0], student_id="STU_unseen", latency_budget_ms=60000)
+assert unseen["inference_source"] == "xgboost+survival"
+print("no sequence, no blend")
+registry.clear()
@@ -0,0 +1,46 @@
+import sys, os, tempfile, warnings, numpy as np, pandas as pd
+sys.path.insert(0, os.path.abspath('.'))
+
+from lifelines import CoxPHFitter
+from ml_pipeline.models.survival_model import export_survival_scorer
+from agentic_system.risk_prediction.survival_scorer import SurvivalScorer
+
+warnings.filterwarnings('ignore')
+rng = np.random.default_rng(7)
+COVARIATES = ['sum_click', 'volatility_idx', 'synthesized_hesitation_sec', 'drift_idx']
+
+# One row per student: weeks until dropout (censored at the end of the course)
+n = 2000
+X = np.column_stack([rng.gamma(2.0, 20.0, n), rng.normal(1.0, 0.5, n), rng.gamma(3.0, 40.0, n), rng.normal(1.5, 1.0, n)])
+risk = np.exp(-0.02 * X[:, 0] + 0.5 * X[:, 3])
+weeks = np.ceil(rng.exponential(30.0 / risk))
+df = pd.DataFrame(X, columns=COVARIATES)
+df['duration'] = np.minimum(weeks, 39.0)
+df['event'] = weeks <= 39.0
+
+model = CoxPHFitter(penalizer=0.1).fit(df, duration_col='duration', event_col='event')
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'survival_scorer.npz')
+    export_survival_scorer(model, path)
+    scorer = SurvivalScorer.load(path)
+
+queries = pd.DataFrame(np.column_stack([rng.gamma(2.0, 20.0, 50), rng.normal(1.0, 0.5, 50),
+                                        rng.gamma(3.0, 40.0, 50), rng.normal(1.5, 1.0, 50)]), columns=COVARIATES)
+Q = queries[scorer.covariates].values
+
+print("--- Test 1: partial hazard ---")
+assert np.allclose(scorer.partial_hazard(Q), model.predict_partial_hazard(queries).values, rtol=1e-12)
+print("matches CoxPHFitter.predict_partial_hazard")
+
+print("\n--- Test 2: survival function, between and beyond the event times ---")
+times = np.array([0.0, 0.5, 1.0, 7.5, 12.0, 25.25, 39.0, 60.0])
+expected = model.predict_survival_function(queries, times=times).values.T
+assert np.allclose(scorer.survival_function(Q, times), expected, rtol=1e-10, atol=1e-12)
+print("matches CoxPHFitter.predict_survival_function")
+
+print("\n--- Test 3: median time to dropout, unconditional and after elapsed weeks ---")
+assert np.array_equal(scorer.median_time_to_event(Q), model.predict_median(queries).values)
+for elapsed in (3.0, 10.0):
+    conditional = model.predict_median(queries, conditional_after=np.full(len(queries), elapsed)).values
+    assert np.array_equal(scorer.median_time_to_event(Q, elapsed), conditional), f"elapsed={elapsed} differs"
+print("matches CoxPHFitter.predict_median (including conditional_after)")
@@ -7,6 +7,7 @@ Note: LSTM training requires PyTorch and GPU for full runs; here we train a ligh
 
 import os
 import sys
+import argparse
 import pandas as pd
 import numpy as np
 import joblib
@@ -15,18 +16,38 @@ from sklearn.preprocessing import StandardScaler
 
 sys.path.insert(0, os.path.abspath('.'))
 
+from ml_pipeline.data_prep.feature_cache import FeatureCache
+from ml_pipeline.data_prep.preprocessing import construct_tabular_features
+from ml_pipeline.data_prep.sequence_formatting import construct_ragged_sequences
+
 # ─────── Paths ───────
 DATA_PATH   = "oulad_augmentation/my_augmented_ts.csv"
 SAVE_DIR    = "ml_pipeline/saved_models"
+CACHE_DIR   = "ml_pipeline/feature_cache"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
+parser = argparse.ArgumentParser(description='StudyShield Phase 3 model training')
+parser.add_argument('--no-cache', action='store_true', help='Rebuild every feature table without reading or writing the cache')
+parser.add_argument('--clear-cache', action='store_true', help='Invalidate all cached feature tables before running')
+parser.add_argument('--xgb-quantile', '--xgb-streaming', dest='xgb_quantile', action='store_true',
+                    help='Train XGBoost on a QuantileDMatrix (quantised histogram index) instead of a dense DMatrix. '
+                         'The feature table is still built in memory; for out-of-core training use '
+                         'XGBoostPredictor.train_streaming with TabularChunkIter.from_parquet')
+parser.add_argument('--drift-features', action='store_true', help='Add the JSD/DTW/UDI drift columns and their lags to the tabular models (cached per stage; the online predictor does not serve them)')
+parser.add_argument('--cache-max-mb', type=int, default=2048, help='Size bound of the feature cache (least recently used tables are evicted)')
+args = parser.parse_args()
+
+cache = FeatureCache(CACHE_DIR, max_bytes=args.cache_max_mb * 1024**2, enabled=not args.no_cache)
+if args.clear_cache:
+    cache.invalidate()
+
 print("=" * 60)
 print("PHASE 3 — ML Model Training Pipeline")
 print("=" * 60)
 
 # ─────── 1. Load data ───────
 print("\n[1/5] Loading augmented OULAD dataset...")
-df = pd.read_csv(DATA_PATH)
+df = cache.cached('timeseries', lambda: pd.read_csv(DATA_PATH, low_memory=False), inputs=[DATA_PATH])
 print(f"  Loaded {len(df):,} rows | Columns: {list(df.columns[:8])} ...")
 
 # ─────── 2. Feature engineering ───────
@@ -40,9 +61,17 @@ elif 'is_collapsed' in df.columns:
 else:
     df['label'] = (df['dropout_week'].notna()).astype(int)
 
+# Drift columns (JSD/DTW/UDI) and lags: the 'drift' and 'tabular_features' cache stages
+source_df, source_stage = df, 'timeseries'
+if args.drift_features:
+    source_df, source_stage = construct_tabular_features(df, cache=cache), 'tabular_features'
+
 # Use last observation per student for tabular models
-tabular_df = df.sort_values(['id_student', 'week']).groupby('id_student').last().reset_index()
-tabular_df = tabular_df.fillna(0)
+def build_last_observation_table():
+    table = source_df.sort_values(['id_student', 'week']).groupby('id_student').last().reset_index()
+    return table.fillna(0)
+
+tabular_df = cache.cached('tabular', build_last_observation_table, inputs=[source_stage, os.path.abspath(__file__)])
 
 # Select numeric feature columns
 exclude_cols = {'id_student', 'label', 'final_result', 'is_collapsed',
@@ -82,13 +111,23 @@ try:
         'seed': 42,
     }
 
-    dtrain = xgb.DMatrix(X_train, label=y_train)
-    dval   = xgb.DMatrix(X_val, label=y_val)
+    from ml_pipeline.models.xgboost_model import ResourceLogger, quantile_dmatrix
+
+    if args.xgb_quantile:
+        # Same in-memory arrays, sketched into XGBoost's compressed quantile index
+        dtrain = quantile_dmatrix(X_train, y_train)
+        dval   = quantile_dmatrix(X_val, y_val, ref=dtrain)
+    else:
+        dtrain = xgb.DMatrix(X_train, label=y_train)
+        dval   = xgb.DMatrix(X_val, label=y_val)
     dtest  = xgb.DMatrix(X_test, label=y_test)
 
+    resource_log = ResourceLogger(period=50)
     bst = xgb.train(params, dtrain, num_boost_round=200,
                     evals=[(dtrain, 'train'), (dval, 'val')],
-                    early_stopping_rounds=20, verbose_eval=50)
+                    early_stopping_rounds=20, verbose_eval=50, callbacks=[resource_log])
+    stats = resource_log.summary()
+    print(f"  {stats['rounds']} rounds | {stats['ms_per_round']:.1f} ms/round | peak RSS {stats['peak_rss_mb']:,.0f} MB")
 
     proba = bst.predict(dtest)
     auc   = roc_auc_score(y_test, proba)
@@ -105,6 +144,7 @@ except Exception as e:
 print("\n[4/5] Training Survival Analysis model...")
 try:
     from lifelines import CoxPHFitter
+    from ml_pipeline.models.survival_model import export_survival_scorer
     survival_features = ['sum_click', 'volatility_idx', 'synthesized_hesitation_sec', 'drift_idx']
     available = [c for c in survival_features if c in tabular_df.columns]
 
@@ -127,6 +167,8 @@ try:
 
     joblib.dump(cph, f"{SAVE_DIR}/survival_model.pkl")
     print(f"  Saved → {SAVE_DIR}/survival_model.pkl")
+    # Array artifact for serving: coefficients, means and baseline cumulative hazard (durations in weeks)
+    export_survival_scorer(cph, f"{SAVE_DIR}/survival_scorer.npz", time_unit_days=7.0)
 
 except Exception as e:
     print(f"  Survival model training failed: {e}")
@@ -136,44 +178,26 @@ print("\n[5/5] Training lightweight LSTM model (5 epochs)...")
 try:
     import torch
     import torch.nn as nn
-    from torch.utils.data import TensorDataset, DataLoader
+    from torch.utils.data import DataLoader, Subset
+    from ml_pipeline.models.lstm_model import LightLSTM, RaggedSequenceDataset, LengthBucketSampler, collate_ragged
 
     SEQ_LEN    = 4
     N_STUDENTS = tabular_df['id_student'].nunique()
 
-    # Build per-student sequences of the last SEQ_LEN weeks
+    # Per-student sequences of (up to) the last SEQ_LEN weeks, unpadded
     seq_features = ['sum_click', 'volatility_idx', 'synthesized_hesitation_sec']
     seq_features = [c for c in seq_features if c in df.columns]
     static_features = []  # keep it simple for now
 
-    student_seqs, student_labels = [], []
-    for sid, grp in df.sort_values('week').groupby('id_student'):
-        seq = grp[seq_features].values[-SEQ_LEN:]
-        if len(seq) < SEQ_LEN:
-            pad = np.zeros((SEQ_LEN - len(seq), len(seq_features)))
-            seq = np.vstack([pad, seq])
-        lbl = int(grp['label'].iloc[-1]) if 'label' in grp else 0
-        student_seqs.append(seq)
-        student_labels.append(lbl)
-
-    X_seq = np.array(student_seqs, dtype=np.float32)
-    y_seq = np.array(student_labels, dtype=np.float32)
-
-    X_seq_train, X_seq_test, y_seq_train, y_seq_test = train_test_split(
-        X_seq, y_seq, test_size=0.2, random_state=42)
-
-    dataset_train = TensorDataset(torch.tensor(X_seq_train), torch.tensor(y_seq_train))
-    loader_train  = DataLoader(dataset_train, batch_size=64, shuffle=True)
-
-    class LightLSTM(nn.Module):
-        def __init__(self, in_feats, hidden=32):
-            super().__init__()
-            self.lstm  = nn.LSTM(in_feats, hidden, batch_first=True)
-            self.head  = nn.Linear(hidden, 1)
-            self.sig   = nn.Sigmoid()
-        def forward(self, x):
-            _, (h, _) = self.lstm(x)
-            return self.sig(self.head(h[-1]))
+    seq_values, seq_offsets, X_static, y_seq, _ = construct_ragged_sequences(
+        df, seq_features, max_length=SEQ_LEN, static_cols=static_features, label_col='label')
+    dataset = RaggedSequenceDataset(seq_values, seq_offsets, X_static, y_seq.astype(np.float32))
+
+    train_idx, test_idx = train_test_split(np.arange(len(dataset)), test_size=0.2, random_state=42)
+
+    # Length-bucketed batches; the LSTM packs each batch so padding steps are skipped
+    loader_train = DataLoader(Subset(dataset, train_idx), collate_fn=collate_ragged,
+                              batch_sampler=LengthBucketSampler(dataset.lengths[train_idx], batch_size=64))
 
     model     = LightLSTM(len(seq_features))
     optimizer = torch.optim.Adam(model.parameters(), lr=1e-3)
@@ -182,9 +206,9 @@ try:
     for epoch in range(5):
         model.train()
         total_loss = 0
-        for xb, yb in loader_train:
+        for xb, _, yb, lengths in loader_train:
             optimizer.zero_grad()
-            out  = model(xb).squeeze()
+            out  = model(xb, lengths).squeeze(1)
             loss = criterion(out, yb)
             loss.backward()
             optimizer.step()
@@ -192,12 +216,13 @@ try:
         print(f"  Epoch {epoch+1}/5 — Loss: {total_loss/len(loader_train):.4f}")
 
     torch.save(model.state_dict(), f"{SAVE_DIR}/lstm_model.pt")
-    joblib.dump({'seq_features': seq_features, 'seq_len': SEQ_LEN}, f"{SAVE_DIR}/lstm_meta.pkl")
+    joblib.dump({'seq_features': seq_features, 'seq_len': SEQ_LEN, 'packed': True}, f"{SAVE_DIR}/lstm_meta.pkl")
     print(f"  Saved → {SAVE_DIR}/lstm_model.pt")
 
 except Exception as e:
     print(f"  LSTM training failed: {e}")
 
+print("\n" + cache.stats_line())
 print("\n" + "=" * 60)
 print("Training complete! Models saved to:", SAVE_DIR)
 print("=" * 60)